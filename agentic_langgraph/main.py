@@ -1,5 +1,269 @@
+import asyncio
+import contextlib
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lang_graph"))
+
+import uvicorn
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from embeddings import EmbeddingBatcher
+from llm_client import LLM_CACHE_ENABLED, get_llm, get_response_cache
+from rag_graph import RAG_CHECKPOINT_DB, Retriever, arun_rag, build_rag_graph, tool_retriever
+from sqlite_checkpointer import SqliteCheckpointer
+from tracing import GraphTracer, TracedCheckpointer
+from vector_store import VECTOR_STORE_DIR, MemmapVectorStore
+
+load_dotenv()
+
+HOST = os.getenv("AGENT_HOST", "127.0.0.1")
+PORT = int(os.getenv("AGENT_PORT", "8080"))
+# Queries answered at once; the rest wait for a slot
+MAX_IN_FLIGHT = int(os.getenv("AGENT_MAX_IN_FLIGHT", "32"))
+# Concurrent queries arriving within this window share one embedding request
+EMBED_WINDOW = float(os.getenv("AGENT_EMBED_WINDOW", "0.01"))
+EMBED_MAX_BATCH = int(os.getenv("AGENT_EMBED_MAX_BATCH", "64"))
+MAX_BATCH_REQUESTS = int(os.getenv("AGENT_MAX_BATCH_REQUESTS", "256"))
+
+
+class QueryEmbedder:
+    """Coalesces the question embeddings of concurrent requests into one batched call.
+
+    The first query to arrive opens a window of `window` seconds (closed early at
+    `max_batch` queries). Everything queued by then goes to the EmbeddingBatcher
+    together, so N simultaneous requests cost one embedding round trip.
+    """
+
+    def __init__(self, batcher: EmbeddingBatcher, window: float = EMBED_WINDOW, max_batch: int = EMBED_MAX_BATCH):
+        self.batcher = batcher
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self._pending: List[tuple] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def embed(self, text: str):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if pending:
+            self.batches += 1
+            asyncio.ensure_future(self._run(pending))
+
+    async def _run(self, pending: List[tuple]) -> None:
+        try:
+            vectors = await self.batcher.aembed([text for text, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), vector in zip(pending, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+
+class AgentService:
+    """The RAG graph, its retrievers and model clients, loaded once and shared by all requests."""
+
+    def __init__(self):
+        self.ready = False
+        self.started_at = time.time()
+        self.tracer = GraphTracer()
+        self.latencies: deque = deque(maxlen=2000)
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.store: Optional[MemmapVectorStore] = None
+        self.embedder: Optional[QueryEmbedder] = None
+        self.app = None
+        self._slots = asyncio.Semaphore(MAX_IN_FLIGHT)
+        self._thread_locks: Dict[str, asyncio.Lock] = {}
+        self._thread_users: Dict[str, int] = {}
+
+    def _retrievers(self) -> Dict[str, Retriever]:
+        retrievers: Dict[str, Retriever] = {}
+        if os.path.exists(os.path.join(VECTOR_STORE_DIR, "config.json")):
+            self.store = MemmapVectorStore(VECTOR_STORE_DIR)
+            self.embedder = QueryEmbedder(EmbeddingBatcher())
+            store, embedder = self.store, self.embedder
+
+            async def vector(question: str, k: int):
+                query = await embedder.embed(question)
+                return await asyncio.to_thread(store.similarity_search_by_vector, query, k,
+                                               approximate=store.index is not None)
+            retrievers["vector_store"] = vector
+        else:
+            print(f"No vector store at {VECTOR_STORE_DIR}; run lang_graph/vector_db.py to index documents")
+        if os.getenv("TAVILY_API_KEY"):
+            from langchain_tavily import TavilySearch
+
+            retrievers["tavily_search"] = tool_retriever(TavilySearch(max_results=2), "query")
+        if not retrievers:
+            raise RuntimeError("No retrievers available: index documents with lang_graph/vector_db.py or set TAVILY_API_KEY")
+        return retrievers
+
+    async def start(self) -> None:
+        retrievers = await asyncio.to_thread(self._retrievers)
+        checkpointer = TracedCheckpointer(SqliteCheckpointer(RAG_CHECKPOINT_DB), self.tracer)
+        self.app = build_rag_graph(retrievers, get_llm(), checkpointer)
+        await self.warm()
+        self.ready = True
+
+    async def warm(self) -> None:
+        """Pay one-off costs now: embedding client, memmap pages and the LLM response cache."""
+        if self.store is not None and len(self.store):
+            query = await self.embedder.embed("warm up")
+            await asyncio.to_thread(self.store.search, query, 1)
+        if LLM_CACHE_ENABLED:
+            await asyncio.to_thread(get_response_cache)
+
+    async def query(self, text: str, thread_id: str) -> dict:
+        # Turns of one thread run in order, since each resumes from the previous checkpoint
+        lock = self._thread_locks.setdefault(thread_id, asyncio.Lock())
+        self._thread_users[thread_id] = self._thread_users.get(thread_id, 0) + 1
+        try:
+            async with lock, self._slots:
+                self.in_flight += 1
+                start = time.perf_counter()
+                try:
+                    result = await arun_rag(self.app, text, thread_id, callbacks=[self.tracer])
+                except Exception:
+                    self.errors += 1
+                    raise
+                finally:
+                    self.in_flight -= 1
+                    self.requests += 1
+                    self.latencies.append(time.perf_counter() - start)
+        finally:
+            self._thread_users[thread_id] -= 1
+            if not self._thread_users[thread_id]:
+                del self._thread_users[thread_id], self._thread_locks[thread_id]
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+    def metrics(self) -> dict:
+        latencies = sorted(self.latencies)
+        metrics = {
+            "uptime_s": time.time() - self.started_at,
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "latency_p50_ms": statistics.median(latencies) * 1000 if latencies else None,
+            "latency_p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else None,
+            "spans": self.tracer.summary(),
+        }
+        if self.embedder is not None:
+            metrics["embedding_cache"] = self.embedder.batcher.stats()
+            metrics["embedding_batches"] = self.embedder.batches
+        if LLM_CACHE_ENABLED:
+            metrics["llm_cache"] = get_response_cache().stats()
+        return metrics
+
+
+service = AgentService()
+
+
+async def _json_object(request: Request) -> Optional[dict]:
+    try:
+        body = await request.json()
+    except ValueError:
+        return None
+    return body if isinstance(body, dict) else None
+
+
+def _thread_id(item: dict) -> str:
+    # Without a thread_id each request starts its own conversation rather than sharing one
+    return str(item.get("thread_id") or uuid.uuid4().hex)
+
+
+async def query(request: Request) -> JSONResponse:
+    body = await _json_object(request)
+    if body is None:
+        return JSONResponse({"error": "body must be a JSON object"}, status_code=400)
+    if not isinstance(body.get("query"), str) or not body["query"]:
+        return JSONResponse({"error": "query must be a non-empty string"}, status_code=400)
+    thread_id = _thread_id(body)
+    try:
+        result = await service.query(body["query"], thread_id)
+    except Exception as e:
+        return JSONResponse({"error": f"{type(e).__name__}: {e}", "thread_id": thread_id}, status_code=500)
+    return JSONResponse({**result, "thread_id": thread_id})
+
+
+async def batch(request: Request) -> JSONResponse:
+    """Answer many {"query", "thread_id"} items concurrently; results are in request order."""
+    body = await _json_object(request)
+    items = body.get("requests", []) if body is not None else None
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return JSONResponse({"error": "body must be a JSON object with a list of request objects"}, status_code=400)
+    if len(items) > MAX_BATCH_REQUESTS:
+        return JSONResponse({"error": f"at most {MAX_BATCH_REQUESTS} requests per batch"}, status_code=400)
+
+    async def run(item: dict) -> dict:
+        thread_id = _thread_id(item)
+        if not isinstance(item.get("query"), str) or not item["query"]:
+            return {"error": "query must be a non-empty string", "thread_id": thread_id}
+        try:
+            return {**await service.query(item["query"], thread_id), "thread_id": thread_id}
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}", "thread_id": thread_id}
+
+    return JSONResponse({"results": await asyncio.gather(*(run(item) for item in items))})
+
+
+async def health(request: Request) -> JSONResponse:
+    status = {"status": "ok" if service.ready else "starting",
+              "vectors": len(service.store) if service.store is not None else 0}
+    return JSONResponse(status, status_code=200 if service.ready else 503)
+
+
+async def metrics(request: Request) -> JSONResponse:
+    return JSONResponse(service.metrics())
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    await service.start()
+    yield
+    service.tracer.close()
+    if service.store is not None:
+        service.store.close()
+
+
+app = Starlette(
+    routes=[
+        Route("/query", query, methods=["POST"]),
+        Route("/batch", batch, methods=["POST"]),
+        Route("/health", health),
+        Route("/metrics", metrics),
+    ],
+    lifespan=lifespan,
+)
+
+
 def main():
-    print("Hello from agentic-langgraph!")
+    uvicorn.run(app, host=HOST, port=PORT)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,104 @@
+"""Checkpointer footprint and resume latency at many threads.
+
+Runs the chatbot graph with an echo node in place of the LLM over --threads threads of
+--turns turns each, first with MemorySaver and then with SqliteCheckpointer, and
+reports write throughput, resident memory growth, disk size and the latency of resuming
+random threads (get_state on a freshly opened checkpointer).
+
+    python bench_checkpointer.py --threads 10000 --turns 5
+"""
+import argparse
+import gc
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(".")
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import StateGraph, START, END
+
+from my_state import MyState
+from sqlite_checkpointer import SqliteCheckpointer
+
+
+def build_graph(checkpointer):
+    builder = StateGraph(MyState)
+    builder.add_node("chatbot", lambda state: {"messages": [AIMessage(f"echo: {state['messages'][-1].content}")]})
+    builder.add_edge(START, "chatbot")
+    builder.add_edge("chatbot", END)
+    return builder.compile(checkpointer=checkpointer)
+
+
+def rss() -> int:
+    """Current resident set size in bytes (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def fill(graph, threads: int, turns: int, text: str) -> float:
+    start = time.perf_counter()
+    for turn in range(turns):
+        for thread_id in range(threads):
+            graph.invoke({"messages": [f"{text} {turn}"]}, {"configurable": {"thread_id": f"thread-{thread_id}"}})
+    return time.perf_counter() - start
+
+
+def resume_latency(graph, threads: int, samples: int, expected: int):
+    latencies = []
+    for thread_id in random.sample(range(threads), min(samples, threads)):
+        start = time.perf_counter()
+        state = graph.get_state({"configurable": {"thread_id": f"thread-{thread_id}"}})
+        latencies.append(time.perf_counter() - start)
+        assert len(state.values["messages"]) == expected
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=10_000)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--message-chars", type=int, default=200)
+    parser.add_argument("--samples", type=int, default=1000)
+    parser.add_argument("--db", default=None, help="SQLite path (default: a temporary file)")
+    args = parser.parse_args()
+    text = "x" * args.message_chars
+    steps = args.threads * args.turns
+    expected = 2 * args.turns
+
+    gc.collect()
+    before = rss()
+    memory = build_graph(MemorySaver())
+    elapsed = fill(memory, args.threads, args.turns, text)
+    grown = rss() - before
+    p50, p99 = resume_latency(memory, args.threads, args.samples, expected)
+    print(f"MemorySaver         {steps / elapsed:8.0f} turns/s  rss+={grown / 2**20:8.1f} MiB  "
+          f"resume p50={p50 * 1000:.3f} ms p99={p99 * 1000:.3f} ms")
+    del memory
+    gc.collect()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(prefix="checkpoints-"), "checkpoints.db")
+    before = rss()
+    saver = SqliteCheckpointer(path)
+    elapsed = fill(build_graph(saver), args.threads, args.turns, text)
+    grown = rss() - before
+    saver.compact()
+    saver.close()
+
+    resumed = SqliteCheckpointer(path)
+    p50, p99 = resume_latency(build_graph(resumed), args.threads, args.samples, expected)
+    disk = sum(resumed.disk_usage().values())
+    print(f"SqliteCheckpointer  {steps / elapsed:8.0f} turns/s  rss+={grown / 2**20:8.1f} MiB  "
+          f"resume p50={p50 * 1000:.3f} ms p99={p99 * 1000:.3f} ms  disk={disk / 2**20:.1f} MiB ({path})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Chunking throughput: one-process split of the whole corpus versus the incremental pool.
+
+Generates --docs synthetic documents, then times the original approach (one splitter,
+split_documents over everything), a cold run of chunk_documents across --workers
+processes, a warm run with nothing changed, and a run after editing --changed docs.
+
+    python bench_chunking.py --docs 400 --doc-chars 60000 --workers 4
+    python bench_chunking.py --encoding ""   # measure characters, no tokenizer download
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from langchain_core.documents import Document
+
+from chunking import ChunkManifest, SplitterSpec, chunk_documents
+
+WORDS = "agent memory planning tool reflection retrieval prompt attack model token context vector".split()
+
+
+def make_document(i: int, chars: int, rng: random.Random) -> Document:
+    paragraphs, size = [], 0
+    while size < chars:
+        paragraph = " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))) + "."
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+    return Document(page_content="\n\n".join(paragraphs), metadata={"source": f"doc-{i}"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=400)
+    parser.add_argument("--doc-chars", type=int, default=60_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--changed", type=int, default=10)
+    parser.add_argument("--encoding", default="gpt2")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    documents = [make_document(i, args.doc_chars, rng) for i in range(args.docs)]
+    spec = SplitterSpec(encoding=args.encoding or None, chunk_size=1000 if args.encoding else 4000, chunk_overlap=50)
+    manifest = ChunkManifest(os.path.join(tempfile.mkdtemp(prefix="chunks-"), "manifest.db"))
+
+    start = time.perf_counter()
+    chunks = spec.build().split_documents(documents)
+    print(f"{'single process, full':<26} {time.perf_counter() - start:7.2f} s  chunks={len(chunks)}")
+
+    def run(label):
+        start = time.perf_counter()
+        diff = chunk_documents(documents, manifest, spec, args.workers)
+        print(f"{label:<26} {time.perf_counter() - start:7.2f} s  added={len(diff.added):<6} "
+              f"removed={len(diff.removed):<6} changed_docs={diff.changed_docs:<5} unchanged_docs={diff.unchanged_docs}")
+
+    run(f"pool x{args.workers}, cold")
+    run(f"pool x{args.workers}, unchanged")
+    for i in range(args.changed):
+        documents[i] = Document(page_content=documents[i].page_content + "\n\nAn appended paragraph.",
+                                metadata=documents[i].metadata)
+    run(f"{args.changed} docs edited")
+
+
+if __name__ == "__main__":
+    main()
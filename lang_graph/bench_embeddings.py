@@ -0,0 +1,58 @@
+"""Embedding throughput: one request per chunk versus the cached, batched scheduler.
+
+Uses HashEmbeddings with --latency seconds per request, standing in for a provider
+round trip. The corpus has --duplicates share of repeated chunks. The second batched
+run re-embeds the same corpus, so it should be all cache hits.
+
+    python bench_embeddings.py --chunks 2000 --latency 0.05 --batch-size 64 --concurrency 4
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from embeddings import EmbeddingBatcher, EmbeddingCache, HashEmbeddings
+
+WORDS = "agent memory planning tool reflection retrieval prompt attack model token context vector".split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--duplicates", type=float, default=0.2)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--batch-tokens", type=int, default=8000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--naive-chunks", type=int, default=200, help="chunks sent one per request in the baseline")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    texts = []
+    for i in range(args.chunks):
+        if texts and rng.random() < args.duplicates:
+            texts.append(rng.choice(texts))
+        else:
+            texts.append(f"chunk {i}: " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(50, 200))))
+
+    backend = HashEmbeddings(latency=args.latency)
+    start = time.perf_counter()
+    for text in texts[:args.naive_chunks]:
+        backend.embed_documents([text])
+    rate = args.naive_chunks / (time.perf_counter() - start)
+    print(f"{'one request per chunk':<24} {rate:9.1f} embeddings/s")
+
+    cache = EmbeddingCache(os.path.join(tempfile.mkdtemp(prefix="embeddings-"), "cache.db"))
+    for label in ("batched, cold cache", "batched, warm cache"):
+        batcher = EmbeddingBatcher(backend, "hash", cache, args.batch_size, args.batch_tokens, args.concurrency)
+        start = time.perf_counter()
+        matrix = batcher.embed(texts)
+        elapsed = time.perf_counter() - start
+        stats = batcher.stats()
+        print(f"{label:<24} {len(texts) / elapsed:9.1f} chunks/s  {stats['embeddings_per_second']:9.1f} embeddings/s  "
+              f"hit_rate={stats['hit_rate']:.2f}  misses={stats['misses']}  shape={matrix.shape}")
+
+
+if __name__ == "__main__":
+    main()
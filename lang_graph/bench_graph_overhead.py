@@ -0,0 +1,132 @@
+"""Framework overhead of a run_graph turn: LangGraph, the message reducer and the checkpointer.
+
+Runs the compiled chatbot graph against an in-process fake chat model with no
+latency, over a grid of checkpointer backend x thread count x prefilled history
+length. Per configuration it reports throughput, per-step overhead (turn time minus
+the time of calling the fake model directly on the same history) and resident
+memory growth per thread.
+
+Results can be saved with --save and compared with --baseline; configurations whose
+overhead grew by more than --tolerance are flagged, so framework-side regressions
+show up in a plain diff of two runs.
+
+    python bench_graph_overhead.py --backends none memory sqlite --threads 10 200 --history 0 50 --save base.json
+    python bench_graph_overhead.py --baseline base.json
+"""
+import argparse
+import gc
+import json
+import os
+import tempfile
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from bench_checkpointer import rss
+from bench_run_graph import FakeChatModel
+from lang_graph import build_graph
+from sqlite_checkpointer import SqliteCheckpointer
+
+
+def make_checkpointer(backend: str):
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return MemorySaver()
+    return SqliteCheckpointer(os.path.join(tempfile.mkdtemp(prefix="bench-overhead-"), "checkpoints.db"))
+
+
+def history_messages(length: int) -> list:
+    messages = []
+    for i in range(length):
+        messages += [HumanMessage(f"question {i} " + "x" * 80), AIMessage(f"answer {i} " + "y" * 160)]
+    return messages
+
+
+def model_seconds(model, history: list, calls: int = 200) -> float:
+    messages = history + [HumanMessage("hello")]
+    start = time.perf_counter()
+    for _ in range(calls):
+        model.invoke(messages)
+    return (time.perf_counter() - start) / calls
+
+
+def measure(backend: str, threads: int, history: int, turns: int) -> dict:
+    model = FakeChatModel(first_token=0, per_token=0, words=20)
+    app = build_graph(llm=model, checkpointer=make_checkpointer(backend))
+    prefix = history_messages(history)
+    gc.collect()
+    before = rss()
+
+    if backend != "none" and prefix:
+        for thread in range(threads):
+            app.invoke({"messages": prefix}, {"configurable": {"thread_id": f"t{thread}"}})
+    sent = [] if backend != "none" else prefix
+    steps = 0
+    start = time.perf_counter()
+    for turn in range(turns):
+        for thread in range(threads):
+            app.invoke({"messages": sent + [f"turn {turn}"]}, {"configurable": {"thread_id": f"t{thread}"}})
+            steps += 1
+    elapsed = time.perf_counter() - start
+    grown = rss() - before
+
+    state = app.get_state({"configurable": {"thread_id": "t0"}}).values if backend != "none" else {}
+    kept = len(state.get("messages", [])) or len(prefix) + 2
+    per_step = elapsed / steps
+    return {
+        "backend": backend,
+        "threads": threads,
+        "history": history,
+        "turns_per_s": steps / elapsed,
+        "step_ms": per_step * 1000,
+        "overhead_ms": (per_step - model_seconds(model, history_messages(min(history, kept // 2)))) * 1000,
+        "kb_per_thread": grown / threads / 1024,
+        "messages_kept": kept,
+    }
+
+
+def key(result: dict) -> str:
+    return f"{result['backend']}/threads={result['threads']}/history={result['history']}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["none", "memory", "sqlite"],
+                        choices=["none", "memory", "sqlite"])
+    parser.add_argument("--threads", type=int, nargs="+", default=[10, 200])
+    parser.add_argument("--history", type=int, nargs="+", default=[0, 50], help="prefilled turns per thread")
+    parser.add_argument("--turns", type=int, default=3, help="timed turns per thread")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON file from an earlier --save to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="overhead growth flagged as a regression")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {key(r): r for r in json.load(f)}
+
+    results = []
+    print(f"{'configuration':<36} {'turns/s':>9} {'step ms':>8} {'overhead ms':>12} {'KiB/thread':>11} {'kept':>5}")
+    for backend in args.backends:
+        for threads in args.threads:
+            for history in args.history:
+                result = measure(backend, threads, history, args.turns)
+                results.append(result)
+                line = (f"{key(result):<36} {result['turns_per_s']:>9.0f} {result['step_ms']:>8.3f} "
+                        f"{result['overhead_ms']:>12.3f} {result['kb_per_thread']:>11.1f} {result['messages_kept']:>5}")
+                previous = baseline.get(key(result))
+                if previous:
+                    change = result["overhead_ms"] / previous["overhead_ms"] - 1
+                    line += f"  {change:+.0%} vs baseline" + ("  REGRESSION" if change > args.tolerance else "")
+                print(line)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
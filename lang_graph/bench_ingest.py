@@ -0,0 +1,123 @@
+"""Ingestion against a local fixture server: sequential loads versus concurrent cached fetching.
+
+The fixture serves --pages HTML pages with a fixed per-request delay and honours
+If-None-Match / If-Modified-Since, so the runs show the connection-limited speedup
+of a cold fetch and that a warm re-index downloads no bodies. Between the last two
+runs --changed pages are edited, and only those should be downloaded again.
+
+    python bench_ingest.py --pages 200 --delay 0.05 --connections 16
+"""
+import argparse
+import asyncio
+import hashlib
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from ingest import HttpCache, fetch_all, to_document
+
+
+class FixtureSite:
+    """In-memory pages served over HTTP with ETag and Last-Modified validators."""
+
+    def __init__(self, pages: int, delay: float):
+        self.delay = delay
+        self.pages = {}
+        self.bodies_sent = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        for i in range(pages):
+            self.edit(i)
+
+    def edit(self, i: int) -> None:
+        body = (f"<html lang='en'><head><title>Page {i}</title></head><body>"
+                f"<p>{'Agents plan, remember and use tools. ' * 50}</p><p>revision {time.time_ns()}</p></body></html>").encode()
+        self.pages[f"/page/{i}"] = (body, f'"{hashlib.sha256(body).hexdigest()[:16]}"', formatdate(time.time(), usegmt=True))
+
+    def handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                time.sleep(site.delay)
+                page = site.pages.get(self.path)
+                if page is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body, etag, modified = page
+                if self.headers.get("If-None-Match") == etag:
+                    with site._lock:
+                        site.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                with site._lock:
+                    site.bodies_sent += 1
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", modified)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def reset_counters(self) -> None:
+        self.bodies_sent = self.not_modified = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--delay", type=float, default=0.05, help="server-side latency per request (s)")
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--changed", type=int, default=10)
+    args = parser.parse_args()
+
+    site = FixtureSite(args.pages, args.delay)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), site.handler())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    urls = [f"{base}/page/{i}" for i in range(args.pages)]
+    cache = HttpCache(tempfile.mkdtemp(prefix="http-cache-"))
+
+    def run(label, fetch):
+        site.reset_counters()
+        start = time.perf_counter()
+        documents = fetch()
+        elapsed = time.perf_counter() - start
+        print(f"{label:<26} {elapsed:7.2f} s  {len(urls) / elapsed:7.1f} pages/s  "
+              f"bodies={site.bodies_sent:<5} 304s={site.not_modified:<5} docs={len(documents)}")
+
+    def sequential():
+        with httpx.Client() as client:
+            return [client.get(url).text for url in urls]
+
+    def concurrent():
+        results = asyncio.run(fetch_all(urls, args.connections, cache))
+        return [to_document(r) for r in results if r.ok]
+
+    run("sequential, no cache", sequential)
+    run("concurrent, cold cache", concurrent)
+    run("concurrent, warm cache", concurrent)
+    for i in range(args.changed):
+        site.edit(i)
+    run(f"warm, {args.changed} pages edited", concurrent)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
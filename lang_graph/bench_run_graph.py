@@ -0,0 +1,127 @@
+"""Throughput of run_graph-style sequential turns versus the batch and streaming APIs.
+
+Uses a local fake chat model with a fixed time-to-first-token and per-token delay,
+so the numbers measure graph and checkpointer overhead plus concurrency, not the
+provider. Checkpoints go to a temporary SqliteCheckpointer.
+
+    python bench_run_graph.py --conversations 200 --concurrency 1 8 32
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+sys.path.append(".")
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from lang_graph import arun_graph_batch, astream_graph, build_graph
+from sqlite_checkpointer import SqliteCheckpointer
+
+
+class FakeChatModel(BaseChatModel):
+    """Echoes the last message back after `first_token` seconds, one word per `per_token` seconds."""
+
+    first_token: float = 0.05
+    per_token: float = 0.005
+    words: int = 20
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-latency"
+
+    def _reply(self, messages: List[BaseMessage]) -> List[str]:
+        return (f"echo {messages[-1].content} " * self.words).split()[:self.words]
+
+    def _generate(self, messages, stop=None, run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any):
+        time.sleep(self.first_token + self.per_token * self.words)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(" ".join(self._reply(messages))))])
+
+    async def _agenerate(self, messages, stop=None, run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any):
+        await asyncio.sleep(self.first_token + self.per_token * self.words)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(" ".join(self._reply(messages))))])
+
+    def _stream(self, messages, stop=None, run_manager: Optional[CallbackManagerForLLMRun] = None,
+                **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.first_token)
+        for word in self._reply(messages):
+            time.sleep(self.per_token)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.first_token)
+        for word in self._reply(messages):
+            await asyncio.sleep(self.per_token)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def report(label: str, turns: int, elapsed: float) -> None:
+    print(f"{label:<28} {turns / elapsed:8.1f} turns/s  {elapsed:7.2f} s")
+
+
+def sequential(app, requests) -> float:
+    start = time.perf_counter()
+    for user_input, thread_id in requests:
+        app.invoke({"messages": [user_input]}, config={"configurable": {"thread_id": thread_id}})
+    return time.perf_counter() - start
+
+
+async def streaming(app, conversations: int, prefix: str):
+    first_token, total = [], []
+    for i in range(conversations):
+        start = time.perf_counter()
+        first = None
+        async for event in astream_graph("hello", f"{prefix}-{i}", app=app):
+            if first is None and event["type"] == "token":
+                first = time.perf_counter() - start
+        first_token.append(first)
+        total.append(time.perf_counter() - start)
+    return statistics.median(first_token), statistics.median(total)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--first-token", type=float, default=0.05)
+    parser.add_argument("--per-token", type=float, default=0.005)
+    args = parser.parse_args()
+
+    llm = FakeChatModel(first_token=args.first_token, per_token=args.per_token)
+    saver = SqliteCheckpointer(os.path.join(tempfile.mkdtemp(prefix="bench-run-graph-"), "checkpoints.db"))
+    app = build_graph(llm=llm, checkpointer=saver)
+    turns = args.conversations * args.turns
+
+    def requests(prefix: str):
+        return [(f"turn {turn}", f"{prefix}-{i}") for turn in range(args.turns) for i in range(args.conversations)]
+
+    report("sequential invoke", turns, sequential(app, requests("seq")))
+    for concurrency in args.concurrency:
+        start = time.perf_counter()
+        results = asyncio.run(arun_graph_batch(requests(f"batch{concurrency}"), concurrency, app=app))
+        elapsed = time.perf_counter() - start
+        failed = sum(isinstance(r, Exception) for r in results)
+        report(f"batch concurrency={concurrency}", turns, elapsed)
+        if failed:
+            print(f"  {failed} turns failed, first: {next(r for r in results if isinstance(r, Exception))!r}")
+
+    first, total = asyncio.run(streaming(app, min(args.conversations, 50), "stream"))
+    print(f"{'stream':<28} first token p50={first * 1000:.1f} ms  full turn p50={total * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Recall and latency of exact versus IVF / IVF-PQ search on MemmapVectorStore.
+
+Fills a store with --vectors clustered random embeddings, then for each search mode
+reports per-query latency over --queries queries (searched in one batch) and
+recall@k against exact search.
+
+    python bench_vector_store.py --vectors 200000 --dim 384 --nprobe 4 8 16 --pq-m 48 --refine 10
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from vector_store import MemmapVectorStore
+
+
+def clustered(rng: np.random.Generator, n: int, dim: int, centers: np.ndarray) -> np.ndarray:
+    labels = rng.integers(0, len(centers), n)
+    return (centers[labels] + 0.5 * rng.standard_normal((n, dim))).astype(np.float32)
+
+
+def recall(found: np.ndarray, truth: np.ndarray) -> float:
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def timed(store, queries, k, **kwargs):
+    start = time.perf_counter()
+    _, rows = store.search(queries, k, **kwargs)
+    return rows, (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dtype", default="float32", choices=["float32", "float16"])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--pq-m", type=int, default=48)
+    parser.add_argument("--refine", type=int, default=10, help="IVF-PQ candidates re-scored exactly, as a multiple of k")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    centers = rng.standard_normal((256, args.dim)).astype(np.float32)
+    store = MemmapVectorStore(tempfile.mkdtemp(prefix="vector-store-"), dim=args.dim, dtype=args.dtype)
+    start = time.perf_counter()
+    for offset in range(0, args.vectors, 50_000):
+        n = min(50_000, args.vectors - offset)
+        store.add([f"v{offset + i}" for i in range(n)], clustered(rng, n, args.dim, centers))
+    print(f"added {args.vectors:,} x {args.dim} {args.dtype} in {time.perf_counter() - start:.1f} s")
+    queries = clustered(rng, args.queries, args.dim, centers)
+
+    truth, per_query = timed(store, queries, args.k)
+    print(f"{'exact':<22} {per_query * 1000:8.3f} ms/query  recall@{args.k}=1.000")
+
+    for pq_m in (None, args.pq_m):
+        start = time.perf_counter()
+        store.build_index(pq_m=pq_m)
+        label = f"ivf-pq m={pq_m}" if pq_m else "ivf"
+        print(f"built {label} ({len(store.index.centroids)} lists) in {time.perf_counter() - start:.1f} s")
+        for nprobe in args.nprobe:
+            rows, per_query = timed(store, queries, args.k, approximate=True, nprobe=nprobe,
+                                    refine=args.refine)
+            print(f"{label + f' nprobe={nprobe}':<22} {per_query * 1000:8.3f} ms/query  "
+                  f"recall@{args.k}={recall(rows, truth):.3f}")
+
+
+if __name__ == "__main__":
+    main()
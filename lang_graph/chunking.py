@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+# tiktoken encoding used to measure chunk length; None measures characters instead
+CHUNK_ENCODING = os.getenv("CHUNK_ENCODING", "gpt2") or None
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "4000"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", str(os.cpu_count() or 1)))
+CHUNK_MANIFEST_PATH = os.getenv(
+    "CHUNK_MANIFEST_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "chunk_manifest.db")
+)
+
+MANIFEST_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS documents (
+        source TEXT PRIMARY KEY,
+        doc_hash TEXT NOT NULL,
+        chunk_ids TEXT NOT NULL
+    );
+"""
+
+
+@dataclass(frozen=True)
+class SplitterSpec:
+    """Picklable description of the text splitter each worker builds once."""
+    encoding: Optional[str] = CHUNK_ENCODING
+    chunk_size: int = CHUNK_SIZE
+    chunk_overlap: int = CHUNK_OVERLAP
+
+    def build(self):
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        if self.encoding:
+            return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+                encoding_name=self.encoding, chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap
+            )
+        return RecursiveCharacterTextSplitter(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
+
+
+@dataclass
+class Chunk:
+    id: str
+    source: str
+    text: str
+    metadata: dict = field(default_factory=dict)
+
+    @property
+    def hash(self) -> str:
+        return hashlib.sha256(self.text.encode()).hexdigest()
+
+    def to_document(self) -> Document:
+        return Document(page_content=self.text, metadata={**self.metadata, "chunk_id": self.id}, id=self.id)
+
+
+@dataclass
+class ChunkDiff:
+    """What a run changed: chunks to embed/index and chunk ids to delete downstream."""
+    added: List[Chunk] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged_docs: int = 0
+    changed_docs: int = 0
+
+
+def document_hash(document: Document) -> str:
+    payload = json.dumps(document.metadata, sort_keys=True, default=str) + "\x00" + document.page_content
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def document_key(document: Document) -> str:
+    """Manifest key of a document: its source, plus the page or start offset when a loader split the file."""
+    source = document.metadata.get("source", "")
+    if "page" in document.metadata:
+        return f"{source}#page={document.metadata['page']}"
+    if "start_index" in document.metadata:
+        return f"{source}#start={document.metadata['start_index']}"
+    return source
+
+
+def chunk_id(key: str, text: str, occurrence: int) -> str:
+    """Stable id from the chunk's document key and text, so an edit elsewhere in the document keeps it."""
+    return hashlib.sha256(f"{key}\x00{occurrence}\x00{text}".encode()).hexdigest()[:32]
+
+
+_splitter = None
+
+
+def _init_worker(spec: SplitterSpec) -> None:
+    global _splitter
+    _splitter = spec.build()
+
+
+def _split(job: Tuple[str, str, dict]) -> Tuple[str, List[Chunk]]:
+    key, text, metadata = job
+    source = metadata.get("source", "")
+    seen: Dict[str, int] = {}
+    chunks = []
+    for piece in _splitter.split_text(text):
+        occurrence = seen.get(piece, 0)
+        seen[piece] = occurrence + 1
+        chunks.append(Chunk(chunk_id(key, piece, occurrence), source, piece, metadata))
+    return key, chunks
+
+
+class ChunkManifest:
+    """Per-document hash and chunk ids from the last run, in SQLite, keyed by document_key."""
+
+    def __init__(self, path: str = CHUNK_MANIFEST_PATH):
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(MANIFEST_SCHEMA)
+
+    def get(self, key: str) -> Optional[Tuple[str, List[str]]]:
+        row = self._conn.execute("SELECT doc_hash, chunk_ids FROM documents WHERE source = ?", (key,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def put(self, key: str, doc_hash: str, chunk_ids: List[str]) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, ?)", (key, doc_hash, json.dumps(chunk_ids)))
+
+    def remove(self, key: str) -> None:
+        self._conn.execute("DELETE FROM documents WHERE source = ?", (key,))
+
+    def keys(self) -> List[str]:
+        return [row[0] for row in self._conn.execute("SELECT source FROM documents")]
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def iter_chunks(documents: Iterable[Document], spec: SplitterSpec = SplitterSpec(), workers: int = CHUNK_WORKERS,
+                batch: int = 8, keys: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, List[Chunk]]]:
+    """Split documents across a process pool, yielding (key, chunks) in input order.
+
+    `keys` name the documents (default: document_key of each). Every worker builds the
+    splitter (and loads its tokenizer) once. With workers <= 1 the split runs in this process.
+    """
+    documents = list(documents)
+    keys = keys if keys is not None else map(document_key, documents)
+    jobs = ((key, d.page_content, d.metadata) for key, d in zip(keys, documents))
+    if workers <= 1:
+        _init_worker(spec)
+        yield from map(_split, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(spec,)) as pool:
+        yield from pool.map(_split, jobs, chunksize=batch)
+
+
+def chunk_documents(documents: Iterable[Document], manifest: Optional[ChunkManifest] = None,
+                    spec: SplitterSpec = SplitterSpec(), workers: int = CHUNK_WORKERS,
+                    prune_missing: bool = False, key: Callable[[Document], str] = document_key,
+                    commit: bool = True) -> ChunkDiff:
+    """Chunk only the documents that changed since the last run.
+
+    Documents are tracked by `key` (default: source plus page or start offset); when
+    several documents share a key, later ones get "#<n>" appended in input order. A
+    document is skipped when its content hash matches the manifest. For a changed
+    document, chunks whose id already existed are left out of `added`, and ids that
+    disappeared are listed in `removed`. Downstream embedding and indexing therefore
+    only touch what changed. With `prune_missing`, documents absent from this run
+    count as deleted. With `commit=False` the manifest is left uncommitted, so the
+    caller can commit it only once the downstream store has applied the diff.
+    """
+    manifest = manifest or ChunkManifest()
+    diff = ChunkDiff()
+    counts: Dict[str, int] = {}
+    seen_keys = set()
+    pending: List[Document] = []
+    pending_keys: List[str] = []
+    hashes: Dict[str, str] = {}
+    for document in documents:
+        base = key(document)
+        n = counts.get(base, 0)
+        counts[base] = n + 1
+        doc_key = f"{base}#{n}" if n else base
+        seen_keys.add(doc_key)
+        doc_hash = document_hash(document)
+        previous = manifest.get(doc_key)
+        if previous and previous[0] == doc_hash:
+            diff.unchanged_docs += 1
+            continue
+        hashes[doc_key] = doc_hash
+        pending.append(document)
+        pending_keys.append(doc_key)
+
+    for doc_key, chunks in iter_chunks(pending, spec, workers, keys=pending_keys):
+        previous = manifest.get(doc_key)
+        old_ids = set(previous[1]) if previous else set()
+        new_ids = [c.id for c in chunks]
+        diff.added.extend(c for c in chunks if c.id not in old_ids)
+        diff.removed.extend(old_ids.difference(new_ids))
+        manifest.put(doc_key, hashes[doc_key], new_ids)
+        diff.changed_docs += 1
+
+    if prune_missing:
+        for doc_key in set(manifest.keys()) - seen_keys:
+            diff.removed.extend(manifest.get(doc_key)[1])
+            manifest.remove(doc_key)
+    if commit:
+        manifest.commit()
+    return diff
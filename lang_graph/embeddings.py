@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# "hash" selects the offline HashEmbeddings backend, anything else is an OpenAI embedding model
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+EMBEDDING_CACHE_PATH = os.getenv(
+    "EMBEDDING_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "embedding_cache.db")
+)
+# Per-request limits of the embedding API, and requests in flight at once
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "128"))
+EMBED_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS", "8000"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+CHARS_PER_TOKEN = 4
+
+CACHE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS embeddings (
+        model TEXT NOT NULL,
+        chunk_hash TEXT NOT NULL,
+        vector BLOB NOT NULL,
+        PRIMARY KEY (model, chunk_hash)
+    );
+"""
+
+_TOKEN = re.compile(r"\w+")
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic offline embeddings: signed feature hashing of lowercase word unigrams and bigrams.
+
+    Texts sharing words land near each other, which is enough to exercise retrieval
+    without a provider. `latency` seconds are slept per call to stand in for one.
+    """
+
+    def __init__(self, dim: int = 384, latency: float = 0.0):
+        self.dim = dim
+        self.latency = latency
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = _TOKEN.findall(text.lower())
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            index = int.from_bytes(digest[:4], "little") % self.dim
+            vector[index] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return [self._embed(t) for t in texts]
+
+
+def get_embeddings(model: str = EMBEDDING_MODEL) -> Embeddings:
+    if model == "hash":
+        return HashEmbeddings()
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(model=model)
+
+
+class EmbeddingCache:
+    """Persistent float32 embeddings keyed by (model, sha256 of the text), in SQLite."""
+
+    def __init__(self, path: str = EMBEDDING_CACHE_PATH):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(CACHE_SCHEMA)
+
+    def get_many(self, model: str, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(hashes), 500):
+                batch = list(hashes[start:start + 500])
+                for chunk_hash, blob in self._conn.execute(
+                    f"SELECT chunk_hash, vector FROM embeddings WHERE model = ? AND chunk_hash IN "
+                    f"({','.join('?' * len(batch))})", [model] + batch
+                ):
+                    found[chunk_hash] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, np.ndarray]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, chunk_hash, vector) VALUES (?, ?, ?)",
+                [(model, h, np.asarray(v, dtype=np.float32).tobytes()) for h, v in vectors.items()]
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class EmbeddingBatcher:
+    """Embeds texts through the cache, sending only misses to the model in bounded batches.
+
+    Identical texts within a call are embedded once. Misses are grouped into batches of
+    at most `batch_size` texts and `batch_tokens` estimated tokens, and up to
+    `concurrency` batches are in flight at once.
+    """
+
+    def __init__(self, embeddings: Optional[Embeddings] = None, model: str = EMBEDDING_MODEL,
+                 cache: Optional[EmbeddingCache] = None, batch_size: int = EMBED_BATCH_SIZE,
+                 batch_tokens: int = EMBED_BATCH_TOKENS, concurrency: int = EMBED_CONCURRENCY):
+        self.embeddings = embeddings or get_embeddings(model)
+        self.model = model
+        self.cache = cache if cache is not None else EmbeddingCache()
+        self.batch_size = batch_size
+        self.batch_tokens = batch_tokens
+        self.concurrency = concurrency
+        self.hits = 0
+        self.misses = 0
+        self.embed_seconds = 0.0
+
+    def _batches(self, texts: Dict[str, str]) -> List[List[str]]:
+        batches, current, tokens = [], [], 0
+        for chunk_hash, text in texts.items():
+            cost = len(text) // CHARS_PER_TOKEN + 1
+            if current and (len(current) >= self.batch_size or tokens + cost > self.batch_tokens):
+                batches.append(current)
+                current, tokens = [], 0
+            current.append(chunk_hash)
+            tokens += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    async def aembed(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), dim) float32 matrix, in input order."""
+        hashes = [text_hash(t) for t in texts]
+        unique = dict(zip(hashes, texts))
+        vectors = self.cache.get_many(self.model, list(unique))
+        self.hits += len(vectors)
+        missing = {h: t for h, t in unique.items() if h not in vectors}
+        self.misses += len(missing)
+
+        if missing:
+            slots = asyncio.Semaphore(self.concurrency)
+            start = time.perf_counter()
+
+            async def run(batch: List[str]):
+                async with slots:
+                    embedded = await self.embeddings.aembed_documents([missing[h] for h in batch])
+                fresh = {h: np.asarray(v, dtype=np.float32) for h, v in zip(batch, embedded)}
+                await asyncio.to_thread(self.cache.put_many, self.model, fresh)
+                vectors.update(fresh)
+
+            await asyncio.gather(*(run(batch) for batch in self._batches(missing)))
+            self.embed_seconds += time.perf_counter() - start
+
+        if not hashes:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([vectors[h] for h in hashes])
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return asyncio.run(self.aembed(texts))
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "embeddings_per_second": self.misses / self.embed_seconds if self.embed_seconds else 0.0,
+        }
@@ -0,0 +1,163 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+from langchain_core.documents import Document
+
+# Downloads in flight at once, across all hosts
+MAX_CONNECTIONS = int(os.getenv("INGEST_MAX_CONNECTIONS", "8"))
+FETCH_TIMEOUT = float(os.getenv("INGEST_TIMEOUT", "30"))
+HTTP_CACHE_DIR = os.getenv("INGEST_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".http_cache"))
+USER_AGENT = "lang-graph-ingest/1.0"
+
+
+@dataclass
+class FetchResult:
+    url: str
+    status: int
+    text: str = ""
+    content_type: str = ""
+    from_cache: bool = False
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status < 400
+
+
+class HttpCache:
+    """On-disk HTTP response cache keyed by URL.
+
+    Each entry is `<sha256(url)>.body` with the response text and a `.json` sidecar
+    holding the validators (ETag, Last-Modified) used to revalidate it. A 304 answer
+    to the conditional request means the stored body is reused without downloading.
+    """
+
+    def __init__(self, root: str = HTTP_CACHE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, url: str, suffix: str) -> str:
+        return os.path.join(self.root, hashlib.sha256(url.encode()).hexdigest() + suffix)
+
+    def get(self, url: str) -> Optional[dict]:
+        try:
+            with open(self._path(url, ".json")) as f:
+                meta = json.load(f)
+            with open(self._path(url, ".body"), encoding="utf-8") as f:
+                meta["text"] = f.read()
+        except (OSError, ValueError):
+            return None
+        return meta
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """Conditional request headers for a cached URL, empty if there is nothing to revalidate."""
+        meta = self.get(url)
+        if not meta:
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def put(self, url: str, response: httpx.Response) -> None:
+        meta = {
+            "url": url,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "content_type": response.headers.get("content-type", ""),
+            "fetched_at": time.time(),
+        }
+        # Write the body first and rename into place so a crash never leaves a sidecar without its body
+        for suffix, payload in ((".body", response.text), (".json", json.dumps(meta))):
+            tmp = self._path(url, suffix + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp, self._path(url, suffix))
+
+    def touch(self, url: str) -> None:
+        meta_path = self._path(url, ".json")
+        with open(meta_path) as f:
+            meta = json.load(f)
+        meta["fetched_at"] = time.time()
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+
+
+async def _fetch(client: httpx.AsyncClient, slots: asyncio.Semaphore, url: str, cache: Optional[HttpCache]) -> FetchResult:
+    # Wait for a slot here rather than in the pool, so queued requests do not use up their timeout
+    async with slots:
+        start = time.perf_counter()
+        try:
+            response = await client.get(url, headers=cache.validators(url) if cache else {})
+        except httpx.HTTPError as e:
+            return FetchResult(url, 0, error=f"{type(e).__name__}: {e}", elapsed=time.perf_counter() - start)
+        elapsed = time.perf_counter() - start
+
+    if response.status_code == 304 and cache:
+        cached = cache.get(url)
+        if cached is not None:
+            cache.touch(url)
+            return FetchResult(url, 200, cached["text"], cached["content_type"], True, elapsed)
+    if response.status_code >= 400:
+        return FetchResult(url, response.status_code, error=f"HTTP {response.status_code}", elapsed=elapsed)
+    if cache:
+        cache.put(url, response)
+    return FetchResult(url, response.status_code, response.text, response.headers.get("content-type", ""),
+                       False, elapsed)
+
+
+async def fetch_all(urls: Iterable[str], max_connections: int = MAX_CONNECTIONS, cache: Optional[HttpCache] = None,
+                    timeout: float = FETCH_TIMEOUT) -> List[FetchResult]:
+    """Fetch URLs concurrently over one pooled client; results in input order, duplicates fetched once.
+
+    At most `max_connections` requests are open at once. Cached URLs are revalidated
+    with If-None-Match / If-Modified-Since, so unchanged pages cost a 304 and no body.
+    Failures come back as results with `error` set instead of raising.
+    """
+    urls = list(dict.fromkeys(urls))
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    slots = asyncio.Semaphore(max_connections)
+    async with httpx.AsyncClient(limits=limits, timeout=timeout, follow_redirects=True,
+                                 headers={"User-Agent": USER_AGENT}) as client:
+        return await asyncio.gather(*(_fetch(client, slots, url, cache) for url in urls))
+
+
+def to_document(result: FetchResult) -> Document:
+    """Page text and metadata in the shape WebBaseLoader produces (source, title, description, language)."""
+    metadata = {"source": result.url}
+    if "html" not in result.content_type and not result.text.lstrip().startswith("<"):
+        return Document(page_content=result.text, metadata=metadata)
+
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(result.text, "html.parser")
+    if soup.title:
+        metadata["title"] = soup.title.get_text()
+    description = soup.find("meta", attrs={"name": "description"})
+    if description:
+        metadata["description"] = description.get("content", "No description found.")
+    html = soup.find("html")
+    if html:
+        metadata["language"] = html.get("lang", "No language found.")
+    return Document(page_content=soup.get_text(), metadata=metadata)
+
+
+def load_documents(urls: Iterable[str], max_connections: int = MAX_CONNECTIONS, cache: Optional[HttpCache] = None) -> List[Document]:
+    """Fetch and parse URLs; failed URLs are reported and skipped."""
+    results = asyncio.run(fetch_all(urls, max_connections, cache if cache is not None else HttpCache()))
+    documents = []
+    for result in results:
+        if not result.ok:
+            print(f"Skipping {result.url}: {result.error}")
+            continue
+        documents.append(to_document(result))
+    return documents
@@ -1,43 +1,132 @@
+import asyncio
 import os
 from typing_extensions import TypedDict
-from typing import Annotated
+from typing import Annotated, Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
-from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 from IPython.display import Image, display
-from langgraph.checkpoint.memory import MemorySaver
 import json
-import sys 
-sys.path.append(".") 
+import sys
+sys.path.append(".")
 from my_state import MyState
+from llm_client import get_llm
+from sqlite_checkpointer import SqliteCheckpointer
+from tracing import TRACE_PATH, GraphTracer, TracedCheckpointer
 
 
 load_dotenv()
 
-memory = MemorySaver()
-graph_builder = StateGraph(MyState)
+# With LANG_GRAPH_TRACE set, every run records node, LLM and checkpoint spans to that JSONL file
+tracer = GraphTracer() if TRACE_PATH else None
+memory = SqliteCheckpointer() if tracer is None else TracedCheckpointer(SqliteCheckpointer(), tracer)
 
+# Threads run at once by run_graph_batch; the rest wait for a free slot
+BATCH_CONCURRENCY = int(os.getenv("LANG_GRAPH_BATCH_CONCURRENCY", "8"))
 
-def chatbot(state: MyState):
-    return {
-        "messages": [
-            ChatGroq(temperature=0, model="openai/gpt-oss-20b").invoke(
-                state["messages"]
-            )
-        ]
-    }
 
+def build_graph(llm=None, checkpointer=memory):
+    """Compile the chatbot graph; `llm` defaults to the shared get_llm() client.
 
-graph_builder.add_node("chatbot", chatbot)
+    The node has a sync and an async body, so invoke/stream call the model inline
+    and ainvoke/astream await it without tying up an executor thread.
+    """
+    def chatbot(state: MyState):
+        return {
+            "messages": [
+                (llm or get_llm()).invoke(
+                    state["messages"]
+                )
+            ]
+        }
 
-graph_builder.add_edge(START, "chatbot")
-graph_builder.add_edge("chatbot", END)
-graph = graph_builder.compile(checkpointer=memory)
+    async def achatbot(state: MyState):
+        return {"messages": [await (llm or get_llm()).ainvoke(state["messages"])]}
+
+    graph_builder = StateGraph(MyState)
+    graph_builder.add_node("chatbot", RunnableLambda(chatbot, afunc=achatbot))
+
+    graph_builder.add_edge(START, "chatbot")
+    graph_builder.add_edge("chatbot", END)
+    return graph_builder.compile(checkpointer=checkpointer)
+
+
+graph = build_graph()
+
+
+def _config(thread_id) -> dict:
+    config = {"configurable": {"thread_id": thread_id}}
+    if tracer:
+        config["callbacks"] = [tracer]
+    return config
 
 
 def run_graph(user_input: str, thread_id: int):
-    event = graph.invoke({"messages": [user_input]}, config={"configurable": {"thread_id": thread_id}})
+    event = graph.invoke({"messages": [user_input]}, config=_config(thread_id))
     print(json.dumps(event, indent=2, default=str))
 
 
+async def arun_graph_batch(requests: Iterable[Tuple[str, Any]], max_concurrency: int = BATCH_CONCURRENCY,
+                           app=None) -> List[Any]:
+    """Run many (user_input, thread_id) pairs concurrently; results come back in input order.
+
+    Up to `max_concurrency` threads run at once. Inputs for the same thread run one
+    after another in the order given, since each turn resumes from the previous
+    checkpoint. A failed turn's slot holds its exception instead of a state.
+    """
+    app = app or graph
+    requests = list(requests)
+    by_thread: Dict[Any, List[int]] = {}
+    for index, (_, thread_id) in enumerate(requests):
+        by_thread.setdefault(thread_id, []).append(index)
+
+    results: List[Any] = [None] * len(requests)
+    slots = asyncio.Semaphore(max_concurrency)
+
+    async def run_thread(thread_id, indexes: List[int]):
+        async with slots:
+            for index in indexes:
+                try:
+                    results[index] = await app.ainvoke({"messages": [requests[index][0]]}, config=_config(thread_id))
+                except Exception as e:
+                    results[index] = e
+
+    await asyncio.gather(*(run_thread(thread_id, indexes) for thread_id, indexes in by_thread.items()))
+    return results
+
+
+def run_graph_batch(requests: Iterable[Tuple[str, Any]], max_concurrency: int = BATCH_CONCURRENCY) -> List[Any]:
+    return asyncio.run(arun_graph_batch(requests, max_concurrency))
+
+
+def _stream_event(mode: str, chunk) -> Optional[dict]:
+    if mode == "messages":
+        message, metadata = chunk
+        if not message.content:
+            return None
+        return {"type": "token", "node": metadata.get("langgraph_node"), "content": message.content}
+    node, update = next(iter(chunk.items()))
+    return {"type": "update", "node": node, "messages": (update or {}).get("messages", [])}
+
+
+async def astream_graph(user_input: str, thread_id, app=None) -> AsyncIterator[dict]:
+    """Yield LLM tokens as they arrive and each node's update as it finishes.
+
+    Events are {"type": "token", "node", "content"} and {"type": "update", "node", "messages"}.
+    """
+    async for mode, chunk in (app or graph).astream(
+        {"messages": [user_input]}, config=_config(thread_id), stream_mode=["messages", "updates"]
+    ):
+        event = _stream_event(mode, chunk)
+        if event:
+            yield event
+
 
+def stream_graph(user_input: str, thread_id, app=None) -> Iterator[dict]:
+    """Blocking version of astream_graph."""
+    for mode, chunk in (app or graph).stream(
+        {"messages": [user_input]}, config=_config(thread_id), stream_mode=["messages", "updates"]
+    ):
+        event = _stream_event(mode, chunk)
+        if event:
+            yield event
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence
+
+import httpx
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+MODEL = os.getenv("LANG_GRAPH_MODEL", "openai/gpt-oss-20b")
+
+# Connections kept open to the provider, shared by every graph step and thread
+MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "10"))
+
+# Response cache; only used for deterministic (temperature=0) calls
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") == "1"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_cache.db"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+CACHE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS llm_cache (
+        key TEXT PRIMARY KEY,
+        response TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_used REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used);
+"""
+
+
+def _dump_generations(generations: Sequence[Generation]) -> str:
+    return json.dumps([
+        {
+            "text": generation.text,
+            "generation_info": generation.generation_info,
+            "message": message_to_dict(generation.message) if isinstance(generation, ChatGeneration) else None,
+        }
+        for generation in generations
+    ], default=str)
+
+
+def _load_generations(payload: str) -> List[Generation]:
+    generations = []
+    for item in json.loads(payload):
+        if item["message"] is None:
+            generations.append(Generation(text=item["text"], generation_info=item["generation_info"]))
+            continue
+        message = messages_from_dict([item["message"]])[0]
+        # Every hit would share the cached id, and add_messages merges by id; it gives id-less messages a fresh one
+        message.id = None
+        generations.append(ChatGeneration(message=message, generation_info=item["generation_info"]))
+    return generations
+
+
+class SQLiteResponseCache(BaseCache):
+    """Exact-match LLM response cache on SQLite with TTL and LRU eviction.
+
+    The key is a SHA-256 of the serialized message list plus the model's invocation
+    parameters (model name, temperature, stop, tools...), so any change to either is a
+    miss. Entries older than `ttl` seconds are ignored and deleted; past `max_entries`
+    the least recently used entries are evicted.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl: float = LLM_CACHE_TTL, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(CACHE_SCHEMA)
+
+    @staticmethod
+    def key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode()).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self.key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            try:
+                generations = _load_generations(row[0])
+            except (KeyError, TypeError, ValueError):
+                # Written in an older format
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (self.key(prompt, llm_string), _dump_generations(return_val), now, now)
+            )
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0, "entries": entries}
+
+
+@lru_cache(maxsize=None)
+def get_response_cache() -> SQLiteResponseCache:
+    return SQLiteResponseCache()
+
+
+@lru_cache(maxsize=None)
+def _http_clients():
+    limits = httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE)
+    return httpx.Client(limits=limits), httpx.AsyncClient(limits=limits)
+
+
+@lru_cache(maxsize=None)
+def get_llm(model: str = MODEL, temperature: float = 0.0, cache: Optional[bool] = None):
+    """Shared chat model for the graph, built once per (model, temperature).
+
+    All instances reuse one pooled httpx client pair, so graph steps keep their
+    connections warm instead of paying client construction and a TLS handshake.
+    """
+    from langchain_groq import ChatGroq
+
+    http_client, http_async_client = _http_clients()
+    use_cache = LLM_CACHE_ENABLED and temperature == 0 if cache is None else cache
+    return ChatGroq(
+        model=model,
+        temperature=temperature,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        cache=get_response_cache() if use_cache else False,
+    )
@@ -1,5 +1,93 @@
-from typing import Annotated, TypedDict
+import os
+import re
+import uuid
+from typing import Annotated, Any, Callable, Dict, List, Tuple, TypedDict
+
+from langchain_core.messages import AnyMessage, BaseMessage, SystemMessage, ToolMessage
 from langgraph.graph import add_messages
 
+# Messages kept verbatim per thread; older ones are folded into the summary
+MESSAGE_WINDOW = int(os.getenv("LANG_GRAPH_MESSAGE_WINDOW", "20"))
+# Lines of folded history kept in the summary, oldest dropped first
+MAX_SUMMARY_LINES = int(os.getenv("LANG_GRAPH_SUMMARY_LINES", "30"))
+SUMMARY_CHARS = 160
+CHARS_PER_TOKEN = 4
+
+SUMMARY_ID_PREFIX = "conversation-summary-"
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+ROLES = {"human": "user", "ai": "assistant", "tool": "tool", "system": "system"}
+# Estimates of non-text content remembered per message id, oldest dropped first
+TOKEN_CACHE_SIZE = 50_000
+
+_token_counts: Dict[str, Tuple[Any, int]] = {}
+
+
+def token_count(message: BaseMessage) -> int:
+    """Estimated prompt tokens for a message.
+
+    Text costs a len(); list content (multimodal blocks, tool payloads) has to be
+    rendered first, so its estimate is kept by message id rather than on the message.
+    """
+    content = message.content
+    if isinstance(content, str):
+        return (len(content) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN + 4
+    cached = _token_counts.get(message.id) if message.id else None
+    if cached is not None and cached[0] == content:
+        return cached[1]
+    count = (len(str(content)) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN + 4
+    if message.id:
+        _token_counts[message.id] = (content, count)
+        while len(_token_counts) > TOKEN_CACHE_SIZE:
+            _token_counts.pop(next(iter(_token_counts)), None)
+    return count
+
+
+def prompt_tokens(messages: List[BaseMessage]) -> int:
+    return sum(token_count(m) for m in messages)
+
+
+def is_summary(message: BaseMessage) -> bool:
+    return isinstance(message, SystemMessage) and (message.id or "").startswith(SUMMARY_ID_PREFIX)
+
+
+def _summarize(message: BaseMessage) -> str:
+    text = re.sub(r"\s+", " ", message.content if isinstance(message.content, str) else str(message.content)).strip()
+    match = re.match(r"(.+?[.!?])(\s|$)", text)
+    text = match.group(1) if match else text
+    if len(text) > SUMMARY_CHARS:
+        text = text[:SUMMARY_CHARS - 1] + "…"
+    return f"- {ROLES.get(message.type, message.type)}: {text}"
+
+
+def bounded_messages(window: int = MESSAGE_WINDOW, max_summary_lines: int = MAX_SUMMARY_LINES) -> Callable:
+    """add_messages that keeps at most `window` messages plus a running summary.
+
+    Messages pushed out of the window become one extractive line each (role and first
+    sentence) in a system message at the head of the list, capped at
+    `max_summary_lines`. Prompt and checkpoint size therefore stay flat over long
+    threads, and no extra LLM call is made. The window never starts on a ToolMessage,
+    so a tool result is not separated from the call that produced it.
+
+    The summary gets a new id whenever it changes. Checkpointers that compare
+    messages by id then see the change.
+    """
+    def reduce(left, right) -> List[AnyMessage]:
+        merged = add_messages(left, right)
+        summary = merged[0] if merged and is_summary(merged[0]) else None
+        body = merged[1:] if summary else merged
+        if len(body) <= window:
+            return merged
+
+        cut = len(body) - window
+        while cut < len(body) and isinstance(body[cut], ToolMessage):
+            cut += 1
+        lines = summary.content.splitlines()[1:] if summary else []
+        lines = (lines + [_summarize(m) for m in body[:cut]])[-max_summary_lines:]
+        summary = SystemMessage("\n".join([SUMMARY_HEADER] + lines), id=f"{SUMMARY_ID_PREFIX}{uuid.uuid4().hex}")
+        return [summary] + body[cut:]
+
+    return reduce
+
+
 class MyState(TypedDict):
-    messages: Annotated[list[str], add_messages]
\ No newline at end of file
+    messages: Annotated[list[AnyMessage], bounded_messages()]
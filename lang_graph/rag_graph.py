@@ -0,0 +1,162 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import Annotated, Any, Awaitable, Callable, Dict, List, Optional, TypedDict
+
+from langchain_core.documents import Document
+from langchain_core.messages import AnyMessage, HumanMessage, SystemMessage
+from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
+
+from llm_client import get_llm
+from my_state import bounded_messages
+from sqlite_checkpointer import SqliteCheckpointer
+
+# Seconds all retrieval branches together may take; slower branches are cancelled
+RAG_LATENCY_BUDGET = float(os.getenv("RAG_LATENCY_BUDGET", "2.0"))
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "4"))
+RAG_CONTEXT_CHARS = int(os.getenv("RAG_CONTEXT_CHARS", "6000"))
+RAG_CHECKPOINT_DB = os.getenv(
+    "RAG_CHECKPOINT_DB", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rag_checkpoints.db")
+)
+
+# A retriever takes (question, k) and returns documents, best first
+Retriever = Callable[[str, int], Awaitable[List[Document]]]
+
+
+def _current_run(left: Optional[list], right: Optional[list]) -> list:
+    """Keep only records of the newest run, so results and timings do not pile up across turns."""
+    combined = (left or []) + (right or [])
+    if not right:
+        return combined
+    run = right[-1]["run"]
+    return [record for record in combined if record["run"] == run]
+
+
+class RAGState(TypedDict):
+    messages: Annotated[list[AnyMessage], bounded_messages()]
+    run: str
+    question: str
+    deadline: float
+    results: Annotated[list[dict], _current_run]
+    timings: Annotated[list[dict], _current_run]
+
+
+def vector_store_retriever(store, batcher, approximate: bool = False) -> Retriever:
+    """Retriever over a MemmapVectorStore, embedding the question with an EmbeddingBatcher."""
+    async def retrieve(question: str, k: int) -> List[Document]:
+        query = await batcher.aembed([question])
+        return await asyncio.to_thread(store.similarity_search_by_vector, query[0], k, approximate=approximate)
+    return retrieve
+
+
+def tool_retriever(tool, arg: Optional[str] = None) -> Retriever:
+    """Wrap a LangChain tool (e.g. a web search) as a retriever returning its output as one document."""
+    async def retrieve(question: str, k: int) -> List[Document]:
+        output = await tool.ainvoke({arg: question} if arg else question)
+        return [Document(page_content=str(output), metadata={"source": tool.name})]
+    return retrieve
+
+
+def _timing(run: str, node: str, start: float, status: str = "ok", **extra) -> dict:
+    return {"run": run, "node": node, "seconds": time.perf_counter() - start, "status": status, **extra}
+
+
+def build_rag_graph(retrievers: Dict[str, Retriever], llm=None, checkpointer=None,
+                    budget: float = RAG_LATENCY_BUDGET, k: int = RAG_TOP_K):
+    """Compile a graph that fans a question out to every retriever in parallel before answering.
+
+    `plan` sends one `retrieve` branch per retriever (LangGraph Send), all in the same
+    step. Each branch gets the time left until the shared deadline. A branch still
+    running at the deadline is cancelled and recorded as "timeout", so one slow source
+    cannot hold up the answer. `merge` de-duplicates and ranks what arrived and
+    `answer` calls the LLM with it as context. Every node appends its wall time to
+    `timings`, which holds the current run only.
+    """
+    if not retrievers:
+        raise ValueError("build_rag_graph needs at least one retriever")
+
+    async def plan(state: RAGState):
+        start = time.perf_counter()
+        run = uuid.uuid4().hex
+        question = state["messages"][-1].content
+        return {
+            "run": run,
+            "question": question,
+            "deadline": time.time() + budget,
+            "timings": [_timing(run, "plan", start)],
+        }
+
+    def fan_out(state: RAGState):
+        return [Send("retrieve", {"source": name, "question": state["question"], "run": state["run"],
+                                  "deadline": state["deadline"]})
+                for name in retrievers]
+
+    async def retrieve(branch: dict):
+        start = time.perf_counter()
+        name, run = branch["source"], branch["run"]
+        try:
+            documents = await asyncio.wait_for(retrievers[name](branch["question"], k),
+                                               max(0.0, branch["deadline"] - time.time()))
+        except asyncio.TimeoutError:
+            return {"timings": [_timing(run, f"retrieve:{name}", start, "timeout")]}
+        except Exception as e:
+            return {"timings": [_timing(run, f"retrieve:{name}", start, "error", error=f"{type(e).__name__}: {e}")]}
+        return {
+            "results": [{"run": run, "source": name, "documents": documents}],
+            "timings": [_timing(run, f"retrieve:{name}", start, documents=len(documents))],
+        }
+
+    async def merge(state: RAGState):
+        start = time.perf_counter()
+        seen, ranked = set(), []
+        # results still holds the previous turn's records when every branch failed or timed out
+        for result in state["results"]:
+            if result["run"] != state["run"] or result["source"] == "context":
+                continue
+            for rank, document in enumerate(result["documents"]):
+                key = document.id or document.page_content
+                if key not in seen:
+                    seen.add(key)
+                    ranked.append((rank, -document.metadata.get("score", 0.0), result["source"], document))
+        ranked.sort(key=lambda item: item[:2])
+        context, size = [], 0
+        for _, _, source, document in ranked:
+            if size + len(document.page_content) > RAG_CONTEXT_CHARS:
+                break
+            context.append(f"[{source}] {document.page_content}")
+            size += len(document.page_content)
+        return {
+            "results": [{"run": state["run"], "source": "context", "documents": [Document("\n\n".join(context))]}],
+            "timings": [_timing(state["run"], "merge", start, documents=len(context))],
+        }
+
+    async def answer(state: RAGState):
+        start = time.perf_counter()
+        context = next(result["documents"][0].page_content for result in state["results"]
+                       if result["run"] == state["run"] and result["source"] == "context")
+        system = SystemMessage("Answer using the retrieved context below when it is relevant.\n\n" + context)
+        history = [m for m in state["messages"] if not isinstance(m, SystemMessage)]
+        summary = [m for m in state["messages"] if isinstance(m, SystemMessage)]
+        reply = await (llm or get_llm()).ainvoke([system] + summary + history)
+        return {"messages": [reply], "timings": [_timing(state["run"], "answer", start)]}
+
+    builder = StateGraph(RAGState)
+    builder.add_node("plan", plan)
+    builder.add_node("retrieve", retrieve)
+    builder.add_node("merge", merge)
+    builder.add_node("answer", answer)
+    builder.add_edge(START, "plan")
+    builder.add_conditional_edges("plan", fan_out, ["retrieve"])
+    builder.add_edge("retrieve", "merge")
+    builder.add_edge("merge", "answer")
+    builder.add_edge("answer", END)
+    return builder.compile(checkpointer=checkpointer if checkpointer is not None else SqliteCheckpointer(RAG_CHECKPOINT_DB))
+
+
+async def arun_rag(app, user_input: str, thread_id, callbacks: Optional[list] = None) -> Dict[str, Any]:
+    """Run one turn; returns the answer text and this run's per-node timings."""
+    state = await app.ainvoke({"messages": [HumanMessage(user_input)]},
+                              config={"configurable": {"thread_id": thread_id}, "callbacks": callbacks or []})
+    return {"answer": state["messages"][-1].content, "timings": state["timings"]}
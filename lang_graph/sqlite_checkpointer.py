@@ -0,0 +1,434 @@
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+CHECKPOINT_DB_PATH = os.getenv(
+    "LANG_GRAPH_CHECKPOINT_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "checkpoints.db")
+)
+
+CHECKPOINT_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS checkpoints (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        parent_checkpoint_id TEXT,
+        type TEXT,
+        checkpoint BLOB NOT NULL,
+        metadata_type TEXT,
+        metadata BLOB,
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+    );
+
+    -- One row per (channel, version). List channels (messages) are stored as a delta
+    -- against an earlier version of the same channel: drop `drop_count` items from the
+    -- front of the base value, then append the items in `blob`.
+    CREATE TABLE IF NOT EXISTS blobs (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        channel TEXT NOT NULL,
+        version TEXT NOT NULL,
+        type TEXT NOT NULL,
+        blob BLOB,
+        base_version TEXT,
+        drop_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+    );
+
+    CREATE TABLE IF NOT EXISTS writes (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        channel TEXT NOT NULL,
+        type TEXT,
+        value BLOB,
+        task_path TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+    );
+"""
+
+# Checkpoints kept per thread after compaction; older ones are pruned with their writes
+KEEP_CHECKPOINTS = int(os.getenv("LANG_GRAPH_KEEP_CHECKPOINTS", "10"))
+# Compact a thread after this many new checkpoints
+COMPACT_EVERY = 20
+# Longest chain of list deltas before a full copy of the channel is stored again
+MAX_DELTA_CHAIN = 32
+# Threads whose latest list values are remembered to compute deltas against
+DELTA_CACHE_THREADS = 1024
+
+
+def _same(a, b) -> bool:
+    # Ids are not enough: add_messages replaces a message in place by reusing its id
+    return a is b or a == b
+
+
+def _list_delta(previous: list, current: list) -> Optional[Tuple[int, list]]:
+    """(items dropped from the front, items appended) turning previous into current, if any."""
+    for drop in range(len(previous) + 1):
+        kept = len(previous) - drop
+        if kept > len(current):
+            continue
+        if kept == 0 or (_same(previous[drop], current[0]) and _same(previous[-1], current[kept - 1])):
+            if all(_same(x, y) for x, y in zip(previous[drop:], current[:kept])):
+                return drop, current[kept:]
+    return None
+
+
+class SqliteCheckpointer(BaseCheckpointSaver[str]):
+    """Durable LangGraph checkpointer on SQLite in WAL mode.
+
+    Drop-in replacement for MemorySaver:
+    * channel values are written only when their version changes, and list channels
+      such as `messages` are written as deltas (new items plus how many were dropped
+      from the front) against the previous version, so a turn costs the new messages
+      rather than a copy of the whole history;
+    * every `compact_every` checkpoints a thread is compacted to its `keep_last`
+      newest checkpoints, and blobs no longer reachable from them are deleted;
+    * process memory is bounded: besides SQLite's page cache, only the latest list
+      value of the `delta_cache_threads` most recently written threads is kept.
+    """
+
+    def __init__(
+        self,
+        path: str = CHECKPOINT_DB_PATH,
+        *,
+        keep_last: Optional[int] = KEEP_CHECKPOINTS,
+        compact_every: int = COMPACT_EVERY,
+        max_delta_chain: int = MAX_DELTA_CHAIN,
+        delta_cache_threads: int = DELTA_CACHE_THREADS,
+        serde=None,
+    ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.keep_last = keep_last
+        self.compact_every = compact_every
+        self.max_delta_chain = max_delta_chain
+        self.delta_cache_threads = delta_cache_threads
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA cache_size=-8000")
+        self._conn.executescript(CHECKPOINT_SCHEMA)
+        # (thread_id, ns) -> {"puts": n, channel: (version, list value, chain length)}
+        self._recent: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+
+    # -- blobs ---------------------------------------------------------------
+
+    def _recent_state(self, thread_id: str, ns: str) -> Dict[str, Any]:
+        key = (thread_id, ns)
+        state = self._recent.pop(key, None) or {"puts": 0}
+        self._recent[key] = state
+        while len(self._recent) > self.delta_cache_threads:
+            self._recent.popitem(last=False)
+        return state
+
+    def _put_blob(self, recent: Dict[str, Any], thread_id: str, ns: str, channel: str, version: str, values: dict) -> None:
+        base_version, drop, chain = None, 0, 0
+        if channel not in values:
+            type_, blob = "empty", None
+        else:
+            value = values[channel]
+            stored = value
+            cached = recent.get(channel)
+            if isinstance(value, list) and cached and cached[2] < self.max_delta_chain:
+                delta = _list_delta(cached[1], value)
+                if delta is not None:
+                    base_version, chain = cached[0], cached[2] + 1
+                    drop, stored = delta
+            type_, blob = self.serde.dumps_typed(stored)
+            if isinstance(value, list):
+                recent[channel] = (version, list(value), chain)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO blobs (thread_id, checkpoint_ns, channel, version, type, blob, base_version, drop_count) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (thread_id, ns, channel, version, type_, blob, base_version, drop)
+        )
+
+    def _load_blob(self, thread_id: str, ns: str, channel: str, version: str):
+        chain = []
+        while version is not None:
+            row = self._conn.execute(
+                "SELECT type, blob, base_version, drop_count FROM blobs "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, ns, channel, version)
+            ).fetchone()
+            if row is None:
+                if chain:
+                    raise ValueError(f"Delta base {version} of channel {channel!r} in thread {thread_id} is missing")
+                return None, False
+            chain.append(row)
+            version = row[2]
+        type_, blob, _, _ = chain.pop()
+        if type_ == "empty":
+            return None, False
+        value = self.serde.loads_typed((type_, blob))
+        while chain:
+            type_, blob, _, drop = chain.pop()
+            value = value[drop:] + self.serde.loads_typed((type_, blob))
+        return value, True
+
+    def _load_values(self, thread_id: str, ns: str, versions: ChannelVersions) -> Dict[str, Any]:
+        values = {}
+        for channel, version in versions.items():
+            value, found = self._load_blob(thread_id, ns, channel, version)
+            if found:
+                values[channel] = value
+        return values
+
+    # -- reads ---------------------------------------------------------------
+
+    def _tuple(self, thread_id: str, ns: str, row) -> CheckpointTuple:
+        checkpoint_id, parent_id, type_, checkpoint_blob, metadata_type, metadata_blob = row
+        checkpoint = self.serde.loads_typed((type_, checkpoint_blob))
+        writes = self._conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_path, task_id, idx",
+            (thread_id, ns, checkpoint_id)
+        ).fetchall()
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint_id}},
+            checkpoint={**checkpoint, "channel_values": self._load_values(thread_id, ns, checkpoint["channel_versions"])},
+            metadata=self.serde.loads_typed((metadata_type, metadata_blob)),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((t, v))) for task_id, channel, t, v in writes],
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": parent_id}}
+                if parent_id else None
+            ),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = str(config["configurable"]["thread_id"])
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        query = ("SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata FROM checkpoints "
+                 "WHERE thread_id = ? AND checkpoint_ns = ?")
+        with self._lock:
+            if checkpoint_id:
+                row = self._conn.execute(query + " AND checkpoint_id = ?", (thread_id, ns, checkpoint_id)).fetchone()
+            else:
+                row = self._conn.execute(query + " ORDER BY checkpoint_id DESC LIMIT 1", (thread_id, ns)).fetchone()
+            return self._tuple(thread_id, ns, row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(str(config["configurable"]["thread_id"]))
+            if config["configurable"].get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            clauses.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata "
+                f"FROM checkpoints {where} ORDER BY checkpoint_id DESC",
+                params
+            ).fetchall()
+            results = []
+            for row in rows:
+                if limit is not None and len(results) >= limit:
+                    break
+                if filter:
+                    metadata = self.serde.loads_typed((row[6], row[7]))
+                    if not all(metadata.get(k) == v for k, v in filter.items()):
+                        continue
+                results.append(self._tuple(row[0], row[1], row[2:]))
+        yield from results
+
+    # -- writes --------------------------------------------------------------
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = str(config["configurable"]["thread_id"])
+        ns = config["configurable"].get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+        type_, checkpoint_blob = self.serde.dumps_typed(stored)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._lock:
+            recent = self._recent_state(thread_id, ns)
+            for channel, version in new_versions.items():
+                self._put_blob(recent, thread_id, ns, channel, version, values)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+                "type, checkpoint, metadata_type, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 type_, checkpoint_blob, metadata_type, metadata_blob)
+            )
+            recent["puts"] += 1
+            if self.keep_last is not None and recent["puts"] % self.compact_every == 0:
+                self._compact(thread_id, ns)
+            self._conn.commit()
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        thread_id = str(config["configurable"]["thread_id"])
+        ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            rows.append((WRITES_IDX_MAP.get(channel, idx), channel, type_, blob))
+        with self._lock:
+            for idx, channel, type_, blob in rows:
+                # Regular writes are idempotent per (task, idx); special channels overwrite
+                verb = "INSERT OR REPLACE" if idx < 0 else "INSERT OR IGNORE"
+                self._conn.execute(
+                    f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value, task_path) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, ns, checkpoint_id, task_id, idx, channel, type_, blob, task_path)
+                )
+            self._conn.commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        thread_id = str(thread_id)
+        with self._lock:
+            for table in ("checkpoints", "blobs", "writes"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._conn.commit()
+            for key in [key for key in self._recent if key[0] == thread_id]:
+                del self._recent[key]
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # -- compaction ----------------------------------------------------------
+
+    def _compact(self, thread_id: str, ns: str) -> int:
+        """Keep the newest keep_last checkpoints of a thread and drop unreachable blobs."""
+        ids = [row[0] for row in self._conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC",
+            (thread_id, ns)
+        )]
+        if len(ids) <= self.keep_last:
+            return 0
+        oldest_kept = ids[self.keep_last - 1]
+        self._conn.execute("DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                           (thread_id, ns, oldest_kept))
+        self._conn.execute("DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                           (thread_id, ns, oldest_kept))
+        self._conn.execute("UPDATE checkpoints SET parent_checkpoint_id = NULL "
+                           "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", (thread_id, ns, oldest_kept))
+
+        bases = {(channel, version): base for channel, version, base in self._conn.execute(
+            "SELECT channel, version, base_version FROM blobs WHERE thread_id = ? AND checkpoint_ns = ?", (thread_id, ns)
+        )}
+        reachable = set()
+        for type_, blob in self._conn.execute(
+            "SELECT type, checkpoint FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?", (thread_id, ns)
+        ):
+            for channel, version in self.serde.loads_typed((type_, blob))["channel_versions"].items():
+                while version is not None and (channel, version) not in reachable:
+                    reachable.add((channel, version))
+                    version = bases.get((channel, version))
+        # Keep the delta base of the newest value too, so the next put can extend its chain
+        for channel, cached in self._recent.get((thread_id, ns), {}).items():
+            if channel == "puts":
+                continue
+            version = cached[0]
+            while version is not None and (channel, version) not in reachable:
+                reachable.add((channel, version))
+                version = bases.get((channel, version))
+        unreachable = [(thread_id, ns, channel, version) for channel, version in bases if (channel, version) not in reachable]
+        self._conn.executemany(
+            "DELETE FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?", unreachable
+        )
+        return len(ids) - self.keep_last
+
+    def compact(self, thread_id: Optional[str] = None) -> int:
+        """Compact one thread or all of them; returns the number of checkpoints pruned."""
+        if self.keep_last is None:
+            return 0
+        with self._lock:
+            if thread_id is None:
+                keys = self._conn.execute("SELECT DISTINCT thread_id, checkpoint_ns FROM checkpoints").fetchall()
+            else:
+                keys = self._conn.execute("SELECT DISTINCT thread_id, checkpoint_ns FROM checkpoints WHERE thread_id = ?",
+                                          (str(thread_id),)).fetchall()
+            pruned = sum(self._compact(t, ns) for t, ns in keys)
+            self._conn.commit()
+        return pruned
+
+    def disk_usage(self) -> Dict[str, int]:
+        sizes = {}
+        for suffix in ("", "-wal", "-shm"):
+            path = self.path + suffix
+            sizes["db" + suffix.replace("-", "_")] = os.path.getsize(path) if os.path.exists(path) else 0
+        return sizes
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # -- async ---------------------------------------------------------------
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items: List[CheckpointTuple] = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await asyncio.to_thread(self.delete_thread, thread_id)
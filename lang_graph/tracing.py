@@ -0,0 +1,232 @@
+import json
+import os
+import statistics
+import threading
+import time
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+
+# JSONL file spans are appended to; unset keeps them in memory only
+TRACE_PATH = os.getenv("LANG_GRAPH_TRACE")
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class GraphTracer(BaseCallbackHandler):
+    """Callback handler that records a span per graph node, LLM call and checkpoint operation.
+
+    Pass it in the run config (`callbacks=[tracer]`) and wrap the checkpointer with
+    `TracedCheckpointer` to get checkpoint timings. Spans are dicts with
+    `trace` (the root run id or thread id), `kind` ("node", "llm", "checkpoint"),
+    `name`, `start` (epoch seconds) and `seconds`. LLM spans also carry
+    `first_token` (seconds to the first streamed token, None if not streamed) and
+    `prompt_tokens` / `completion_tokens` as reported by the provider. Spans are
+    kept in memory for `summary()` and appended to `path` as JSONL when given.
+    """
+
+    run_inline = True
+
+    def __init__(self, path: Optional[str] = TRACE_PATH, keep: int = 100_000):
+        self.path = path
+        self.keep = keep
+        self.spans: List[dict] = []
+        self._open: Dict[UUID, dict] = {}
+        self._roots: Dict[UUID, str] = {}
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8") if path else None
+
+    def _trace(self, run_id: UUID, parent_run_id: Optional[UUID]) -> str:
+        trace = self._roots.get(parent_run_id) if parent_run_id else None
+        trace = trace or str(run_id)
+        self._roots[run_id] = trace
+        return trace
+
+    def record(self, span: dict) -> None:
+        with self._lock:
+            self.spans.append(span)
+            if len(self.spans) > self.keep:
+                del self.spans[:len(self.spans) - self.keep]
+            if self._file:
+                self._file.write(json.dumps(span, default=str) + "\n")
+                self._file.flush()
+
+    def _finish(self, run_id: UUID, **extra) -> None:
+        span = self._open.pop(run_id, None)
+        self._roots.pop(run_id, None)
+        if span is None:
+            return
+        span["seconds"] = time.perf_counter() - span.pop("_t0")
+        span.update(extra)
+        self.record(span)
+
+    # Graph nodes
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, parent_run_id: Optional[UUID] = None,
+                       metadata: Optional[dict] = None, **kwargs: Any) -> None:
+        trace = self._trace(run_id, parent_run_id)
+        node = (metadata or {}).get("langgraph_node")
+        name = kwargs.get("name")
+        parent = self._open.get(parent_run_id) if parent_run_id else None
+        # The node's own runnable is often named like the node; only the outermost run is the node span
+        if node and name == node and not (parent and parent["kind"] == "node" and parent["name"] == node):
+            self._open[run_id] = {"trace": trace, "kind": "node", "name": node,
+                                  "step": metadata.get("langgraph_step"), "start": time.time(),
+                                  "_t0": time.perf_counter()}
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, status="ok")
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, status="error", error=f"{type(error).__name__}: {error}")
+
+    # LLM calls
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, parent_run_id: Optional[UUID] = None,
+                            metadata: Optional[dict] = None, **kwargs: Any) -> None:
+        metadata = metadata or {}
+        self._open[run_id] = {
+            "trace": self._trace(run_id, parent_run_id), "kind": "llm",
+            "name": metadata.get("ls_model_name") or (serialized or {}).get("name", "llm"),
+            "node": metadata.get("langgraph_node"), "start": time.time(), "first_token": None,
+            "_t0": time.perf_counter(),
+        }
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, parent_run_id: Optional[UUID] = None,
+                     metadata: Optional[dict] = None, **kwargs: Any) -> None:
+        self.on_chat_model_start(serialized, prompts, run_id=run_id, parent_run_id=parent_run_id,
+                                 metadata=metadata, **kwargs)
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self._open.get(run_id)
+        if span is not None and span["first_token"] is None:
+            span["first_token"] = time.perf_counter() - span["_t0"]
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        prompt_tokens = completion_tokens = None
+        usage = None
+        if response.generations and response.generations[0]:
+            message = getattr(response.generations[0][0], "message", None)
+            usage = getattr(message, "usage_metadata", None)
+        if usage:
+            prompt_tokens, completion_tokens = usage.get("input_tokens"), usage.get("output_tokens")
+        elif response.llm_output and response.llm_output.get("token_usage"):
+            token_usage = response.llm_output["token_usage"]
+            prompt_tokens, completion_tokens = token_usage.get("prompt_tokens"), token_usage.get("completion_tokens")
+        self._finish(run_id, status="ok", prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, status="error", error=f"{type(error).__name__}: {error}")
+
+    def summary(self) -> dict:
+        """Aggregates over the recorded spans, per kind and name."""
+        groups: Dict[Tuple[str, str], List[dict]] = defaultdict(list)
+        for span in list(self.spans):
+            groups[(span["kind"], span["name"])].append(span)
+        report = {}
+        for (kind, name), spans in sorted(groups.items()):
+            seconds = [s["seconds"] for s in spans]
+            entry = {
+                "count": len(spans),
+                "errors": sum(s.get("status") == "error" for s in spans),
+                "total_s": sum(seconds),
+                "p50_ms": statistics.median(seconds) * 1000,
+                "p95_ms": _percentile(seconds, 0.95) * 1000,
+            }
+            if kind == "llm":
+                first = [s["first_token"] for s in spans if s.get("first_token") is not None]
+                entry["ttft_p50_ms"] = statistics.median(first) * 1000 if first else None
+                entry["prompt_tokens"] = sum(s.get("prompt_tokens") or 0 for s in spans)
+                entry["completion_tokens"] = sum(s.get("completion_tokens") or 0 for s in spans)
+            report[f"{kind}:{name}"] = entry
+        return report
+
+    def report(self) -> str:
+        lines = [f"{'span':<34} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'total s':>9}  extra"]
+        for name, entry in self.summary().items():
+            extra = ""
+            if name.startswith("llm:"):
+                ttft = entry["ttft_p50_ms"]
+                extra = (f"ttft p50={'-' if ttft is None else f'{ttft:.1f} ms'} "
+                         f"tokens in/out={entry['prompt_tokens']}/{entry['completion_tokens']}")
+            if entry["errors"]:
+                extra += f" errors={entry['errors']}"
+            lines.append(f"{name:<34} {entry['count']:>6} {entry['p50_ms']:>9.2f} {entry['p95_ms']:>9.2f} "
+                         f"{entry['total_s']:>9.3f}  {extra}")
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class TracedCheckpointer(BaseCheckpointSaver):
+    """Delegates to another checkpointer and records a "checkpoint" span per read and write."""
+
+    def __init__(self, inner: BaseCheckpointSaver, tracer: GraphTracer):
+        super().__init__(serde=inner.serde)
+        self.inner = inner
+        self.tracer = tracer
+
+    def _span(self, name: str, config: RunnableConfig, start: float, t0: float) -> None:
+        thread_id = config.get("configurable", {}).get("thread_id")
+        self.tracer.record({"trace": f"thread:{thread_id}", "kind": "checkpoint", "name": name,
+                            "start": start, "seconds": time.perf_counter() - t0})
+
+    def _timed(self, name: str, config: RunnableConfig, fn, *args):
+        start, t0 = time.time(), time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._span(name, config, start, t0)
+
+    async def _atimed(self, name: str, config: RunnableConfig, fn, *args):
+        start, t0 = time.time(), time.perf_counter()
+        try:
+            return await fn(*args)
+        finally:
+            self._span(name, config, start, t0)
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self._timed("read", config, self.inner.get_tuple, config)
+
+    def list(self, config: Optional[RunnableConfig], **kwargs: Any) -> Iterator[CheckpointTuple]:
+        return self.inner.list(config, **kwargs)
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        return self._timed("write", config, self.inner.put, config, checkpoint, metadata, new_versions)
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        return self._timed("write_pending", config, self.inner.put_writes, config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        return self.inner.delete_thread(thread_id)
+
+    def get_next_version(self, current, channel):
+        return self.inner.get_next_version(current, channel)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await self._atimed("read", config, self.inner.aget_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], **kwargs: Any) -> AsyncIterator[CheckpointTuple]:
+        async for item in self.inner.alist(config, **kwargs):
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await self._atimed("write", config, self.inner.aput, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        return await self._atimed("write_pending", config, self.inner.aput_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        return await self.inner.adelete_thread(thread_id)
@@ -1,15 +1,37 @@
 urls=[
-    "https://lilianweng.github.io/posts/2023-06-23-agent/"
-    "https://lilianweng.github.io/posts/2023-03-15-prompt-engineering/"
-    "https://lilianweng.github.io/posts/2023-10-25-adv-attack-llm/"
+    "https://lilianweng.github.io/posts/2023-06-23-agent/",
+    "https://lilianweng.github.io/posts/2023-03-15-prompt-engineering/",
+    "https://lilianweng.github.io/posts/2023-10-25-adv-attack-llm/",
 ]
 
 
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import WebBaseLoader
+from chunking import ChunkManifest, chunk_documents
+from embeddings import EmbeddingBatcher
+from ingest import load_documents
+from vector_store import MemmapVectorStore
 
-docs=[WebBaseLoader(url).load() for url in urls]
-docs_list=[item for sublist in docs for item in sublist]
+# Fetched concurrently; unchanged pages are revalidated against the on-disk cache instead of re-downloaded
+docs_list=load_documents(urls)
 
-text_splitter=RecursiveCharacterTextSplitter.from_tiktoken_encoder()
\ No newline at end of file
+# Split across a process pool; documents whose content hash is unchanged since the last run are skipped.
+# Sources are only pruned when every URL was fetched, so a network error does not empty the index.
+# The manifest is committed only after the store is updated, so a failed embed or write is retried next run.
+manifest=ChunkManifest()
+chunk_diff=chunk_documents(docs_list, manifest, prune_missing=len(docs_list) == len(urls), commit=False)
+doc_splits=[chunk.to_document() for chunk in chunk_diff.added]
+
+# Only new chunks are embedded, and text embedded before (by any document) comes from the cache
+embedder=EmbeddingBatcher()
+vectors=embedder.embed([doc.page_content for doc in doc_splits])
+print(f"{len(doc_splits)} new chunks, {len(chunk_diff.removed)} removed, embedding cache {embedder.stats()}")
+
+if len(doc_splits) or len(chunk_diff.removed):
+    store=MemmapVectorStore(dim=vectors.shape[1] if len(doc_splits) else None)
+    store.delete(chunk_diff.removed)
+    if len(doc_splits):
+        store.add([doc.id for doc in doc_splits], vectors, [doc.page_content for doc in doc_splits],
+                  [doc.metadata for doc in doc_splits])
+    store.close()
+manifest.commit()
+manifest.close()
@@ -0,0 +1,412 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+VECTOR_STORE_DIR = os.getenv(
+    "VECTOR_STORE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "vector_store")
+)
+# Rows scored per matrix product in exact search; bounds the float32 working set
+BLOCK_ROWS = int(os.getenv("VECTOR_STORE_BLOCK_ROWS", "65536"))
+# Rows the memmap grows by at least when it fills up
+MIN_GROWTH = 4096
+
+METADATA_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS rows (
+        row INTEGER PRIMARY KEY,
+        id TEXT NOT NULL,
+        text TEXT NOT NULL,
+        metadata TEXT NOT NULL,
+        deleted INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_rows_id ON rows(id) WHERE deleted = 0;
+"""
+
+
+def _top_k(scores: np.ndarray, rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Best k columns per query row of `scores`, sorted descending, with their row ids."""
+    if scores.shape[1] > k:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, part, axis=1)
+        rows = np.take_along_axis(rows, part, axis=1)
+    order = np.argsort(-scores, axis=1, kind="stable")
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(rows, order, axis=1)
+
+
+def _kmeans(data: np.ndarray, clusters: int, iters: int, rng: np.random.Generator) -> np.ndarray:
+    """Lloyd's k-means on float32 rows, L2 distance. Empty clusters are reseeded from random points.
+
+    Returns at most len(data) centroids.
+    """
+    if not len(data):
+        raise ValueError("k-means needs at least one row")
+    clusters = min(clusters, len(data))
+    centroids = data[rng.choice(len(data), clusters, replace=False)].copy()
+    for _ in range(iters):
+        assign = _nearest(data, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        counts = np.bincount(assign, minlength=clusters)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        centroids[empty] = data[rng.choice(len(data), int(empty.sum()), replace=False)]
+    return centroids
+
+
+def _nearest(data: np.ndarray, centroids: np.ndarray, block: int = 16384) -> np.ndarray:
+    norms = (centroids ** 2).sum(axis=1)
+    out = np.empty(len(data), dtype=np.int32)
+    for start in range(0, len(data), block):
+        chunk = data[start:start + block]
+        out[start:start + block] = np.argmin(norms[None, :] - 2 * chunk @ centroids.T, axis=1)
+    return out
+
+
+class IVFIndex:
+    """Inverted-file index over the store's rows, optionally with product-quantized codes.
+
+    Rows are bucketed by their nearest of `nlist` k-means centroids; a query scans only the
+    `nprobe` buckets whose centroids score highest. With `pq_m` subspaces each row also
+    gets a `pq_m`-byte code of its residual from the bucket centroid. Candidates are
+    ranked by centroid score plus per-query lookup tables over the codes, and only the
+    best `refine * k` are re-scored exactly from the memmap.
+    """
+
+    def __init__(self, centroids: np.ndarray, codebooks: Optional[np.ndarray] = None):
+        self.centroids = centroids.astype(np.float32)
+        self.codebooks = codebooks
+        self.lists: List[List[np.ndarray]] = [[] for _ in range(len(centroids))]
+        self.codes = np.zeros((0, codebooks.shape[0] if codebooks is not None else 0), dtype=np.uint8)
+        self.assign = np.zeros(0, dtype=np.int32)
+        # Store rows below this are in the index; rows appended after the last save are re-added on open
+        self.watermark = 0
+
+    @classmethod
+    def train(cls, sample: np.ndarray, nlist: int, pq_m: Optional[int] = None, iters: int = 10,
+              seed: int = 0) -> "IVFIndex":
+        rng = np.random.default_rng(seed)
+        centroids = _kmeans(sample, nlist, iters, rng)
+        codebooks = None
+        if pq_m:
+            dim = sample.shape[1]
+            if dim % pq_m:
+                raise ValueError(f"pq_m={pq_m} must divide the dimension {dim}")
+            sub = dim // pq_m
+            residuals = sample - centroids[_nearest(sample, centroids)]
+            codebooks = np.stack([_kmeans(np.ascontiguousarray(residuals[:, j * sub:(j + 1) * sub]), 256, iters, rng)
+                                  for j in range(pq_m)])
+        return cls(centroids, codebooks)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        m, _, sub = self.codebooks.shape
+        return np.stack([_nearest(np.ascontiguousarray(vectors[:, j * sub:(j + 1) * sub]), self.codebooks[j])
+                         for j in range(m)], axis=1).astype(np.uint8)
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        assign = _nearest(vectors, self.centroids)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(len(self.centroids) + 1))
+        for bucket in np.nonzero(np.diff(bounds))[0]:
+            self.lists[bucket].append(rows[order[bounds[bucket]:bounds[bucket + 1]]].astype(np.int64))
+        if self.codebooks is not None:
+            needed = int(rows.max()) + 1
+            if needed > len(self.codes):
+                size = max(needed, 2 * len(self.codes))
+                codes = np.zeros((size, self.codes.shape[1]), dtype=np.uint8)
+                codes[:len(self.codes)] = self.codes
+                buckets = np.zeros(size, dtype=np.int32)
+                buckets[:len(self.assign)] = self.assign
+                self.codes, self.assign = codes, buckets
+            self.codes[rows] = self.encode(vectors - self.centroids[assign])
+            self.assign[rows] = assign
+
+    def bucket(self, i: int) -> np.ndarray:
+        parts = self.lists[i]
+        if len(parts) > 1:
+            self.lists[i] = parts = [np.concatenate(parts)]
+        return parts[0] if parts else np.zeros(0, dtype=np.int64)
+
+    def save(self, path: str) -> None:
+        buckets = [self.bucket(i) for i in range(len(self.lists))]
+        offsets = np.cumsum([0] + [len(b) for b in buckets])
+        arrays = {"centroids": self.centroids, "rows": np.concatenate(buckets), "offsets": offsets,
+                  "codes": self.codes, "assign": self.assign, "watermark": np.int64(self.watermark)}
+        if self.codebooks is not None:
+            arrays["codebooks"] = self.codebooks
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        data = np.load(path)
+        index = cls(data["centroids"], data["codebooks"] if "codebooks" in data else None)
+        rows, offsets = data["rows"], data["offsets"]
+        index.lists = [[rows[offsets[i]:offsets[i + 1]]] for i in range(len(offsets) - 1)]
+        index.codes, index.assign = data["codes"], data["assign"]
+        if "watermark" in data:
+            index.watermark = int(data["watermark"])
+        else:
+            index.watermark = int(rows.max()) + 1 if len(rows) else 0
+        return index
+
+
+class MemmapVectorStore:
+    """Local vector store: embeddings in a memory-mapped matrix, metadata in SQLite.
+
+    Vectors live in `vectors.bin` as a (capacity, dim) float32 or float16 memmap that
+    grows by doubling, so the OS pages them in on demand and the process holds only
+    what a search touches. Row i's id, text and metadata are row i of the `rows`
+    table. Deletes and re-adds of an id tombstone the old row; `compact()` rewrites
+    the matrix without them.
+
+    Exact search scores queries in batches against blocks of BLOCK_ROWS rows with
+    one matrix product per block. `build_index()` adds an IVF (optionally IVF-PQ)
+    index for approximate search; rows appended afterwards are added to it too.
+    Vectors are L2-normalized on insert when metric="cosine", so scores are
+    inner products in either metric.
+    """
+
+    def __init__(self, root: str = VECTOR_STORE_DIR, dim: Optional[int] = None, dtype: str = "float32",
+                 metric: str = "cosine"):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self._lock = threading.RLock()
+        config_path = os.path.join(root, "config.json")
+        if os.path.exists(config_path):
+            with open(config_path) as f:
+                config = json.load(f)
+            if dim is not None and dim != config["dim"]:
+                raise ValueError(f"Store at {root} has dim {config['dim']}, not {dim}")
+        else:
+            if dim is None:
+                raise ValueError("dim is required to create a new store")
+            config = {"dim": dim, "dtype": dtype, "metric": metric}
+            with open(config_path, "w") as f:
+                json.dump(config, f)
+        self.dim = config["dim"]
+        self.dtype = np.dtype(config["dtype"])
+        self.metric = config["metric"]
+
+        self._conn = sqlite3.connect(os.path.join(root, "metadata.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(METADATA_SCHEMA)
+        self.count = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM rows").fetchone()[0]
+        self._alive = np.zeros(self.count, dtype=bool)
+        live = [r for (r,) in self._conn.execute("SELECT row FROM rows WHERE deleted = 0")]
+        self._alive[live] = True
+
+        self._vectors_path = os.path.join(root, "vectors.bin")
+        self._vectors = None
+        self._map(max(self.count, MIN_GROWTH))
+        self._index_path = os.path.join(root, "ivf.npz")
+        self.index = IVFIndex.load(self._index_path) if os.path.exists(self._index_path) else None
+        if self.index is not None and self.index.watermark < self.count:
+            # Rows committed after the index was last saved, e.g. before a crash
+            self._index_rows(np.arange(self.index.watermark, self.count))
+            self.index.save(self._index_path)
+
+    def _map(self, capacity: int) -> None:
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        size = capacity * self.dim * self.dtype.itemsize
+        with open(self._vectors_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        self.capacity = os.path.getsize(self._vectors_path) // (self.dim * self.dtype.itemsize)
+        self._vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode="r+", shape=(self.capacity, self.dim))
+
+    def _prepare(self, vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dim {self.dim}, got {vectors.shape[1]}")
+        if self.metric == "cosine":
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+        return vectors
+
+    def _index_rows(self, rows: np.ndarray) -> None:
+        for start in range(0, len(rows), BLOCK_ROWS):
+            block = rows[start:start + BLOCK_ROWS]
+            self.index.add(block, np.asarray(self._vectors[block], dtype=np.float32))
+        self.index.watermark = self.count
+
+    def __len__(self) -> int:
+        return int(self._alive.sum())
+
+    def add(self, ids: Sequence[str], vectors, texts: Optional[Sequence[str]] = None,
+            metadatas: Optional[Sequence[dict]] = None) -> None:
+        """Append vectors; an id that is already present is replaced (its old row is tombstoned)."""
+        vectors = self._prepare(vectors)
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors differ in length")
+        texts = texts or [""] * len(ids)
+        metadatas = metadatas or [{}] * len(ids)
+        with self._lock:
+            self.delete(ids, commit=False)
+            start, end = self.count, self.count + len(ids)
+            if end > self.capacity:
+                self._map(max(end, 2 * self.capacity))
+            self._vectors[start:end] = vectors.astype(self.dtype)
+            self._conn.executemany(
+                "INSERT INTO rows (row, id, text, metadata) VALUES (?, ?, ?, ?)",
+                [(start + i, id_, text, json.dumps(meta, default=str))
+                 for i, (id_, text, meta) in enumerate(zip(ids, texts, metadatas))]
+            )
+            self._conn.commit()
+            self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+            self.count = end
+            if self.index is not None:
+                self.index.add(np.arange(start, end), vectors)
+                self.index.watermark = end
+
+    def delete(self, ids: Iterable[str], commit: bool = True) -> int:
+        """Tombstone rows by id; returns how many were live."""
+        ids = list(ids)
+        with self._lock:
+            rows = []
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                rows += [r for (r,) in self._conn.execute(
+                    f"SELECT row FROM rows WHERE deleted = 0 AND id IN ({','.join('?' * len(batch))})", batch)]
+            if rows:
+                self._conn.executemany("UPDATE rows SET deleted = 1 WHERE row = ?", [(r,) for r in rows])
+                self._alive[rows] = False
+            if commit:
+                self._conn.commit()
+        return len(rows)
+
+    def _exact(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, self.count, BLOCK_ROWS):
+            end = min(start + BLOCK_ROWS, self.count)
+            scores = queries @ np.asarray(self._vectors[start:end], dtype=np.float32).T
+            scores[:, ~self._alive[start:end]] = -np.inf
+            rows = np.broadcast_to(np.arange(start, end), scores.shape)
+            best_scores, best_rows = _top_k(np.concatenate([best_scores, scores], axis=1),
+                                            np.concatenate([best_rows, rows], axis=1), k)
+        return best_scores, best_rows
+
+    def _approximate(self, queries: np.ndarray, k: int, nprobe: int, refine: int) -> Tuple[np.ndarray, np.ndarray]:
+        index = self.index
+        coarse = queries @ index.centroids.T
+        probes = np.argpartition(-coarse, min(nprobe, len(index.centroids)) - 1, axis=1)[:, :nprobe]
+        if index.codebooks is not None:
+            m, _, sub = index.codebooks.shape
+            tables = np.einsum("qms,mcs->qmc", queries.reshape(len(queries), m, sub), index.codebooks)
+        out_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        out_rows = np.full((len(queries), k), -1, dtype=np.int64)
+        for q, probe in enumerate(probes):
+            rows = np.concatenate([index.bucket(b) for b in probe])
+            rows = rows[self._alive[rows]]
+            if not len(rows):
+                continue
+            if index.codebooks is not None and len(rows) > refine * k:
+                approx = coarse[q, index.assign[rows]] + tables[q][np.arange(m), index.codes[rows]].sum(axis=1)
+                rows = rows[np.argpartition(-approx, refine * k - 1)[:refine * k]]
+            rows.sort()
+            scores = np.asarray(self._vectors[rows], dtype=np.float32) @ queries[q]
+            top_scores, top_rows = _top_k(scores[None, :], rows[None, :], k)
+            out_scores[q, :top_scores.shape[1]], out_rows[q, :top_rows.shape[1]] = top_scores[0], top_rows[0]
+        return out_scores, out_rows
+
+    def search(self, queries, k: int = 4, approximate: bool = False, nprobe: int = 8,
+               refine: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """(scores, rows) of the top k per query, best first; missing results are row -1.
+
+        `approximate` uses the IVF index (build_index first) scanning `nprobe` buckets.
+        """
+        queries = self._prepare(queries)
+        with self._lock:
+            if approximate:
+                if self.index is None:
+                    raise ValueError("approximate search needs build_index() first")
+                scores, rows = self._approximate(queries, k, nprobe, refine)
+            else:
+                scores, rows = self._exact(queries, k)
+        rows = np.where(np.isfinite(scores), rows, -1)
+        return scores, rows
+
+    def records(self, rows: Iterable[int]) -> Dict[int, Tuple[str, str, dict]]:
+        rows = [int(r) for r in rows if r >= 0]
+        if not rows:
+            return {}
+        with self._lock:
+            found = self._conn.execute(
+                f"SELECT row, id, text, metadata FROM rows WHERE row IN ({','.join('?' * len(rows))})", rows
+            ).fetchall()
+        return {row: (id_, text, json.loads(meta)) for row, id_, text, meta in found}
+
+    def similarity_search_by_vector(self, vector, k: int = 4, **search_kwargs) -> List[Document]:
+        scores, rows = self.search(vector, k, **search_kwargs)
+        records = self.records(rows[0])
+        return [Document(page_content=records[r][1], metadata={**records[r][2], "score": float(s)}, id=records[r][0])
+                for s, r in zip(scores[0], rows[0]) if r >= 0]
+
+    def build_index(self, nlist: Optional[int] = None, pq_m: Optional[int] = None, sample: int = 100_000,
+                    iters: int = 10, seed: int = 0) -> IVFIndex:
+        """Train and save an IVF (with pq_m: IVF-PQ) index over the live rows.
+
+        nlist defaults to about 4*sqrt(n) buckets. With fewer training rows than nlist
+        (or than the 256 PQ codewords) k-means trains one centroid per row instead.
+        """
+        with self._lock:
+            live = np.nonzero(self._alive)[0]
+            if not len(live):
+                raise ValueError("Cannot build an index over an empty store")
+            nlist = nlist or max(1, int(4 * np.sqrt(len(live))))
+            rng = np.random.default_rng(seed)
+            chosen = np.sort(rng.choice(live, min(sample, len(live)), replace=False))
+            training = np.asarray(self._vectors[chosen], dtype=np.float32)
+            self.index = IVFIndex.train(training, nlist, pq_m, iters, seed)
+            self._index_rows(live)
+            self.index.save(self._index_path)
+        return self.index
+
+    def compact(self) -> int:
+        """Rewrite the matrix and metadata without tombstoned rows; returns rows reclaimed.
+
+        Row numbers change, so an existing index is rebuilt with the same settings.
+        """
+        with self._lock:
+            live = np.nonzero(self._alive)[0]
+            reclaimed = self.count - len(live)
+            if not reclaimed:
+                return 0
+            # live is ascending, so each block's new rows never overwrite rows a later block still reads
+            for start in range(0, len(live), BLOCK_ROWS):
+                block = live[start:start + BLOCK_ROWS]
+                self._vectors[start:start + len(block)] = self._vectors[block]
+            self._conn.execute("DELETE FROM rows WHERE deleted = 1")
+            self._conn.execute("CREATE TEMP TABLE remap (old INTEGER PRIMARY KEY, new INTEGER)")
+            self._conn.executemany("INSERT INTO remap VALUES (?, ?)", [(int(o), n) for n, o in enumerate(live)])
+            self._conn.execute("UPDATE rows SET row = -1 - (SELECT new FROM remap WHERE old = rows.row)")
+            self._conn.execute("UPDATE rows SET row = -1 - row")
+            self._conn.execute("DROP TABLE remap")
+            self._conn.commit()
+            self.count = len(live)
+            self._alive = np.ones(self.count, dtype=bool)
+            self._vectors.flush()
+            if self.index is not None and not self.count:
+                self.index = None
+                os.remove(self._index_path)
+            elif self.index is not None:
+                pq_m = self.index.codebooks.shape[0] if self.index.codebooks is not None else None
+                self.build_index(len(self.index.centroids), pq_m)
+        return reclaimed
+
+    def flush(self) -> None:
+        with self._lock:
+            self._vectors.flush()
+            if self.index is not None:
+                self.index.save(self._index_path)
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
@@ -0,0 +1,220 @@
+import contextvars
+import json
+import os
+import queue
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional, Dict, List, Callable, Any
+import os.path
+
+import requests
+
+DEFAULT_ACCOUNT = "default"
+DEFAULT_MESSAGES_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'whatsapp-bridge', 'store', 'messages.db')
+DEFAULT_API_BASE_URL = "http://localhost:8080/api"
+
+# Idle SQLite connections kept open per account
+POOL_SIZE = int(os.getenv("WHATSAPP_DB_POOL_SIZE", "4"))
+
+# Sender JID -> display name lookups cached per account
+SENDER_NAME_CACHE_SIZE = 2048
+
+# Timeout for calls to the Go bridge REST API, in seconds
+BRIDGE_TIMEOUT = float(os.getenv("WHATSAPP_BRIDGE_TIMEOUT", "60"))
+
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection whose close() hands it back to its account's pool."""
+
+    pool: Optional["ConnectionPool"] = None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.release(self)
+        else:
+            super().close()
+
+    def really_close(self):
+        super().close()
+
+
+class ConnectionPool:
+    """Small LIFO pool of SQLite connections to one bridge store."""
+
+    def __init__(self, db_path: str, size: int = POOL_SIZE):
+        self.db_path = db_path
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def acquire(self) -> PooledConnection:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = sqlite3.connect(self.db_path, factory=PooledConnection, check_same_thread=False)
+            conn.pool = self
+        return conn
+
+    def release(self, conn: PooledConnection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.really_close()
+
+    def close_all(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().really_close()
+            except queue.Empty:
+                return
+
+
+class LRUCache:
+    """Thread-safe bounded mapping with least-recently-used eviction."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class Account:
+    """One WhatsApp bridge store: its message database, REST API and per-account state."""
+
+    def __init__(self, name: str, db_path: str, api_base_url: str):
+        self.name = name
+        self.db_path = db_path
+        self.api_base_url = api_base_url.rstrip("/")
+        self.pool = ConnectionPool(db_path)
+        self.sender_names = LRUCache(SENDER_NAME_CACHE_SIZE)
+        self.http = requests.Session()
+
+    def connect(self) -> PooledConnection:
+        return self.pool.acquire()
+
+    def post(self, path: str, payload: Dict[str, Any]) -> requests.Response:
+        return self.http.post(f"{self.api_base_url}/{path.lstrip('/')}", json=payload, timeout=BRIDGE_TIMEOUT)
+
+    def close(self) -> None:
+        self.pool.close_all()
+        self.http.close()
+
+
+_accounts: Dict[str, Account] = {}
+_default_account: Optional[str] = None
+_accounts_lock = threading.Lock()
+_current_account = contextvars.ContextVar("whatsapp_account", default=None)
+
+
+def _load_config() -> Dict[str, Dict[str, str]]:
+    """Read account definitions from WHATSAPP_ACCOUNTS (inline JSON) or WHATSAPP_ACCOUNTS_FILE.
+
+    The JSON maps account names to {"db_path": ..., "api_base_url": ...}. Without either
+    variable a single "default" account pointing at the sibling bridge store is used.
+    """
+    raw = os.getenv("WHATSAPP_ACCOUNTS")
+    path = os.getenv("WHATSAPP_ACCOUNTS_FILE")
+    if not raw and path:
+        with open(path) as f:
+            raw = f.read()
+    if not raw:
+        return {DEFAULT_ACCOUNT: {"db_path": DEFAULT_MESSAGES_DB_PATH, "api_base_url": DEFAULT_API_BASE_URL}}
+    return json.loads(raw)
+
+
+def configure_accounts(config: Dict[str, Dict[str, str]], default: Optional[str] = None) -> None:
+    """Replace the account registry, closing any pools and HTTP clients of the old one."""
+    global _default_account
+    if not config:
+        raise ValueError("At least one account must be configured")
+    with _accounts_lock:
+        for account in _accounts.values():
+            account.close()
+        _accounts.clear()
+        for name, settings in config.items():
+            _accounts[name] = Account(
+                name,
+                settings.get("db_path", DEFAULT_MESSAGES_DB_PATH),
+                settings.get("api_base_url", DEFAULT_API_BASE_URL),
+            )
+        _default_account = default or os.getenv("WHATSAPP_DEFAULT_ACCOUNT") or next(iter(config))
+        if _default_account not in _accounts:
+            raise ValueError(f"Default account '{_default_account}' is not configured")
+
+
+def _ensure_configured() -> None:
+    if not _accounts:
+        configure_accounts(_load_config())
+
+
+def list_accounts() -> List[str]:
+    _ensure_configured()
+    return list(_accounts)
+
+
+def get_account(name: Optional[str] = None) -> Account:
+    """Return the named account, the one selected by use_account(), or the default."""
+    _ensure_configured()
+    name = name or _current_account.get() or _default_account
+    account = _accounts.get(name)
+    if account is None:
+        raise ValueError(f"Unknown account '{name}'. Available accounts: {', '.join(_accounts)}")
+    return account
+
+
+@contextmanager
+def use_account(name: Optional[str]):
+    """Route every whatsapp.* call in this context to the given account (None keeps the current one)."""
+    if name is None:
+        yield get_account()
+        return
+    account = get_account(name)
+    token = _current_account.set(account.name)
+    try:
+        yield account
+    finally:
+        _current_account.reset(token)
+
+
+def fan_out(func: Callable[..., Any], *args, accounts: Optional[List[str]] = None, **kwargs) -> Dict[str, Any]:
+    """Call func once per account in parallel threads and collect results by account name.
+
+    A failure in one account is reported as {"error": ...} for that account and does not
+    affect the others.
+    """
+    names = accounts or list_accounts()
+
+    def run(name):
+        with use_account(name):
+            return func(*args, **kwargs)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=len(names)) as executor:
+        futures = {name: executor.submit(contextvars.copy_context().run, run, name) for name in names}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = {"error": str(e)}
+    return results
@@ -0,0 +1,168 @@
+import asyncio
+import concurrent.futures
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import AsyncExitStack
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, Dict
+
+_STREAM_DONE = object()
+
+
+class _StreamFailure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class AgentRuntime:
+    """Background event loop that owns the MCP client, its sessions and the agent.
+
+    Streamlit reruns the script on every interaction and the old code called
+    asyncio.run() per turn, so each turn built a fresh loop while the MCP client and
+    tools created in setup_agent stayed bound to a loop that had already been closed.
+    Here a single daemon thread runs one loop for the life of the process; everything
+    async is created on it and callers from any thread submit work through
+    concurrent.futures.Future objects.
+    """
+
+    def __init__(self, overhead_window: int = 200):
+        self.loop = asyncio.new_event_loop()
+        self._owner_task: Optional[asyncio.Task] = None
+        self._owner_stop: Optional[asyncio.Event] = None
+        self.agent = None
+        self.client = None
+        self.tools = []
+        self._overhead = deque(maxlen=overhead_window)
+        self._overhead_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True, name="agent-runtime")
+        self._thread.start()
+        self._ready.wait()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._ready.set)
+        self.loop.run_forever()
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """Schedule a coroutine on the runtime loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the runtime loop and wait for its result.
+
+        Records the dispatch overhead: wall time seen by the caller minus the time the
+        coroutine itself spent running on the loop.
+        """
+        inner = {}
+
+        async def timed():
+            inner["start"] = time.perf_counter()
+            try:
+                return await coro
+            finally:
+                inner["end"] = time.perf_counter()
+
+        start = time.perf_counter()
+        try:
+            return self.submit(timed()).result(timeout)
+        finally:
+            total = time.perf_counter() - start
+            if "end" in inner:
+                with self._overhead_lock:
+                    self._overhead.append(total - (inner["end"] - inner["start"]))
+
+    async def _own(self, setup, ready: asyncio.Future, stop: asyncio.Event):
+        # MCP transports are anyio task groups, which must be exited by the task that
+        # entered them, so one owner task holds the sessions open until asked to stop.
+        async with AsyncExitStack() as stack:
+            try:
+                result = await setup(stack)
+            except BaseException as e:
+                ready.set_exception(e)
+                return
+            ready.set_result(result)
+            await stop.wait()
+
+    async def _close_owner(self):
+        if self._owner_task is not None:
+            self._owner_stop.set()
+            await asyncio.gather(self._owner_task, return_exceptions=True)
+            self._owner_task = None
+
+    def initialize(self, setup: Callable[[AsyncExitStack], Awaitable[tuple]], timeout: Optional[float] = None):
+        """Build (agent, client, tools) on the runtime loop, replacing any previous agent.
+
+        `setup` receives an AsyncExitStack; MCP sessions entered on it stay open until
+        shutdown() or the next initialize().
+        """
+        async def rebuild():
+            await self._close_owner()
+            ready = self.loop.create_future()
+            self._owner_stop = asyncio.Event()
+            self._owner_task = asyncio.create_task(self._own(setup, ready, self._owner_stop))
+            return await ready
+
+        self.agent, self.client, self.tools = self.call(rebuild(), timeout)
+        return self.agent, self.client, self.tools
+
+    def invoke(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+        """Synchronous agent turn for the Streamlit script thread."""
+        if self.agent is None:
+            raise RuntimeError("Agent is not initialized")
+        return self.call(self.agent.ainvoke(payload), timeout)
+
+    async def ainvoke(self, payload: Dict[str, Any]) -> Any:
+        """Agent turn awaitable from a different event loop (e.g. the task scheduler's)."""
+        if self.agent is None:
+            raise RuntimeError("Agent is not initialized")
+        return await asyncio.wrap_future(self.submit(self.agent.ainvoke(payload)))
+
+    def stream(self, events: AsyncIterator, timeout: Optional[float] = None) -> Iterator:
+        """Iterate an async generator on the runtime loop, yielding its items in this thread.
+
+        Items are handed over through a thread-safe queue as soon as they are produced.
+        Closing the returned generator early cancels the producer on the loop.
+        """
+        items = queue.Queue()
+
+        async def pump():
+            try:
+                async for item in events:
+                    items.put(item)
+            except BaseException as e:
+                items.put(_StreamFailure(e))
+                raise
+            finally:
+                items.put(_STREAM_DONE)
+
+        future = self.submit(pump())
+        try:
+            while True:
+                item = items.get(timeout=timeout)
+                if item is _STREAM_DONE:
+                    return
+                if isinstance(item, _StreamFailure):
+                    raise item.error
+                yield item
+        finally:
+            future.cancel()
+
+    def overhead_stats(self) -> Dict[str, float]:
+        with self._overhead_lock:
+            samples = sorted(self._overhead)
+        if not samples:
+            return {}
+        return {
+            "turns": len(samples),
+            "median_ms": round(samples[len(samples) // 2] * 1000, 3),
+            "max_ms": round(samples[-1] * 1000, 3),
+        }
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        try:
+            self.call(self._close_owner(), timeout)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
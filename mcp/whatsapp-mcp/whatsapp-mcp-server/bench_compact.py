@@ -0,0 +1,96 @@
+"""Compare tokens per result for the verbose and compact output of the message tools.
+
+Runs against a synthetic messages.db by default so numbers are reproducible, or
+against a real bridge store with --db.
+
+    python bench_compact.py
+    python bench_compact.py --db ../whatsapp-bridge/store/messages.db --budget 500
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+from dataclasses import asdict
+from datetime import datetime, timedelta
+
+import whatsapp
+from accounts import configure_accounts
+from compact import estimate_tokens
+
+
+def build_synthetic_db(path: str, chats: int = 30, messages_per_chat: int = 200, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    words = "ok sure see you tomorrow meeting at the office send me the file thanks lol what time are we leaving".split()
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE chats (jid TEXT PRIMARY KEY, name TEXT, last_message_time TIMESTAMP);
+        CREATE TABLE messages (
+            id TEXT, chat_jid TEXT, sender TEXT, content TEXT, timestamp TIMESTAMP, is_from_me BOOLEAN,
+            media_type TEXT, filename TEXT, url TEXT, media_key BLOB, file_sha256 BLOB, file_enc_sha256 BLOB,
+            file_length INTEGER, PRIMARY KEY (id, chat_jid)
+        );
+    """)
+    start = datetime(2024, 1, 1, 8, 0, 0)
+    for c in range(chats):
+        is_group = c % 4 == 0
+        jid = f"1203630{c:011d}@g.us" if is_group else f"4917{c:08d}@s.whatsapp.net"
+        members = [f"4917{rng.randrange(10**8):08d}" for _ in range(5)] if is_group else [jid.split("@")[0]]
+        ts = start
+        for m in range(messages_per_chat):
+            ts += timedelta(minutes=rng.randrange(1, 240))
+            from_me = rng.random() < 0.4
+            media = rng.choice(["image", "video", "document"]) if rng.random() < 0.1 else ""
+            conn.execute(
+                "INSERT INTO messages (id, chat_jid, sender, content, timestamp, is_from_me, media_type) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (f"3EB0{rng.getrandbits(64):016X}{m:04X}", jid, "me" if from_me else rng.choice(members),
+                 " ".join(rng.choice(words) for _ in range(rng.randrange(2, 14))), f"{ts:%Y-%m-%d %H:%M:%S}+00:00",
+                 from_me, media)
+            )
+        conn.execute("INSERT INTO chats VALUES (?, ?, ?)", (jid, f"Group {c}" if is_group else f"Contact {c}", f"{ts:%Y-%m-%d %H:%M:%S}+00:00"))
+    conn.commit()
+    conn.close()
+
+
+def report(label: str, text: str, results: int) -> None:
+    tokens = estimate_tokens(text)
+    per_result = tokens / results if results else 0
+    print(f"{label:<40} {len(text):>8} chars {tokens:>7} tokens {per_result:>7.1f} tokens/result")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="Path to a real messages.db (default: synthetic)")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--budget", type=int, default=None, help="Token budget for the compact runs")
+    args = parser.parse_args()
+
+    db_path = args.db
+    if not db_path:
+        db_path = os.path.join(tempfile.mkdtemp(), "messages.db")
+        build_synthetic_db(db_path)
+    configure_accounts({"bench": {"db_path": db_path}})
+
+    for include_context in (False, True):
+        suffix = "with context" if include_context else "no context"
+        verbose = whatsapp.list_messages(limit=args.limit, include_context=include_context)
+        compact = whatsapp.list_messages(limit=args.limit, include_context=include_context, compact=True, max_tokens=args.budget)
+        report(f"list_messages verbose ({suffix})", verbose, args.limit)
+        report(f"list_messages compact ({suffix})", compact, args.limit)
+
+    chats = whatsapp.list_chats(limit=args.limit)
+    report("list_chats verbose (json)", json.dumps([asdict(c) for c in chats], default=str), len(chats))
+    report("list_chats compact", whatsapp.format_chats_list(chats, args.budget), len(chats))
+
+    conn = sqlite3.connect(db_path)
+    message_id = conn.execute("SELECT id FROM messages ORDER BY timestamp DESC LIMIT 1 OFFSET 10").fetchone()[0]
+    conn.close()
+    context = whatsapp.get_message_context(message_id, 5, 5)
+    results = len(context.before) + 1 + len(context.after)
+    report("get_message_context verbose (json)", json.dumps(asdict(context), default=str), results)
+    report("get_message_context compact", whatsapp.format_message_context(context, args.budget), results)
+
+
+if __name__ == "__main__":
+    main()
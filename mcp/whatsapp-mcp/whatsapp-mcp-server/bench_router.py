@@ -0,0 +1,73 @@
+"""Exercise the model router against local fake LLM endpoints.
+
+Starts three OpenAI-compatible fake endpoints (fast but flaky, medium, slow) and runs
+agent turns through a RoutedAgent, then prints which model served each turn and the
+router's per-model latency, error rate and cost.
+
+    python bench_router.py --turns 40
+    python bench_router.py --turns 40 --fast-error-rate 0.9 --min-tier 2
+"""
+import argparse
+import asyncio
+import collections
+import time
+
+from langgraph.prebuilt import create_react_agent
+
+from fake_llm import FakeLLMConfig, start_fake_llm
+from model_router import ModelRouter, ModelSpec, RoutedAgent, make_chat_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--min-tier", type=int, default=1)
+    parser.add_argument("--fast-error-rate", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    endpoints = {
+        "fake-fast": (1, FakeLLMConfig(latency_ms=30, jitter_ms=10, error_rate=args.fast_error_rate, seed=args.seed)),
+        "fake-medium": (2, FakeLLMConfig(latency_ms=120, jitter_ms=20, seed=args.seed)),
+        "fake-slow": (3, FakeLLMConfig(latency_ms=400, jitter_ms=50, seed=args.seed)),
+    }
+    specs = []
+    servers = []
+    for name, (tier, config) in endpoints.items():
+        server, url = start_fake_llm(config)
+        servers.append(server)
+        specs.append(ModelSpec(name, "openai", tier, input_cost=0.1 * tier, output_cost=0.4 * tier, base_url=url))
+
+    router = ModelRouter(specs, cooldown=2.0)
+    agent = RoutedAgent(router, lambda spec: create_react_agent(make_chat_model(spec), []))
+
+    served = collections.Counter()
+    latencies = []
+
+    async def run():
+        config = {"configurable": {"min_tier": args.min_tier}}
+        for i in range(args.turns):
+            start = time.perf_counter()
+            try:
+                await agent.ainvoke({"messages": [{"role": "user", "content": f"turn {i}: hello"}]}, config)
+                served[agent.last_model] += 1
+            except Exception as e:
+                served[f"failed ({type(e).__name__})"] += 1
+            latencies.append(time.perf_counter() - start)
+
+    try:
+        asyncio.run(run())
+    finally:
+        for server in servers:
+            server.shutdown()
+
+    latencies.sort()
+    print(f"turns={args.turns} p50={latencies[len(latencies) // 2] * 1000:.1f} ms "
+          f"p90={latencies[int(len(latencies) * 0.9) - 1] * 1000:.1f} ms")
+    print("served by:", dict(served))
+    for row in router.snapshot():
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Per-turn overhead of asyncio.run() per turn versus the persistent AgentRuntime loop.
+
+Two measurements:
+
+* dispatch: a no-op coroutine run through asyncio.run() (old test_client.py turn)
+  versus AgentRuntime.call() (new turn), isolating event-loop setup cost.
+* tool call: one MCP tool call per turn, opening a fresh session every turn (what a
+  tool bound to a dead loop / stateless client does) versus reusing one session owned
+  by the runtime loop.
+
+    python bench_runtime.py --turns 20
+    python bench_runtime.py --turns 20 --url http://127.0.0.1:8000/sse
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from contextlib import AsyncExitStack
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+
+from agent_runtime import AgentRuntime
+from shared_server import SERVER_DIR
+
+
+def transport(url):
+    if url:
+        return sse_client(url)
+    return stdio_client(StdioServerParameters(command=sys.executable, args=[os.path.join(SERVER_DIR, "main.py")]))
+
+
+async def open_session(stack: AsyncExitStack, url):
+    read, write = await stack.enter_async_context(transport(url))
+    session = await stack.enter_async_context(ClientSession(read, write))
+    await session.initialize()
+    return session
+
+
+async def tool_call_fresh_session(url, tool: str, arguments: dict):
+    async with AsyncExitStack() as stack:
+        session = await open_session(stack, url)
+        await session.call_tool(tool, arguments)
+
+
+def timed(fn, turns: int):
+    samples = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def show(label: str, samples) -> None:
+    print(f"{label:<38} median={statistics.median(samples) * 1000:9.3f} ms  max={max(samples) * 1000:9.3f} ms")
+
+
+async def noop():
+    await asyncio.sleep(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--url", default=None, help="SSE URL of a shared server (default: spawn over stdio)")
+    parser.add_argument("--tool", default="list_chats")
+    args = parser.parse_args()
+    arguments = {"limit": 5}
+
+    runtime = AgentRuntime()
+    try:
+        show("dispatch: asyncio.run per turn", timed(lambda: asyncio.run(noop()), args.turns * 10))
+        show("dispatch: AgentRuntime.call", timed(lambda: runtime.call(noop()), args.turns * 10))
+
+        show("tool call: new session per turn",
+             timed(lambda: asyncio.run(tool_call_fresh_session(args.url, args.tool, arguments)), args.turns))
+
+        async def setup(stack):
+            return None, None, [await open_session(stack, args.url)]
+
+        _, _, (session,) = runtime.initialize(setup)
+        show("tool call: runtime-owned session",
+             timed(lambda: runtime.call(session.call_tool(args.tool, arguments)), args.turns))
+        print(f"runtime dispatch overhead: {runtime.overhead_stats()}")
+    finally:
+        runtime.shutdown()
+
+
+if __name__ == "__main__":
+    main()
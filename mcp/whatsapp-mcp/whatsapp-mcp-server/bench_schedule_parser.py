@@ -0,0 +1,93 @@
+"""Parse throughput of the schedule parser versus the old per-message regex loop.
+
+Every chat message goes through the parser before the agent sees it, and most are not
+scheduling commands, so the corpus is mostly ordinary chat with a share of commands
+in each supported phrasing.
+
+    python bench_schedule_parser.py --messages 200000 --command-share 0.1
+"""
+import argparse
+import datetime
+import random
+import re
+import time
+
+from schedule_parser import parse_schedule
+
+COMMANDS = [
+    "send message to ali at 5:30 pm see you soon",
+    "send a message to bob in 10 minutes: running late",
+    "send message to sara tomorrow 9am saying happy birthday!",
+    "remind me at 4pm to call mom",
+    "remind me tomorrow to pay rent",
+    "remind me to stretch every 2 hours",
+    "schedule the weekly report for friday at 10am",
+    "at 10:00 check the server logs",
+    "in half an hour, ping the team",
+    "every weekday at 9am send the standup summary",
+]
+
+CHAT = [
+    "what did ali say yesterday about the trip?",
+    "show me my last 10 messages",
+    "summarize the family group",
+    "tomorrow is going to be a long day",
+    "who sent the photo at the meeting",
+    "find messages mentioning the invoice",
+    "send the pdf to the project group",
+    "list my chats",
+]
+
+
+def legacy_parse(message: str):
+    """parse_schedule_command as it was in test_client.py, for comparison."""
+    patterns = [
+        r"send message to (\w+) at (\d{1,2}):(\d{2})\s*(am|pm)?\s*(.+)?",
+        r"remind me at (\d{1,2}):(\d{2})\s*(am|pm)?\s*to\s*(.+)",
+        r"schedule (.+) for (\d{1,2}):(\d{2})\s*(am|pm)?",
+        r"at (\d{1,2}):(\d{2})\s*(am|pm)?\s*(.+)"
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, message.lower())
+        if match:
+            groups = match.groups()
+            if "send message to" in message.lower():
+                hour = int(groups[1])
+                if groups[3] == "pm" and hour != 12:
+                    hour += 12
+                elif groups[3] == "am" and hour == 12:
+                    hour = 0
+                scheduled_time = datetime.datetime.now().replace(hour=hour, minute=int(groups[2]), second=0, microsecond=0)
+                return {"is_scheduled": True, "task": f"send message to {groups[0]}: {groups[4]}",
+                        "scheduled_time": scheduled_time, "type": "message"}
+    return {"is_scheduled": False}
+
+
+def run(label: str, parse, corpus) -> None:
+    start = time.perf_counter()
+    recognized = sum(1 for message in corpus if parse(message)["is_scheduled"])
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {len(corpus) / elapsed:>12,.0f} msg/s  {elapsed / len(corpus) * 1e6:7.2f} us/msg  "
+          f"scheduled={recognized}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--command-share", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [rng.choice(COMMANDS) if rng.random() < args.command_share else rng.choice(CHAT)
+              for _ in range(args.messages)]
+    print(f"{args.messages:,} messages, {args.command_share:.0%} scheduling commands")
+    run("legacy regex loop", legacy_parse, corpus)
+    run("combined matcher", parse_schedule, corpus)
+
+    commands_only = [rng.choice(COMMANDS) for _ in range(args.messages // 10)]
+    run("commands only", parse_schedule, commands_only)
+
+
+if __name__ == "__main__":
+    main()
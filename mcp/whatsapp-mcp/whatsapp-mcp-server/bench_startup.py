@@ -0,0 +1,76 @@
+"""Measure first-tool-call latency for a spawned stdio server versus a warm shared SSE server.
+
+"cold" starts a fresh `python main.py` over stdio for every run, as test_client.py used
+to. "warm" connects a new session to one long-lived SSE server, which is started once
+(and warmed with a throwaway call) before timing begins.
+
+    python bench_startup.py --runs 10 --tool list_chats
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+
+from shared_server import DEFAULT_SSE_URL, SERVER_DIR, is_server_up, spawn_server
+
+
+async def first_call_stdio(tool: str, arguments: dict) -> float:
+    start = time.perf_counter()
+    params = StdioServerParameters(command=sys.executable, args=[os.path.join(SERVER_DIR, "main.py")])
+    async with stdio_client(params) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            await session.call_tool(tool, arguments)
+    return time.perf_counter() - start
+
+
+async def first_call_sse(url: str, tool: str, arguments: dict) -> float:
+    start = time.perf_counter()
+    async with sse_client(url) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            await session.call_tool(tool, arguments)
+    return time.perf_counter() - start
+
+
+def summarize(label: str, samples: list) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    print(f"{label:<6} runs={len(samples):<3} median={statistics.median(samples) * 1000:8.1f} ms  "
+          f"p95={p95 * 1000:8.1f} ms  min={ordered[0] * 1000:8.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--url", default=DEFAULT_SSE_URL)
+    parser.add_argument("--tool", default="list_chats")
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+    arguments = {"limit": args.limit}
+
+    cold = [await first_call_stdio(args.tool, arguments) for _ in range(args.runs)]
+
+    spawned = None
+    if not is_server_up(args.url):
+        spawned = spawn_server(args.url)
+    try:
+        await first_call_sse(args.url, args.tool, arguments)
+        warm = [await first_call_sse(args.url, args.tool, arguments) for _ in range(args.runs)]
+    finally:
+        if spawned is not None:
+            spawned.terminate()
+
+    summarize("cold", cold)
+    summarize("warm", warm)
+    print(f"speedup (median): {statistics.median(cold) / statistics.median(warm):.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
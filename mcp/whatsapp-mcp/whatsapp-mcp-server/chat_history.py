@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from io import BytesIO
+from typing import Any, Dict, List, Optional
+
+CHAT_CACHE_DIR = os.getenv(
+    "CHAT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".chat_cache")
+)
+
+# Turns kept in memory per session; older ones are read back from disk on demand
+RECENT_MESSAGES = 40
+
+# Longest side of the thumbnails rendered in the chat, in pixels
+THUMBNAIL_SIZE = 320
+
+HISTORY_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS chat_messages (
+        session_id TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        entry TEXT NOT NULL,
+        PRIMARY KEY (session_id, seq)
+    ) WITHOUT ROWID;
+"""
+
+
+class MediaCache:
+    """Content-addressed store for uploaded media, with thumbnails for images.
+
+    Files are named by their SHA-256, so uploading the same bytes twice (or the
+    file uploader re-submitting on every rerun) stores them once.
+    """
+
+    def __init__(self, root: str = CHAT_CACHE_DIR):
+        self.root = os.path.join(root, "media")
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, digest: str, suffix: str = "") -> str:
+        return os.path.join(self.root, digest[:2], digest + suffix)
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return digest
+
+    def path(self, digest: str) -> str:
+        return self._path(digest)
+
+    def read(self, digest: str) -> bytes:
+        with open(self._path(digest), "rb") as f:
+            return f.read()
+
+    def thumbnail(self, digest: str, size: int = THUMBNAIL_SIZE) -> Optional[str]:
+        """Return the path of a PNG thumbnail, creating it on first use. None if not an image."""
+        thumb = self._path(digest, f".thumb{size}.png")
+        if os.path.exists(thumb):
+            return thumb
+        try:
+            from PIL import Image
+            with Image.open(self._path(digest)) as image:
+                image.thumbnail((size, size))
+                buffer = BytesIO()
+                image.save(buffer, format="PNG")
+        except Exception as e:
+            print(f"Could not create thumbnail for {digest}: {e}")
+            return None
+        with open(thumb, "wb") as f:
+            f.write(buffer.getvalue())
+        return thumb
+
+
+class ChatHistory:
+    """Bounded chat history for one Streamlit session.
+
+    Every entry is appended to SQLite; only the most recent `recent` entries stay in
+    memory, and media is stored in the MediaCache with entries holding only its digest.
+    Older turns are paged back in with load_older().
+    """
+
+    def __init__(self, session_id: str, root: str = CHAT_CACHE_DIR, recent: int = RECENT_MESSAGES,
+                 media: Optional[MediaCache] = None):
+        os.makedirs(root, exist_ok=True)
+        self.session_id = session_id
+        self.media = media or MediaCache(root)
+        self._conn = sqlite3.connect(os.path.join(root, "history.db"), check_same_thread=False)
+        self._conn.executescript(HISTORY_SCHEMA)
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=recent)
+        row = self._conn.execute(
+            "SELECT COALESCE(MAX(seq), -1) FROM chat_messages WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        self._next_seq = row[0] + 1
+        for entry in reversed(self.load_older(self._next_seq, recent)):
+            self._recent.appendleft(entry)
+
+    def __len__(self) -> int:
+        return self._next_seq
+
+    def append(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            entry = dict(entry, seq=self._next_seq)
+            self._conn.execute(
+                "INSERT INTO chat_messages (session_id, seq, created_at, entry) VALUES (?, ?, ?, ?)",
+                (self.session_id, entry["seq"], time.time(), json.dumps(entry))
+            )
+            self._conn.commit()
+            self._next_seq += 1
+            self._recent.append(entry)
+            return entry
+
+    def append_media(self, role: str, kind: str, data: bytes, filename: str, mime: Optional[str] = None) -> Dict[str, Any]:
+        """Store media bytes in the cache and append an entry referencing them."""
+        return self.append({
+            "role": role,
+            "type": kind,
+            "media": self.media.put(data),
+            "filename": filename,
+            "mime": mime or "application/octet-stream",
+            "size": len(data),
+        })
+
+    def recent(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._recent)
+
+    def first_recent_seq(self) -> int:
+        with self._lock:
+            return self._recent[0]["seq"] if self._recent else self._next_seq
+
+    def load_older(self, before_seq: int, limit: int) -> List[Dict[str, Any]]:
+        """Read up to `limit` entries older than before_seq from disk, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT entry FROM chat_messages WHERE session_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+                (self.session_id, before_seq, limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def load_range(self, start_seq: int, end_seq: int) -> List[Dict[str, Any]]:
+        """Read the entries with start_seq <= seq < end_seq from disk, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT entry FROM chat_messages WHERE session_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+                (self.session_id, start_seq, end_seq)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
@@ -0,0 +1,149 @@
+import threading
+from typing import Optional, List, Dict, Callable
+
+# Rough chars-per-token ratio for English chat text with cl100k/o200k style tokenizers
+CHARS_PER_TOKEN = 4
+
+# Longest snippet of a chat's last message shown by list_chats in compact mode
+LAST_MESSAGE_PREVIEW_CHARS = 60
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for budgeting, no tokenizer dependency."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class AliasRegistry:
+    """Short, stable aliases for chat JIDs and message IDs.
+
+    Aliases are handed out in first-seen order and never reassigned for the life of the
+    process, so an alias the agent saw in one tool result can be passed back to any
+    other tool and resolves to the same JID or ID.
+    """
+
+    PREFIXES = {"chat": "c", "message": "m"}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._forward: Dict[str, Dict[str, str]] = {kind: {} for kind in self.PREFIXES}
+        self._reverse: Dict[str, str] = {}
+
+    def alias(self, kind: str, value: str) -> str:
+        if not value:
+            return value
+        with self._lock:
+            table = self._forward[kind]
+            alias = table.get(value)
+            if alias is None:
+                alias = f"{self.PREFIXES[kind]}{len(table) + 1}"
+                table[value] = alias
+                self._reverse[alias] = value
+            return alias
+
+    def resolve(self, value: Optional[str]) -> Optional[str]:
+        """Return the real JID/ID for an alias, or the value unchanged if it is not one."""
+        if not value:
+            return value
+        with self._lock:
+            return self._reverse.get(value, value)
+
+
+aliases = AliasRegistry()
+
+
+def resolve_alias(value: Optional[str]) -> Optional[str]:
+    return aliases.resolve(value)
+
+
+def _fit_to_budget(lines: List[str], max_tokens: Optional[int], unit: str, total_units: int, units_shown: Callable[[int], int]) -> str:
+    if max_tokens is None:
+        return "\n".join(lines)
+
+    output = []
+    used = 0
+    for index, line in enumerate(lines):
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            omitted = total_units - units_shown(index)
+            if omitted > 0:
+                output.append(f"... {omitted} more {unit} omitted (token budget {max_tokens})")
+            break
+        output.append(line)
+        used += cost
+    return "\n".join(output)
+
+
+def format_messages_compact(messages: List, max_tokens: Optional[int] = None, sender_name: Optional[Callable[[str], str]] = None) -> str:
+    """Render messages grouped by chat with aliases instead of full JIDs and IDs.
+
+    Duplicates (e.g. overlapping context windows around several hits) are dropped,
+    the chat header is written once per chat and the date only when it changes.
+    """
+    if not messages:
+        return "No messages to display."
+
+    seen = set()
+    groups: Dict[str, List] = {}
+    for message in messages:
+        key = (message.chat_jid, message.id)
+        if key in seen:
+            continue
+        seen.add(key)
+        groups.setdefault(message.chat_jid, []).append(message)
+
+    names = {}
+
+    def name_for(message) -> str:
+        if message.is_from_me:
+            return "Me"
+        if message.sender not in names:
+            names[message.sender] = sender_name(message.sender) if sender_name else message.sender
+        return names[message.sender]
+
+    lines = []
+    line_units = []
+    shown = 0
+    for chat_jid, chat_messages in groups.items():
+        chat_name = chat_messages[0].chat_name or chat_jid
+        lines.append(f"# {chat_name} ({aliases.alias('chat', chat_jid)})")
+        line_units.append(shown)
+        last_day = None
+        for message in sorted(chat_messages, key=lambda m: m.timestamp):
+            day = message.timestamp.strftime("%Y-%m-%d")
+            stamp = message.timestamp.strftime("%H:%M") if day == last_day else message.timestamp.strftime("%Y-%m-%d %H:%M")
+            last_day = day
+            media = f"[{message.media_type}] " if message.media_type else ""
+            content = (message.content or "").replace("\n", " ")
+            lines.append(f"{aliases.alias('message', message.id)} {stamp} {name_for(message)}: {media}{content}")
+            line_units.append(shown)
+            shown += 1
+
+    return _fit_to_budget(lines, max_tokens, "messages", shown, lambda index: line_units[index])
+
+
+def format_chats_compact(chats: List, max_tokens: Optional[int] = None, sender_name: Optional[Callable[[str], str]] = None) -> str:
+    """Render one line per chat: alias, name, last activity and a short last-message preview."""
+    if not chats:
+        return "No chats to display."
+
+    lines = []
+    for chat in chats:
+        line = f"{aliases.alias('chat', chat.jid)} {chat.name or chat.jid}"
+        if chat.is_group:
+            line += " (group)"
+        if chat.last_message_time:
+            line += f" | {chat.last_message_time:%Y-%m-%d %H:%M}"
+        if chat.last_message:
+            if chat.last_is_from_me:
+                who = "Me"
+            elif chat.last_sender and sender_name:
+                who = sender_name(chat.last_sender)
+            else:
+                who = chat.last_sender or "?"
+            preview = chat.last_message.replace("\n", " ")
+            if len(preview) > LAST_MESSAGE_PREVIEW_CHARS:
+                preview = preview[:LAST_MESSAGE_PREVIEW_CHARS - 1] + "…"
+            line += f" | {who}: {preview}"
+        lines.append(line)
+
+    return _fit_to_budget(lines, max_tokens, "chats", len(chats), lambda index: index)
@@ -0,0 +1,136 @@
+import json
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from compact import estimate_tokens
+
+# Prompt tokens the memory may spend per model, leaving room for tool schemas,
+# the model's own reasoning and the answer within the provider's limits
+MODEL_MEMORY_BUDGETS = {
+    "openai/gpt-oss-20b": 4000,
+    "llama-3.1-8b-instant": 3000,
+    "mixtral-8x7b-32768": 4000,
+    "gpt-4": 3000,
+    "gpt-3.5-turbo": 2000,
+    "gpt-4-turbo": 8000,
+}
+DEFAULT_MEMORY_BUDGET = 3000
+
+# Longest piece of a single turn or tool result carried in a summary or cache entry
+SUMMARY_CHARS = 160
+TOOL_RESULT_CHARS = 600
+
+
+def memory_budget(model_name: str) -> int:
+    return MODEL_MEMORY_BUDGETS.get(model_name, DEFAULT_MEMORY_BUDGET)
+
+
+def _squeeze(text: str, limit: int) -> str:
+    text = re.sub(r"\s+", " ", text or "").strip()
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def _first_sentence(text: str, limit: int) -> str:
+    text = re.sub(r"\s+", " ", text or "").strip()
+    match = re.match(r"(.+?[.!?])(\s|$)", text)
+    return _squeeze(match.group(1) if match else text, limit)
+
+
+@dataclass
+class Turn:
+    user: str
+    assistant: str
+
+
+def _summarize(turn: Turn) -> str:
+    return (f"- user: {_first_sentence(turn.user, SUMMARY_CHARS)} / "
+            f"assistant: {_first_sentence(turn.assistant, SUMMARY_CHARS)}")
+
+
+class ConversationMemory:
+    """Conversation context for the agent, fitted to a token budget.
+
+    The prompt for each turn is a system message with a running summary of older turns
+    and the most recent tool results, followed by the last `window` turns verbatim and
+    the new user message. When that exceeds the budget, the oldest verbatim turns are
+    folded into the summary first, then cached tool results are dropped oldest first,
+    and finally the summary itself is cut from the front.
+
+    Summaries are extractive (the first sentence of each side of a turn) so building a
+    prompt never costs an extra LLM round trip.
+    """
+
+    def __init__(self, budget: int = DEFAULT_MEMORY_BUDGET, window: int = 6, max_tool_results: int = 8,
+                 max_summary_lines: int = 40):
+        self.budget = budget
+        self.window = window
+        self.max_tool_results = max_tool_results
+        self.max_summary_lines = max_summary_lines
+        self.turns: List[Turn] = []
+        self.summary: List[str] = []
+        self.tool_results: "OrderedDict[str, str]" = OrderedDict()
+
+    def add_turn(self, user: str, assistant: str, tool_results: Optional[List[Tuple[str, Any, str]]] = None) -> None:
+        """Record a finished turn and the (tool, args, result) triples it produced."""
+        self.turns.append(Turn(user, assistant))
+        for tool, args, result in tool_results or []:
+            key = f"{tool}({json.dumps(args, sort_keys=True, default=str)})"
+            self.tool_results.pop(key, None)
+            self.tool_results[key] = _squeeze(result, TOOL_RESULT_CHARS)
+        while len(self.tool_results) > self.max_tool_results:
+            self.tool_results.popitem(last=False)
+        while len(self.turns) > self.window:
+            self._fold(self.turns.pop(0))
+
+    def _fold(self, turn: Turn) -> None:
+        self.summary.append(_summarize(turn))
+        del self.summary[:-self.max_summary_lines]
+
+    def _system_message(self, summary: List[str], tool_results: "OrderedDict[str, str]") -> Optional[Dict[str, str]]:
+        parts = []
+        if summary:
+            parts.append("Earlier in this conversation:\n" + "\n".join(summary))
+        if tool_results:
+            parts.append("Recent tool results (reuse instead of calling the tool again when still relevant):\n"
+                         + "\n".join(f"{key} -> {value}" for key, value in tool_results.items()))
+        if not parts:
+            return None
+        return {"role": "system", "content": "\n\n".join(parts)}
+
+    def build_messages(self, user_input: str) -> Tuple[List[Dict[str, str]], int]:
+        """Return (messages, estimated prompt tokens) for the next agent turn."""
+        turns = list(self.turns)
+        summary = list(self.summary)
+        tool_results = OrderedDict(self.tool_results)
+
+        def assemble():
+            messages = []
+            system = self._system_message(summary, tool_results)
+            if system:
+                messages.append(system)
+            for turn in turns:
+                messages.append({"role": "user", "content": turn.user})
+                messages.append({"role": "assistant", "content": turn.assistant})
+            messages.append({"role": "user", "content": user_input})
+            return messages, sum(estimate_tokens(m["content"]) for m in messages)
+
+        messages, tokens = assemble()
+        while tokens > self.budget:
+            if turns:
+                summary.append(_summarize(turns.pop(0)))
+            elif tool_results:
+                tool_results.popitem(last=False)
+            elif summary:
+                summary.pop(0)
+            else:
+                # Only the new user message is left; send it as is
+                break
+            messages, tokens = assemble()
+        return messages, tokens
+
+    def clear(self) -> None:
+        self.turns.clear()
+        self.summary.clear()
+        self.tool_results.clear()
@@ -0,0 +1,207 @@
+"""Local stand-in for the Go WhatsApp bridge REST API.
+
+Implements POST /api/send and POST /api/download with the same request and response
+shapes as whatsapp-bridge/main.go, plus configurable latency, error rate and media
+payloads, so the send/download paths can be exercised without a WhatsApp account.
+
+    python fake_bridge.py --port 8080 --latency-ms 40 --jitter-ms 20 --error-rate 0.02
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+MEDIA_EXTENSIONS = {"image": "jpg", "video": "mp4", "audio": "ogg", "document": "pdf"}
+
+
+@dataclass
+class FakeBridgeConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    media_type: str = "image"
+    media_size: int = 64 * 1024
+    media_dir: str = field(default_factory=lambda: tempfile.mkdtemp(prefix="fake-bridge-media-"))
+    seed: Optional[int] = None
+
+
+class FakeBridgeState:
+    """Config plus request counters shared by all handler threads."""
+
+    def __init__(self, config: FakeBridgeConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def delay(self) -> None:
+        with self.lock:
+            jitter = self.rng.uniform(-self.config.jitter_ms, self.config.jitter_ms)
+        delay = max(0.0, self.config.latency_ms + jitter) / 1000
+        if delay:
+            time.sleep(delay)
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            return self.rng.random() < self.config.error_rate
+
+    def write_media(self, message_id: str) -> str:
+        extension = MEDIA_EXTENSIONS.get(self.config.media_type, "bin")
+        path = os.path.join(self.config.media_dir, f"{message_id}.{extension}")
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(os.urandom(self.config.media_size))
+        return path
+
+
+class FakeBridgeHandler(BaseHTTPRequestHandler):
+    state: FakeBridgeState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status: int, text: str) -> None:
+        body = (text + "\n").encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Optional[dict]:
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            return json.loads(self.rfile.read(length) or b"null")
+        except (ValueError, json.JSONDecodeError):
+            return None
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with self.state.lock:
+                counts = dict(self.state.counts)
+            return self._send_json(200, counts)
+        self._send_text(405, "Method not allowed")
+
+    def do_POST(self):
+        if self.path == "/api/send":
+            return self._handle_send()
+        if self.path == "/api/download":
+            return self._handle_download()
+        self._send_text(404, "404 page not found")
+
+    def _handle_send(self):
+        state = self.state
+        req = self._read_json()
+        if not isinstance(req, dict):
+            state.count("send_bad_request")
+            return self._send_text(400, "Invalid request format")
+        if not req.get("recipient"):
+            state.count("send_bad_request")
+            return self._send_text(400, "Recipient is required")
+        if not req.get("message") and not req.get("media_path"):
+            state.count("send_bad_request")
+            return self._send_text(400, "Message or media path is required")
+
+        state.delay()
+        if state.should_fail():
+            state.count("send_error")
+            return self._send_json(500, {"success": False, "message": "Error sending message: injected failure"})
+
+        state.count("send_ok")
+        kind = "media" if req.get("media_path") else "message"
+        self._send_json(200, {"success": True, "message": f"Sent {kind} to {req['recipient']}"})
+
+    def _handle_download(self):
+        state = self.state
+        req = self._read_json()
+        if not isinstance(req, dict):
+            state.count("download_bad_request")
+            return self._send_text(400, "Invalid request format")
+        if not req.get("message_id") or not req.get("chat_jid"):
+            state.count("download_bad_request")
+            return self._send_text(400, "Message ID and Chat JID are required")
+
+        state.delay()
+        if state.should_fail():
+            state.count("download_error")
+            return self._send_json(500, {"success": False, "message": "Failed to download media: injected failure"})
+
+        path = state.write_media(req["message_id"])
+        state.count("download_ok")
+        self._send_json(200, {
+            "success": True,
+            "message": f"Successfully downloaded {state.config.media_type} media",
+            "filename": os.path.basename(path),
+            "path": path,
+        })
+
+
+def start_fake_bridge(config: Optional[FakeBridgeConfig] = None, host: str = "127.0.0.1", port: int = 0):
+    """Start the fake bridge in a daemon thread.
+
+    Returns:
+        A tuple of (server, api_base_url); call server.shutdown() to stop it
+    """
+    state = FakeBridgeState(config or FakeBridgeConfig())
+    handler = type("BoundFakeBridgeHandler", (FakeBridgeHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/api"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--media-type", choices=sorted(MEDIA_EXTENSIONS), default="image")
+    parser.add_argument("--media-size", type=int, default=64 * 1024, help="Size in bytes of downloaded media files")
+    parser.add_argument("--media-dir", default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = FakeBridgeConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        media_type=args.media_type,
+        media_size=args.media_size,
+        seed=args.seed,
+    )
+    if args.media_dir:
+        os.makedirs(args.media_dir, exist_ok=True)
+        config.media_dir = args.media_dir
+
+    server, url = start_fake_bridge(config, args.host, args.port)
+    print(f"Fake bridge listening on {url} (media in {config.media_dir})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Local OpenAI-compatible chat completions endpoint with configurable latency and errors.
+
+Serves POST /v1/chat/completions (plain and stream=true) so the model router and the
+chat assistant can be exercised without API keys. Point a ChatOpenAI at it with
+base_url=http://127.0.0.1:<port>/v1.
+
+    python fake_llm.py --port 9001 --latency-ms 300 --token-ms 5 --error-rate 0.05
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+@dataclass
+class FakeLLMConfig:
+    latency_ms: float = 0.0  # before the first token
+    jitter_ms: float = 0.0
+    token_ms: float = 0.0  # between streamed tokens
+    error_rate: float = 0.0
+    reply_words: int = 20
+    seed: Optional[int] = None
+
+
+class FakeLLMState:
+    def __init__(self, config: FakeLLMConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.counts: Dict[str, int] = {}
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def first_token_delay(self) -> float:
+        with self.lock:
+            jitter = self.rng.uniform(-self.config.jitter_ms, self.config.jitter_ms)
+        return max(0.0, self.config.latency_ms + jitter) / 1000
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            return self.rng.random() < self.config.error_rate
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    state: FakeLLMState = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with self.state.lock:
+                counts = dict(self.state.counts)
+            return self._send_json(200, counts)
+        self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            return self._send_json(404, {"error": {"message": "not found"}})
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            req = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            return self._send_json(400, {"error": {"message": "invalid JSON"}})
+
+        state = self.state
+        time.sleep(state.first_token_delay())
+        if state.should_fail():
+            state.count("error")
+            return self._send_json(503, {"error": {"message": "injected failure", "type": "server_error"}})
+
+        model = req.get("model", "fake")
+        messages = req.get("messages") or [{}]
+        prompt = " ".join(str(m.get("content", "")) for m in messages)
+        last = str(messages[-1].get("content", ""))[:40]
+        words = [f"({model})", "echo:"] + (last.split() or ["ok"])
+        words += ["lorem"] * max(0, state.config.reply_words - len(words))
+        usage = {
+            "prompt_tokens": max(1, len(prompt) // 4),
+            "completion_tokens": len(words),
+            "total_tokens": max(1, len(prompt) // 4) + len(words),
+        }
+        created = int(time.time())
+        completion_id = f"chatcmpl-fake-{created}-{threading.get_ident()}"
+
+        if not req.get("stream"):
+            state.count("ok")
+            return self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": " ".join(words)},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def event(delta, finish_reason=None, extra=None):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            chunk.update(extra or {})
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+
+        event({"role": "assistant", "content": ""})
+        for i, word in enumerate(words):
+            if i and state.config.token_ms:
+                time.sleep(state.config.token_ms / 1000)
+            event({"content": word if i == 0 else " " + word})
+        event({}, "stop", {"usage": usage} if (req.get("stream_options") or {}).get("include_usage") else None)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+        state.count("ok")
+
+
+def start_fake_llm(config: Optional[FakeLLMConfig] = None, host: str = "127.0.0.1", port: int = 0):
+    """Start a fake LLM endpoint in a daemon thread.
+
+    Returns:
+        A tuple of (server, base_url) where base_url ends in /v1
+    """
+    state = FakeLLMState(config or FakeLLMConfig())
+    handler = type("BoundFakeLLMHandler", (FakeLLMHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--token-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--reply-words", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = FakeLLMConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        token_ms=args.token_ms,
+        error_rate=args.error_rate,
+        reply_words=args.reply_words,
+        seed=args.seed,
+    )
+    server, url = start_fake_llm(config, args.host, args.port)
+    print(f"Fake LLM listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Open-loop load generator for the MCP tools in main.py.
+
+Calls are issued on a fixed schedule at the target QPS (independent of how fast earlier
+calls finish), so queueing shows up as latency instead of silently lowering the rate.
+By default the tools are driven in-process against a fake bridge started here; pass
+--url to drive a running SSE server instead.
+
+    python loadtest.py --qps 50 --duration 20 --latency-ms 30 --error-rate 0.05
+    python loadtest.py --url http://127.0.0.1:8000/sse --qps 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from fake_bridge import FakeBridgeConfig, start_fake_bridge
+
+DEFAULT_MIX = "send_message=6,download_media=3,send_file=1"
+
+
+@dataclass
+class LoadResult:
+    latencies: List[float] = field(default_factory=list)
+    errors: Counter = field(default_factory=Counter)
+    per_tool: Dict[str, List[float]] = field(default_factory=dict)
+    lag: List[float] = field(default_factory=list)
+    started: float = 0.0
+    finished: float = 0.0
+
+
+def parse_mix(mix: str) -> List[Tuple[str, float]]:
+    weights = []
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights.append((name.strip(), float(weight or 1)))
+    return weights
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def tool_arguments(tool: str, rng: random.Random, media_path: str) -> dict:
+    recipient = f"4917{rng.randrange(10**8):08d}"
+    if tool == "send_message":
+        return {"recipient": recipient, "message": "load test"}
+    if tool in ("send_file", "send_audio_message"):
+        return {"recipient": recipient, "media_path": media_path}
+    if tool == "download_media":
+        return {"message_id": f"3EB0{rng.getrandbits(64):016X}", "chat_jid": f"{recipient}@s.whatsapp.net"}
+    if tool in ("list_messages", "list_chats"):
+        return {"limit": 20}
+    raise ValueError(f"No argument generator for tool '{tool}'")
+
+
+def classify(payload: str, is_error: bool) -> Optional[str]:
+    """Map a tool result to an error category, or None on success."""
+    if is_error:
+        return "tool_exception"
+    try:
+        result = json.loads(payload)
+    except (TypeError, json.JSONDecodeError):
+        return None
+    if isinstance(result, dict) and result.get("success") is False:
+        message = str(result.get("message", ""))
+        if message.startswith("Request error"):
+            return "bridge_unreachable"
+        if "HTTP 5" in message:
+            return "bridge_5xx"
+        if "HTTP 4" in message:
+            return "bridge_4xx"
+        if message.startswith("Failed to download"):
+            # download_media collapses every bridge failure into one message
+            return "download_failed"
+        return "tool_failure"
+    return None
+
+
+class InProcessCaller:
+    """Calls tools through the FastMCP instance in main.py, without a transport."""
+
+    def __init__(self, api_base_url: str, db_path: str):
+        from accounts import configure_accounts
+        import main
+
+        configure_accounts({"load": {"db_path": db_path, "api_base_url": api_base_url}})
+        self.mcp = main.mcp
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def call(self, tool: str, arguments: dict) -> Tuple[str, bool]:
+        contents = await self.mcp.call_tool(tool, arguments)
+        return "".join(getattr(c, "text", "") for c in contents), False
+
+
+class SSECaller:
+    """Calls tools on a running shared server over the SSE transport."""
+
+    def __init__(self, url: str):
+        self.url = url
+
+    async def __aenter__(self):
+        from mcp import ClientSession
+        from mcp.client.sse import sse_client
+
+        self._transport = sse_client(self.url)
+        read, write = await self._transport.__aenter__()
+        self._session = ClientSession(read, write)
+        await self._session.__aenter__()
+        await self._session.initialize()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.__aexit__(*exc)
+        await self._transport.__aexit__(*exc)
+        return False
+
+    async def call(self, tool: str, arguments: dict) -> Tuple[str, bool]:
+        result = await self._session.call_tool(tool, arguments)
+        return "".join(getattr(c, "text", "") for c in result.content), bool(result.isError)
+
+
+async def run_load(caller, qps: float, duration: float, mix: List[Tuple[str, float]], max_in_flight: int,
+                   media_path: str, seed: int = 0) -> LoadResult:
+    rng = random.Random(seed)
+    tools = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    result = LoadResult()
+    in_flight = asyncio.Semaphore(max_in_flight)
+    total = int(qps * duration)
+    loop = asyncio.get_running_loop()
+
+    async def one(scheduled: float, tool: str, arguments: dict):
+        async with in_flight:
+            begin = loop.time()
+            result.lag.append(begin - scheduled)
+            try:
+                payload, is_error = await caller.call(tool, arguments)
+                category = classify(payload, is_error)
+            except Exception as e:
+                category = f"exception:{type(e).__name__}"
+            elapsed = loop.time() - begin
+            result.latencies.append(elapsed)
+            result.per_tool.setdefault(tool, []).append(elapsed)
+            if category:
+                result.errors[category] += 1
+
+    result.started = loop.time()
+    tasks = []
+    for i in range(total):
+        scheduled = result.started + i / qps
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tool = rng.choices(tools, weights)[0]
+        tasks.append(asyncio.create_task(one(scheduled, tool, tool_arguments(tool, rng, media_path))))
+    await asyncio.gather(*tasks)
+    result.finished = loop.time()
+    return result
+
+
+def report(result: LoadResult, target_qps: float) -> None:
+    calls = len(result.latencies)
+    wall = result.finished - result.started
+    errors = sum(result.errors.values())
+    print(f"calls={calls} wall={wall:.2f}s target_qps={target_qps:.1f} achieved_qps={calls / wall if wall else 0:.1f} "
+          f"errors={errors} ({100 * errors / calls if calls else 0:.1f}%)")
+    print(f"latency ms: p50={percentile(result.latencies, 0.5) * 1000:.1f} p90={percentile(result.latencies, 0.9) * 1000:.1f} "
+          f"p99={percentile(result.latencies, 0.99) * 1000:.1f} max={max(result.latencies, default=0) * 1000:.1f}")
+    print(f"start lag ms (scheduled vs actual): p50={percentile(result.lag, 0.5) * 1000:.1f} "
+          f"p99={percentile(result.lag, 0.99) * 1000:.1f}")
+    for tool, samples in sorted(result.per_tool.items()):
+        print(f"  {tool:<20} n={len(samples):<6} p50={percentile(samples, 0.5) * 1000:7.1f} ms "
+              f"p99={percentile(samples, 0.99) * 1000:7.1f} ms mean={statistics.mean(samples) * 1000:7.1f} ms")
+    for category, count in result.errors.most_common():
+        print(f"  error {category:<20} {count}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--qps", type=float, default=20.0)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load to generate")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Weighted tool mix (default {DEFAULT_MIX})")
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--url", default=None, help="SSE URL of a running server; default drives main.py in-process")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Fake bridge latency (in-process mode)")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--media-size", type=int, default=64 * 1024)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="whatsapp-loadtest-")
+    media_path = os.path.join(workdir, "upload.jpg")
+    with open(media_path, "wb") as f:
+        f.write(os.urandom(args.media_size))
+
+    server = None
+    if args.url:
+        caller = SSECaller(args.url)
+    else:
+        server, api_base_url = start_fake_bridge(FakeBridgeConfig(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            media_size=args.media_size,
+            media_dir=workdir,
+            seed=args.seed,
+        ))
+        caller = InProcessCaller(api_base_url, os.path.join(workdir, "messages.db"))
+
+    try:
+        async with caller:
+            result = await run_load(caller, args.qps, args.duration, parse_mix(args.mix), args.max_in_flight,
+                                    media_path, args.seed)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    report(result, args.qps)
+    if server is not None:
+        print(f"fake bridge counters: {server.state.counts}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
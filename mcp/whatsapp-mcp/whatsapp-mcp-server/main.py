@@ -1,4 +1,8 @@
+import argparse
+import functools
+import os
 from typing import List, Dict, Any, Optional
+import anyio
 from mcp.server.fastmcp import FastMCP
 from whatsapp import (
     search_contacts as whatsapp_search_contacts,
@@ -13,24 +17,46 @@ from whatsapp import (
     send_file as whatsapp_send_file,
     send_audio_message as whatsapp_audio_voice_message,
     download_media as whatsapp_download_media,
+    format_message_context as whatsapp_format_message_context,
+    format_chats_list as whatsapp_format_chats_list,
 )
+from accounts import use_account, fan_out, list_accounts as whatsapp_list_accounts
+from compact import resolve_alias
+from stats import chat_stats as whatsapp_chat_stats, refresh_rollups
 
 # Initialize FastMCP server
 mcp = FastMCP("whatsapp")
 
 
-@mcp.tool()
-def search_contacts(query: str):
+def tool():
+    """Register a blocking tool so it runs in a worker thread.
+
+    Tools hit SQLite and the bridge synchronously. Over the shared SSE transport many
+    sessions are served by one event loop, so running them inline would serialize
+    every client behind the slowest call.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await anyio.to_thread.run_sync(functools.partial(fn, *args, **kwargs))
+        return mcp.tool()(wrapper)
+    return decorator
+
+
+@tool()
+def search_contacts(query: str, account: Optional[str] = None):
     """Search WhatsApp contacts by name or phone number.
 
     Args:
         query: Search term to match against contact names or phone numbers
+        account: Optional account name from list_accounts (default: the server's default account)
     """
-    contacts = whatsapp_search_contacts(query)
-    return contacts
+    with use_account(account):
+        contacts = whatsapp_search_contacts(query)
+        return contacts
 
 
-@mcp.tool()
+@tool()
 def list_messages(
     after: Optional[str] = None,
     before: Optional[str] = None,
@@ -42,6 +68,9 @@ def list_messages(
     include_context: bool = True,
     context_before: int = 1,
     context_after: int = 1,
+    compact: bool = False,
+    max_tokens: Optional[int] = None,
+    account: Optional[str] = None,
 ):
     """Get WhatsApp messages matching specified criteria with optional context.
 
@@ -56,29 +85,39 @@ def list_messages(
         include_context: Whether to include messages before and after matches (default True)
         context_before: Number of messages to include before each match (default 1)
         context_after: Number of messages to include after each match (default 1)
+        compact: Group messages by chat and use short aliases (e.g. "c1", "m3") instead of full JIDs and IDs.
+                 Aliases can be passed to any tool in place of the JID or ID (default False)
+        max_tokens: Optional approximate token budget for the compact output; extra messages are omitted
+        account: Optional account name from list_accounts (default: the server's default account)
     """
-    messages = whatsapp_list_messages(
-        after=after,
-        before=before,
-        sender_phone_number=sender_phone_number,
-        chat_jid=chat_jid,
-        query=query,
-        limit=limit,
-        page=page,
-        include_context=include_context,
-        context_before=context_before,
-        context_after=context_after,
-    )
-    return messages
-
-
-@mcp.tool()
+    with use_account(account):
+        messages = whatsapp_list_messages(
+            after=after,
+            before=before,
+            sender_phone_number=sender_phone_number,
+            chat_jid=resolve_alias(chat_jid),
+            query=query,
+            limit=limit,
+            page=page,
+            include_context=include_context,
+            context_before=context_before,
+            context_after=context_after,
+            compact=compact,
+            max_tokens=max_tokens,
+        )
+        return messages
+
+
+@tool()
 def list_chats(
     query: Optional[str] = None,
     limit: int = 20,
     page: int = 0,
     include_last_message: bool = True,
     sort_by: str = "last_active",
+    compact: bool = False,
+    max_tokens: Optional[int] = None,
+    account: Optional[str] = None,
 ):
     """Get WhatsApp chats matching specified criteria.
 
@@ -88,158 +127,297 @@ def list_chats(
         page: Page number for pagination (default 0)
         include_last_message: Whether to include the last message in each chat (default True)
         sort_by: Field to sort results by, either "last_active" or "name" (default "last_active")
+        compact: Return one short line per chat with a chat alias (e.g. "c1") instead of full records (default False)
+        max_tokens: Optional approximate token budget for the compact output; extra chats are omitted
+        account: Optional account name from list_accounts (default: the server's default account)
     """
-    chats = whatsapp_list_chats(
-        query=query,
-        limit=limit,
-        page=page,
-        include_last_message=include_last_message,
-        sort_by=sort_by,
-    )
-    return chats
-
-
-@mcp.tool()
-def get_chat(chat_jid: str, include_last_message: bool = True):
+    with use_account(account):
+        chats = whatsapp_list_chats(
+            query=query,
+            limit=limit,
+            page=page,
+            include_last_message=include_last_message,
+            sort_by=sort_by,
+        )
+        if compact:
+            return whatsapp_format_chats_list(chats, max_tokens)
+        return chats
+
+
+@tool()
+def get_chat(chat_jid: str, include_last_message: bool = True, account: Optional[str] = None):
     """Get WhatsApp chat metadata by JID.
 
     Args:
         chat_jid: The JID of the chat to retrieve
         include_last_message: Whether to include the last message (default True)
+        account: Optional account name from list_accounts (default: the server's default account)
     """
-    chat = whatsapp_get_chat(chat_jid, include_last_message)
-    return chat
+    with use_account(account):
+        chat = whatsapp_get_chat(resolve_alias(chat_jid), include_last_message)
+        return chat
 
 
-@mcp.tool()
-def get_direct_chat_by_contact(sender_phone_number: str):
+@tool()
+def get_direct_chat_by_contact(sender_phone_number: str, account: Optional[str] = None):
     """Get WhatsApp chat metadata by sender phone number.
 
     Args:
         sender_phone_number: The phone number to search for
+        account: Optional account name from list_accounts (default: the server's default account)
     """
-    chat = whatsapp_get_direct_chat_by_contact(sender_phone_number)
-    return chat
+    with use_account(account):
+        chat = whatsapp_get_direct_chat_by_contact(sender_phone_number)
+        return chat
 
 
-@mcp.tool()
-def get_contact_chats(jid: str, limit: int = 20, page: int = 0):
+@tool()
+def get_contact_chats(jid: str, limit: int = 20, page: int = 0, account: Optional[str] = None):
     """Get all WhatsApp chats involving the contact.
 
     Args:
         jid: The contact's JID to search for
         limit: Maximum number of chats to return (default 20)
         page: Page number for pagination (default 0)
+        account: Optional account name from list_accounts (default: the server's default account)
     """
-    chats = whatsapp_get_contact_chats(jid, limit, page)
-    return chats
+    with use_account(account):
+        chats = whatsapp_get_contact_chats(resolve_alias(jid), limit, page)
+        return chats
 
 
-@mcp.tool()
-def get_last_interaction(jid: str) -> str:
+@tool()
+def get_last_interaction(jid: str, account: Optional[str] = None) -> str:
     """Get most recent WhatsApp message involving the contact.
 
     Args:
         jid: The JID of the contact to search for
+        account: Optional account name from list_accounts (default: the server's default account)
     """
-    message = whatsapp_get_last_interaction(jid)
-    return message
-
-
-@mcp.tool()
-def get_message_context(message_id: str, before: int = 5, after: int = 5):
+    with use_account(account):
+        message = whatsapp_get_last_interaction(resolve_alias(jid))
+        return message
+
+
+@tool()
+def get_message_context(
+    message_id: str,
+    before: int = 5,
+    after: int = 5,
+    compact: bool = False,
+    max_tokens: Optional[int] = None,
+    account: Optional[str] = None,
+):
     """Get context around a specific WhatsApp message.
 
     Args:
         message_id: The ID of the message to get context for
         before: Number of messages to include before the target message (default 5)
         after: Number of messages to include after the target message (default 5)
+        compact: Return the context as compact chat-grouped text with short aliases (default False)
+        max_tokens: Optional approximate token budget for the compact output
+        account: Optional account name from list_accounts (default: the server's default account)
     """
-    context = whatsapp_get_message_context(message_id, before, after)
-    return context
+    with use_account(account):
+        context = whatsapp_get_message_context(resolve_alias(message_id), before, after)
+        if compact:
+            return whatsapp_format_message_context(context, max_tokens)
+        return context
 
 
-@mcp.tool()
-def send_message(recipient: str, message: str):
+@tool()
+def send_message(recipient: str, message: str, account: Optional[str] = None):
     """Send a WhatsApp message to a person or group. For group chats use the JID.
 
     Args:
         recipient: The recipient - either a phone number with country code but no + or other symbols,
                  or a JID (e.g., "123456789@s.whatsapp.net" or a group JID like "123456789@g.us")
         message: The message text to send
+        account: Optional account name from list_accounts (default: the server's default account)
 
     Returns:
         A dictionary containing success status and a status message
     """
-    # Validate input
-    if not recipient:
-        return {"success": False, "message": "Recipient must be provided"}
+    with use_account(account):
+        # Validate input
+        if not recipient:
+            return {"success": False, "message": "Recipient must be provided"}
 
-    # Call the whatsapp_send_message function with the unified recipient parameter
-    success, status_message = whatsapp_send_message(recipient, message)
-    return {"success": success, "message": status_message}
+        # Call the whatsapp_send_message function with the unified recipient parameter
+        success, status_message = whatsapp_send_message(resolve_alias(recipient), message)
+        return {"success": success, "message": status_message}
 
 
-@mcp.tool()
-def send_file(recipient: str, media_path: str):
+@tool()
+def send_file(recipient: str, media_path: str, account: Optional[str] = None):
     """Send a file such as a picture, raw audio, video or document via WhatsApp to the specified recipient. For group messages use the JID.
 
     Args:
         recipient: The recipient - either a phone number with country code but no + or other symbols,
                  or a JID (e.g., "123456789@s.whatsapp.net" or a group JID like "123456789@g.us")
         media_path: The absolute path to the media file to send (image, video, document)
+        account: Optional account name from list_accounts (default: the server's default account)
 
     Returns:
         A dictionary containing success status and a status message
     """
+    with use_account(account):
 
-    # Call the whatsapp_send_file function
-    success, status_message = whatsapp_send_file(recipient, media_path)
-    return {"success": success, "message": status_message}
+        # Call the whatsapp_send_file function
+        success, status_message = whatsapp_send_file(resolve_alias(recipient), media_path)
+        return {"success": success, "message": status_message}
 
 
-@mcp.tool()
-def send_audio_message(recipient: str, media_path: str):
+@tool()
+def send_audio_message(recipient: str, media_path: str, account: Optional[str] = None):
     """Send any audio file as a WhatsApp audio message to the specified recipient. For group messages use the JID. If it errors due to ffmpeg not being installed, use send_file instead.
 
     Args:
         recipient: The recipient - either a phone number with country code but no + or other symbols,
                  or a JID (e.g., "123456789@s.whatsapp.net" or a group JID like "123456789@g.us")
         media_path: The absolute path to the audio file to send (will be converted to Opus .ogg if it's not a .ogg file)
+        account: Optional account name from list_accounts (default: the server's default account)
 
     Returns:
         A dictionary containing success status and a status message
     """
-    success, status_message = whatsapp_audio_voice_message(recipient, media_path)
-    return {"success": success, "message": status_message}
+    with use_account(account):
+        success, status_message = whatsapp_audio_voice_message(resolve_alias(recipient), media_path)
+        return {"success": success, "message": status_message}
 
 
-@mcp.tool()
-def download_media(message_id: str, chat_jid: str):
+@tool()
+def download_media(message_id: str, chat_jid: str, account: Optional[str] = None):
     """Download media from a WhatsApp message and get the local file path.
 
     Args:
         message_id: The ID of the message containing the media
         chat_jid: The JID of the chat containing the message
+        account: Optional account name from list_accounts (default: the server's default account)
 
     Returns:
         A dictionary containing success status, a status message, and the file path if successful
     """
-    file_path = whatsapp_download_media(message_id, chat_jid)
+    with use_account(account):
+        file_path = whatsapp_download_media(resolve_alias(message_id), resolve_alias(chat_jid))
+
+        if file_path:
+            return {
+                "success": True,
+                "message": "Media downloaded successfully",
+                "file_path": file_path,
+            }
+        else:
+            return {"success": False, "message": "Failed to download media"}
+
+
+@tool()
+def chat_stats(
+    group_by: str = "chat",
+    chat_jid: Optional[str] = None,
+    sender: Optional[str] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: int = 20,
+    account: Optional[str] = None,
+):
+    """Get pre-aggregated WhatsApp activity stats (message counts, media counts and average response times).
+    Use this instead of listing and counting messages for questions like "who messages me most" or "messages per day".
+
+    Args:
+        group_by: How to group the counts: "chat", "sender", "day" or "media_type" (default "chat")
+        chat_jid: Optional chat JID to restrict the stats to a single chat
+        sender: Optional sender phone number or JID to restrict the stats to
+        after: Optional ISO-8601 date, only count days on or after this date
+        before: Optional ISO-8601 date, only count days before this date
+        limit: Maximum number of rows to return (default 20)
+        account: Optional account name from list_accounts (default: the server's default account)
+    """
+    with use_account(account):
+        stats = whatsapp_chat_stats(
+            group_by=group_by,
+            chat_jid=resolve_alias(chat_jid),
+            sender=sender,
+            after=after,
+            before=before,
+            limit=limit,
+        )
+        return stats
+
+
+@tool()
+def list_accounts():
+    """List the WhatsApp accounts (bridge stores) this server can access.
 
-    if file_path:
-        return {
-            "success": True,
-            "message": "Media downloaded successfully",
-            "file_path": file_path,
-        }
-    else:
-        return {"success": False, "message": "Failed to download media"}
+    Returns:
+        The account names that can be passed as the `account` argument of the other tools
+    """
+    return whatsapp_list_accounts()
+
+
+@tool()
+def search_all_accounts(
+    query: str,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: int = 20,
+    compact: bool = True,
+    max_tokens: Optional[int] = None,
+    accounts: Optional[List[str]] = None,
+):
+    """Search WhatsApp messages across several accounts at once. Accounts are queried in parallel.
+
+    Args:
+        query: Search term to filter messages by content
+        after: Optional ISO-8601 formatted string to only return messages after this date
+        before: Optional ISO-8601 formatted string to only return messages before this date
+        limit: Maximum number of messages to return per account (default 20)
+        compact: Use the compact, chat-grouped output with short aliases (default True)
+        max_tokens: Optional approximate token budget per account for the compact output
+        accounts: Optional list of account names to search (default: all accounts)
+
+    Returns:
+        A dictionary mapping each account name to its matching messages
+    """
+    return fan_out(
+        whatsapp_list_messages,
+        accounts=accounts,
+        after=after,
+        before=before,
+        query=query,
+        limit=limit,
+        include_context=False,
+        compact=compact,
+        max_tokens=max_tokens,
+    )
+
+
+def warm_up():
+    """Open a pooled connection and bring the stats rollups up to date for every account."""
+    for name in whatsapp_list_accounts():
+        with use_account(name) as account:
+            if not os.path.exists(account.db_path):
+                print(f"Skipping warm-up for account '{name}': {account.db_path} not found")
+                continue
+            account.connect().close()
+            refresh_rollups()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="WhatsApp MCP server")
+    parser.add_argument("--transport", choices=["stdio", "sse"], default=os.getenv("WHATSAPP_MCP_TRANSPORT", "stdio"),
+                        help="stdio for one spawned client, sse for a long-lived server shared by many clients")
+    parser.add_argument("--host", default=os.getenv("WHATSAPP_MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("WHATSAPP_MCP_PORT", "8000")))
+    args = parser.parse_args()
+
+    if args.transport == "sse":
+        mcp.settings.host = args.host
+        mcp.settings.port = args.port
+        warm_up()
+
     # Initialize and run the server
-    mcp.run(transport="stdio")
+    mcp.run(transport=args.transport)
 
 
 
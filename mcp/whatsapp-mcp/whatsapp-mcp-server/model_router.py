@@ -0,0 +1,305 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+@dataclass
+class ModelSpec:
+    name: str
+    provider: str  # "groq" or "openai" (any OpenAI-compatible endpoint via base_url)
+    tier: int  # 1 = small/fast, 2 = standard, 3 = strongest
+    input_cost: float = 0.0  # USD per million prompt tokens
+    output_cost: float = 0.0  # USD per million completion tokens
+    base_url: Optional[str] = None
+
+
+# Rough list prices; edit ROUTER_MODELS to match your plan or add local endpoints
+DEFAULT_MODELS = [
+    ModelSpec("openai/gpt-oss-20b", "groq", 2, 0.10, 0.50),
+    ModelSpec("llama-3.1-8b-instant", "groq", 1, 0.05, 0.08),
+    ModelSpec("mixtral-8x7b-32768", "groq", 2, 0.24, 0.24),
+    ModelSpec("gpt-4", "openai", 3, 30.0, 60.0),
+    ModelSpec("gpt-3.5-turbo", "openai", 1, 0.50, 1.50),
+    ModelSpec("gpt-4-turbo", "openai", 3, 10.0, 30.0),
+]
+
+PROVIDER_KEYS = {"groq": "GROQ_API_KEY", "openai": "OPENAI_API_KEY"}
+
+
+def load_model_specs() -> List[ModelSpec]:
+    """Models from ROUTER_MODELS (a JSON list of ModelSpec fields), else DEFAULT_MODELS."""
+    raw = os.getenv("ROUTER_MODELS")
+    if not raw:
+        return list(DEFAULT_MODELS)
+    return [ModelSpec(**entry) for entry in json.loads(raw)]
+
+
+def make_chat_model(spec: ModelSpec, temperature: float = 0.0, max_retries: int = 0):
+    # Client-side retries default to off: the router falls back to the next model instead
+    # of hiding a failing provider behind backoff sleeps that count as latency
+    if spec.provider == "groq":
+        from langchain_groq import ChatGroq
+        return ChatGroq(model=spec.name, temperature=temperature, max_retries=max_retries)
+    from langchain_openai import ChatOpenAI
+    kwargs = {"model": spec.name, "temperature": temperature, "stream_usage": True, "max_retries": max_retries}
+    if spec.base_url:
+        kwargs["base_url"] = spec.base_url
+        kwargs["api_key"] = os.getenv(PROVIDER_KEYS["openai"]) or "local"
+    return ChatOpenAI(**kwargs)
+
+
+class ModelStats:
+    """Rolling per-model latency, outcome and cost, plus a simple circuit breaker."""
+
+    def __init__(self, window: int):
+        self.call_latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+
+    def median_latency(self) -> Optional[float]:
+        if not self.call_latencies:
+            return None
+        samples = sorted(self.call_latencies)
+        return samples[len(samples) // 2]
+
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return 1 - sum(self.outcomes) / len(self.outcomes)
+
+
+class _UsageRecorder(BaseCallbackHandler):
+    """Times every LLM call made inside one agent turn and collects its token usage.
+
+    `produced` turns true once a model call finished or a tool started, after which
+    the turn can no longer be replayed on another model without repeating its effects.
+    """
+
+    run_inline = True
+
+    def __init__(self, router: "ModelRouter", spec: ModelSpec):
+        self.router = router
+        self.spec = spec
+        self.produced = False
+        self._started: Dict[Any, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self.produced = True
+        started = self._started.pop(run_id, None)
+        usage = {}
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or usage
+        if not usage:
+            usage = (response.llm_output or {}).get("token_usage") or {}
+        self.router.record_call(
+            self.spec.name,
+            time.perf_counter() - started if started else None,
+            usage.get("input_tokens", usage.get("prompt_tokens", 0)),
+            usage.get("output_tokens", usage.get("completion_tokens", 0)),
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self.produced = True
+
+
+class ModelRouter:
+    """Picks the fastest healthy model that meets a quality tier.
+
+    Latency is the median of recent LLM calls (tool execution time is excluded) and is
+    ranked as expected time to a successful turn, median / (1 - error rate). A model is
+    taken out of rotation for `cooldown` seconds after `failures_to_open` consecutive
+    failed turns, or when more than `max_error_rate` of its recent turns failed; its
+    outcome window then starts over so it is judged afresh when it returns. Models that
+    have never been called sort first so every model gets measured once, and every
+    `explore_every`-th turn goes to the least-measured healthy model so a slow first
+    sample (cold connection, a provider hiccup) does not rule a model out for good.
+    """
+
+    def __init__(self, specs: Optional[List[ModelSpec]] = None, window: int = 50, max_error_rate: float = 0.5,
+                 min_outcomes: int = 10, failures_to_open: int = 3, cooldown: float = 30.0, explore_every: int = 10):
+        self.specs = {spec.name: spec for spec in (specs if specs is not None else load_model_specs())}
+        self.max_error_rate = max_error_rate
+        self.min_outcomes = min_outcomes
+        self.failures_to_open = failures_to_open
+        self.cooldown = cooldown
+        self.explore_every = explore_every
+        self._turns = 0
+        self._lock = threading.Lock()
+        self._stats = {name: ModelStats(window) for name in self.specs}
+
+    def configured(self) -> List[ModelSpec]:
+        """Models that can actually be called: a local base_url or the provider's API key is set."""
+        return [spec for spec in self.specs.values()
+                if spec.base_url or os.getenv(PROVIDER_KEYS.get(spec.provider, ""), "")]
+
+    @staticmethod
+    def _healthy(stats: ModelStats, now: float) -> bool:
+        return now >= stats.open_until
+
+    def candidates(self, min_tier: int = 1, preferred: Optional[str] = None) -> List[ModelSpec]:
+        """Models to try in order: healthy ones by latency, then unhealthy ones as a last resort."""
+        now = time.monotonic()
+        with self._lock:
+            eligible = [spec for spec in self.configured() if spec.tier >= min_tier]
+
+            def key(spec):
+                stats = self._stats[spec.name]
+                latency = stats.median_latency()
+                return (
+                    not self._healthy(stats, now),
+                    spec.name != preferred,
+                    latency is not None,
+                    (latency or 0.0) / max(0.05, 1 - stats.error_rate()),
+                )
+
+            ordered = sorted(eligible, key=key)
+            self._turns += 1
+            if self.explore_every and self._turns % self.explore_every == 0 and not preferred:
+                healthy = [spec for spec in ordered if self._healthy(self._stats[spec.name], now)]
+                if healthy:
+                    probe = min(healthy, key=lambda spec: len(self._stats[spec.name].call_latencies))
+                    ordered.remove(probe)
+                    ordered.insert(0, probe)
+            return ordered
+
+    def record_call(self, name: str, latency: Optional[float], input_tokens: int, output_tokens: int) -> None:
+        spec = self.specs[name]
+        with self._lock:
+            stats = self._stats[name]
+            stats.calls += 1
+            if latency is not None:
+                stats.call_latencies.append(latency)
+            stats.input_tokens += input_tokens or 0
+            stats.output_tokens += output_tokens or 0
+            stats.cost += ((input_tokens or 0) * spec.input_cost + (output_tokens or 0) * spec.output_cost) / 1e6
+
+    def record_outcome(self, name: str, ok: bool) -> None:
+        with self._lock:
+            stats = self._stats[name]
+            stats.outcomes.append(ok)
+            if ok:
+                stats.consecutive_failures = 0
+            else:
+                stats.consecutive_failures += 1
+                too_many = len(stats.outcomes) >= self.min_outcomes and stats.error_rate() > self.max_error_rate
+                if stats.consecutive_failures >= self.failures_to_open or too_many:
+                    stats.open_until = time.monotonic() + self.cooldown
+                    stats.consecutive_failures = 0
+                    stats.outcomes.clear()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        configured = {spec.name for spec in self.configured()}
+        with self._lock:
+            rows = []
+            for name, spec in self.specs.items():
+                stats = self._stats[name]
+                latency = stats.median_latency()
+                rows.append({
+                    "model": name,
+                    "tier": spec.tier,
+                    "configured": name in configured,
+                    "healthy": self._healthy(stats, now),
+                    "median_call_ms": None if latency is None else round(latency * 1000, 1),
+                    "error_rate": round(stats.error_rate(), 3),
+                    "llm_calls": stats.calls,
+                    "input_tokens": stats.input_tokens,
+                    "output_tokens": stats.output_tokens,
+                    "cost_usd": round(stats.cost, 6),
+                })
+            return rows
+
+
+class RoutedAgent:
+    """Drop-in for a compiled LangGraph agent that routes each turn through a ModelRouter.
+
+    One agent is built per model on first use. A turn goes to the first candidate; if it
+    fails before any model output or tool call it is retried on the next one. Later
+    failures are raised, since tools may already have acted (e.g. sent a message). Routing can be
+    steered per call with config={"configurable": {"min_tier": 2, "preferred": "..."}}.
+    """
+
+    def __init__(self, router: ModelRouter, build_agent: Callable[[ModelSpec], Any]):
+        self.router = router
+        self.build_agent = build_agent
+        self._agents: Dict[str, Any] = {}
+        self.last_model: Optional[str] = None
+
+    def _agent(self, spec: ModelSpec):
+        agent = self._agents.get(spec.name)
+        if agent is None:
+            agent = self._agents[spec.name] = self.build_agent(spec)
+        return agent
+
+    def _plan(self, config: Optional[Dict[str, Any]]) -> List[ModelSpec]:
+        options = (config or {}).get("configurable", {})
+        candidates = self.router.candidates(options.get("min_tier", 1), options.get("preferred"))
+        if not candidates:
+            raise RuntimeError("No configured model meets the requested quality tier")
+        return candidates
+
+    @staticmethod
+    def _with_callback(config: Optional[Dict[str, Any]], recorder: _UsageRecorder) -> Dict[str, Any]:
+        config = dict(config or {})
+        config["callbacks"] = list(config.get("callbacks") or []) + [recorder]
+        return config
+
+    async def ainvoke(self, payload: Dict[str, Any], config: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+        last_error = None
+        for spec in self._plan(config):
+            recorder = _UsageRecorder(self.router, spec)
+            try:
+                result = await self._agent(spec).ainvoke(payload, self._with_callback(config, recorder), **kwargs)
+            except Exception as e:
+                self.router.record_outcome(spec.name, False)
+                if recorder.produced:
+                    raise
+                last_error = e
+                print(f"Model {spec.name} failed, falling back: {e}")
+                continue
+            self.router.record_outcome(spec.name, True)
+            self.last_model = spec.name
+            return result
+        raise last_error
+
+    async def astream(self, payload: Dict[str, Any], config: Optional[Dict[str, Any]] = None, **kwargs) -> AsyncIterator:
+        last_error = None
+        for spec in self._plan(config):
+            recorder = _UsageRecorder(self.router, spec)
+            produced = failed = False
+            try:
+                async for item in self._agent(spec).astream(payload, self._with_callback(config, recorder), **kwargs):
+                    produced = True
+                    yield item
+            except Exception as e:
+                failed = True
+                if produced or recorder.produced:
+                    # Part of the answer already reached the caller, or tools ran; it cannot be replayed
+                    raise
+                last_error = e
+                print(f"Model {spec.name} failed, falling back: {e}")
+                continue
+            finally:
+                # Also runs when the consumer stops early (GeneratorExit), which is not the model's fault
+                self.router.record_outcome(spec.name, not failed)
+            self.last_model = spec.name
+            return
+        raise last_error
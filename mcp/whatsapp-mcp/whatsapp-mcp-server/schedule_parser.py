@@ -0,0 +1,214 @@
+import datetime
+import re
+from typing import Any, Dict, Optional, Tuple
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Time used when a day is given without a clock time ("remind me tomorrow to ...")
+DEFAULT_TIME = datetime.time(9, 0)
+TONIGHT_TIME = datetime.time(20, 0)
+
+UNIT_SECONDS = {"second": 1, "sec": 1, "minute": 60, "min": 60, "hour": 3600, "hr": 3600, "day": 86400, "week": 604800}
+WORD_NUMBERS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "ten": 10,
+                "fifteen": 15, "twenty": 20, "thirty": 30, "forty five": 45, "half an": 0.5}
+
+_DAY = r"(?:today|tonight|tomorrow|(?:on\s+|next\s+)?(?:" + "|".join(WEEKDAYS) + r"))"
+_CLOCK = r"(?:\d{1,2}(?::\d{2})?\s*(?:am|pm)|\d{1,2}:\d{2}|noon|midnight)"
+# After "at" a bare hour counts as a time too ("tomorrow at 9")
+_AT_CLOCK = r"at\s+(?:" + _CLOCK + r"|\d{1,2}\b)"
+_NUM = r"(?:\d+|" + "|".join(sorted((w.replace(" ", r"\s+") for w in WORD_NUMBERS), key=len, reverse=True)) + r")"
+_UNIT = r"(?:seconds?|secs?|minutes?|mins?|hours?|hrs?|days?|weeks?)"
+_RECURRING = (
+    r"(?:(?:every|each)\s+(?:\d+\s+" + _UNIT + r"|(?:second|minute|hour|day|week|weekday|" + "|".join(WEEKDAYS) + r"))"
+    r"|daily|hourly|weekdays)(?:\s+" + _AT_CLOCK + r")?"
+)
+_RELATIVE = r"in\s+" + _NUM + r"\s+" + _UNIT
+_ABSOLUTE = r"(?:" + _DAY + r"\s+)?(?:" + _AT_CLOCK + r"|" + _CLOCK + r")(?:\s+" + _DAY + r")?"
+_WHEN = r"(?:" + _RECURRING + r"|" + _RELATIVE + r"|" + _ABSOLUTE + r"|" + _DAY + r")"
+# A command that starts with its time needs a clock time, so "tomorrow is busy" is just chat
+_LEADING_WHEN = r"(?:" + _RECURRING + r"|" + _RELATIVE + r"|" + _ABSOLUTE + r")"
+
+# First words a scheduling command can start with; anything else skips the regex entirely
+LEADING_WORDS = frozenset(
+    ["send", "remind", "schedule", "every", "each", "daily", "hourly", "weekdays", "in", "at",
+     "today", "tonight", "tomorrow", "on", "next", "noon", "midnight"] + WEEKDAYS
+)
+
+# Every scheduling phrasing in one alternation, compiled once at import. The first
+# alternative that matches wins, so the more specific phrasings come first.
+SCHEDULE_MATCHER = re.compile(
+    r"^\s*(?:"
+    r"send\s+(?:a\s+)?(?:message|msg)\s+to\s+(?P<send_to>[\w+@.\-]+)\s+(?P<send_when>" + _WHEN + r")"
+    r"\s*(?:saying\s+|:\s*|-\s*)?(?P<send_body>.*?)"
+    r"|remind\s+me\s+(?P<remind_when>" + _WHEN + r")\s+(?:to\s+|about\s+|that\s+)?(?P<remind_what>.+?)"
+    r"|remind\s+me\s+(?:to\s+|about\s+)(?P<remind2_what>.+?)\s+(?P<remind2_when>" + _WHEN + r")"
+    r"|schedule\s+(?P<schedule_what>.+?)\s+(?:for\s+)?(?P<schedule_when>" + _WHEN + r")"
+    r"|(?P<at_when>" + _LEADING_WHEN + r")\s*,?\s+(?P<at_what>.+?)"
+    r")\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+
+_RELATIVE_PARTS = re.compile(r"^in\s+(?P<n>" + _NUM + r")\s+(?P<unit>" + _UNIT + r")$", re.IGNORECASE)
+_RECURRING_PARTS = re.compile(
+    r"^(?:(?:every|each)\s+(?:(?P<n>\d+)\s+)?(?P<unit>[a-z]+?)s?|(?P<word>daily|hourly|weekdays))"
+    r"(?:\s+at\s+(?P<clock>" + _CLOCK + r"|\d{1,2}))?$",
+    re.IGNORECASE
+)
+_ABSOLUTE_PARTS = re.compile(
+    r"^(?:(?P<day>" + _DAY + r")(?:\s+|$))?(?:at\s+)?(?P<clock>" + _CLOCK + r"|\d{1,2})?(?:\s+(?P<day_after>" + _DAY + r"))?$",
+    re.IGNORECASE
+)
+# Task text that is only a time ("every monday" + "at 8am"): the time regex stopped one phrase early
+_CLOCK_ONLY = re.compile(r"^(?:at\s+(?P<at_clock>" + _CLOCK + r"|\d{1,2})|(?P<clock>" + _CLOCK + r"))$", re.IGNORECASE)
+_CLOCK_PARTS = re.compile(r"^(?P<hour>\d{1,2})(?::(?P<minute>\d{2}))?\s*(?P<period>am|pm)?$", re.IGNORECASE)
+_SPACES = re.compile(r"\s+")
+
+
+def _clock(text: Optional[str], default: datetime.time = DEFAULT_TIME) -> datetime.time:
+    if not text:
+        return default
+    text = text.lower()
+    if text == "noon":
+        return datetime.time(12, 0)
+    if text == "midnight":
+        return datetime.time(0, 0)
+    match = _CLOCK_PARTS.match(text)
+    hour, minute, period = int(match["hour"]), int(match["minute"] or 0), match["period"]
+    if period == "pm" and hour != 12:
+        hour += 12
+    elif period == "am" and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        raise ValueError(f"Invalid time: {text}")
+    return datetime.time(hour, minute)
+
+
+def _at(date: datetime.date, clock: datetime.time) -> datetime.datetime:
+    return datetime.datetime.combine(date, clock)
+
+
+def next_occurrence(recurrence: str, after: datetime.datetime) -> datetime.datetime:
+    """Next run strictly after `after` for a recurrence spec produced by parse_schedule.
+
+    Specs are "interval:<seconds>", "daily@HH:MM", "weekdays@HH:MM" and "weekly:<0-6>@HH:MM".
+    """
+    if recurrence.startswith("interval:"):
+        seconds = float(recurrence.split(":", 1)[1])
+        if seconds <= 0:
+            raise ValueError(f"Interval must be positive: {recurrence}")
+        return after + datetime.timedelta(seconds=seconds)
+    rule, clock = recurrence.split("@")
+    clock = datetime.time.fromisoformat(clock)
+    candidate = _at(after.date(), clock)
+    for _ in range(8):
+        if candidate > after and (
+            rule == "daily"
+            or (rule == "weekdays" and candidate.weekday() < 5)
+            or (rule.startswith("weekly:") and candidate.weekday() == int(rule.split(":")[1]))
+        ):
+            return candidate
+        candidate += datetime.timedelta(days=1)
+    raise ValueError(f"Unknown recurrence: {recurrence}")
+
+
+def parse_when(text: str, now: Optional[datetime.datetime] = None) -> Tuple[datetime.datetime, Optional[str]]:
+    """Turn a time expression into (first run time, recurrence spec or None)."""
+    now = now or datetime.datetime.now()
+    text = _SPACES.sub(" ", text.strip().lower())
+
+    match = _RELATIVE_PARTS.match(text)
+    if match:
+        n = match["n"]
+        amount = float(n) if n.isdigit() else WORD_NUMBERS[n]
+        return now + datetime.timedelta(seconds=amount * UNIT_SECONDS[match["unit"].rstrip("s")]), None
+
+    match = _RECURRING_PARTS.match(text)
+    if match:
+        unit = {"daily": "day", "hourly": "hour", "weekdays": "weekday"}.get(match["word"], match["unit"])
+        clock = _clock(match["clock"])
+        if match["n"] or unit in ("second", "sec", "minute", "min", "hour", "hr"):
+            if unit not in UNIT_SECONDS:
+                raise ValueError(f"Unrecognized interval: {text}")
+            seconds = int(match["n"] or 1) * UNIT_SECONDS[unit]
+            if seconds <= 0:
+                raise ValueError(f"Interval must be positive: {text}")
+            return now + datetime.timedelta(seconds=seconds), f"interval:{seconds}"
+        if unit == "day":
+            recurrence = f"daily@{clock:%H:%M}"
+        elif unit == "weekday":
+            recurrence = f"weekdays@{clock:%H:%M}"
+        elif unit == "week":
+            recurrence = f"weekly:{now.weekday()}@{clock:%H:%M}"
+        elif unit in WEEKDAYS:
+            recurrence = f"weekly:{WEEKDAYS.index(unit)}@{clock:%H:%M}"
+        else:
+            raise ValueError(f"Unrecognized recurrence: {text}")
+        return next_occurrence(recurrence, now), recurrence
+
+    match = _ABSOLUTE_PARTS.match(text)
+    if not match or not (match["day"] or match["clock"] or match["day_after"]):
+        raise ValueError(f"Unrecognized time: {text}")
+    day = (match["day"] or match["day_after"] or "").split(" ")[-1]
+    clock = _clock(match["clock"], TONIGHT_TIME if day == "tonight" else DEFAULT_TIME)
+    if day in ("", "today", "tonight"):
+        scheduled = _at(now.date(), clock)
+        # A time already past today means the next one, with or without an explicit "today"
+        if scheduled <= now:
+            scheduled += datetime.timedelta(days=1)
+    elif day == "tomorrow":
+        scheduled = _at(now.date() + datetime.timedelta(days=1), clock)
+    else:
+        scheduled = next_occurrence(f"weekly:{WEEKDAYS.index(day)}@{clock:%H:%M}", now)
+    return scheduled, None
+
+
+def _clock_into_when(when: str, what: str) -> Tuple[str, str]:
+    match = _CLOCK_ONLY.match(what)
+    if not match:
+        return when, what
+    return f"{when} at {match['at_clock'] or match['clock']}", ""
+
+
+def parse_schedule(message: str, now: Optional[datetime.datetime] = None) -> Dict[str, Any]:
+    """Recognize a scheduling command and resolve its time without calling the LLM.
+
+    Returns {"is_scheduled": False} for anything else, otherwise the task text for the
+    agent, its first scheduled_time, a recurrence spec (or None) and the intent type.
+    """
+    words = message.split(None, 1)
+    if not words:
+        return {"is_scheduled": False}
+    first = words[0].lower()
+    if first not in LEADING_WORDS and not first[0].isdigit():
+        return {"is_scheduled": False}
+    match = SCHEDULE_MATCHER.match(message)
+    if not match:
+        return {"is_scheduled": False}
+    groups = match.groupdict()
+
+    if groups["send_when"]:
+        when = groups["send_when"]
+        body = groups["send_body"].strip() or message.strip()
+        task, kind = f"send message to {groups['send_to']}: {body}", "message"
+    elif groups["remind_when"] or groups["remind2_when"]:
+        when = groups["remind_when"] or groups["remind2_when"]
+        what = (groups["remind_what"] or groups["remind2_what"]).strip()
+        when, what = _clock_into_when(when, what)
+        task, kind = f"reminder: {what or message.strip()}", "reminder"
+    elif groups["schedule_when"]:
+        when, task, kind = groups["schedule_when"], groups["schedule_what"].strip(), "task"
+    else:
+        when, task = _clock_into_when(groups["at_when"], groups["at_what"].strip())
+        task, kind = task or message.strip(), "task"
+
+    try:
+        scheduled_time, recurrence = parse_when(when, now)
+    except ValueError:
+        return {"is_scheduled": False}
+    return {
+        "is_scheduled": True,
+        "task": task,
+        "scheduled_time": scheduled_time,
+        "recurrence": recurrence,
+        "type": kind,
+    }
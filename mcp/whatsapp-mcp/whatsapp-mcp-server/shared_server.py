@@ -0,0 +1,76 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SSE_URL = os.getenv("WHATSAPP_MCP_URL", "http://127.0.0.1:8000/sse")
+
+# How long to wait for a freshly spawned server to accept connections, in seconds
+SPAWN_TIMEOUT = 30.0
+
+
+def is_server_up(url: str = DEFAULT_SSE_URL, timeout: float = 0.5) -> bool:
+    """Check whether something is listening on the host/port of the SSE URL."""
+    parsed = urlparse(url)
+    try:
+        with socket.create_connection((parsed.hostname, parsed.port or 80), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def spawn_server(url: str = DEFAULT_SSE_URL, log_path: Optional[str] = None) -> subprocess.Popen:
+    """Start main.py with the SSE transport in the background and wait until it listens.
+
+    The server is started in its own session so it outlives the client that spawned it
+    and keeps serving (with warm pools and caches) to later clients.
+    """
+    parsed = urlparse(url)
+    log = open(log_path, "ab") if log_path else subprocess.DEVNULL
+    try:
+        process = subprocess.Popen(
+            [sys.executable, "main.py", "--transport", "sse", "--host", parsed.hostname, "--port", str(parsed.port or 80)],
+            cwd=SERVER_DIR,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+    finally:
+        # The child has its own copy of the descriptor
+        if log_path:
+            log.close()
+
+    deadline = time.monotonic() + SPAWN_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"WhatsApp MCP server exited with code {process.returncode} during startup")
+        if is_server_up(url):
+            return process
+        time.sleep(0.1)
+
+    process.terminate()
+    raise TimeoutError(f"WhatsApp MCP server did not start listening on {url} within {SPAWN_TIMEOUT}s")
+
+
+def server_config(mode: str = "connect_or_spawn", url: str = DEFAULT_SSE_URL) -> Dict[str, Any]:
+    """Build the MultiServerMCPClient entry for the WhatsApp server.
+
+    Args:
+        mode: "stdio" spawns a private server per client (the old behaviour),
+              "connect" requires a running shared server at url, and
+              "connect_or_spawn" uses the shared server, starting it first if nobody is listening
+        url: SSE endpoint of the shared server
+    """
+    if mode == "stdio":
+        return {"command": sys.executable, "args": [os.path.join(SERVER_DIR, "main.py")], "transport": "stdio"}
+
+    if not is_server_up(url):
+        if mode == "connect":
+            raise ConnectionError(f"No WhatsApp MCP server is listening on {url}")
+        spawn_server(url, log_path=os.path.join(SERVER_DIR, "mcp-server.log"))
+
+    return {"url": url, "transport": "sse"}
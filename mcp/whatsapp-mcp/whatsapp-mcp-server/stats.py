@@ -0,0 +1,401 @@
+import sqlite3
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional, List, Dict, Any
+import os.path
+
+from accounts import get_account
+from whatsapp import get_sender_name
+
+# Rollups live in their own database next to each account's messages.db so the bridge-owned schema is never touched
+STATS_DB_NAME = 'stats.db'
+
+# Maximum number of new message rows folded into the rollups per transaction
+REFRESH_BATCH_SIZE = 5000
+
+# Message rows behind the watermark whose ids are still kept for de-duplication. The bridge
+# rewrites a message (new rowid) when it is re-delivered, which happens shortly after the original
+SEEN_MESSAGES_WINDOW = 100_000
+
+# Gaps longer than this are treated as a new conversation rather than a slow reply
+MAX_RESPONSE_GAP_SECONDS = 24 * 60 * 60
+
+STATS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS rollup_state (
+        key TEXT PRIMARY KEY,
+        value INTEGER
+    );
+
+    CREATE TABLE IF NOT EXISTS seen_messages (
+        id TEXT,
+        chat_jid TEXT,
+        src_rowid INTEGER,
+        PRIMARY KEY (id, chat_jid)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS chat_daily (
+        chat_jid TEXT,
+        day TEXT,
+        total INTEGER DEFAULT 0,
+        from_me INTEGER DEFAULT 0,
+        media INTEGER DEFAULT 0,
+        PRIMARY KEY (chat_jid, day)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS sender_daily (
+        chat_jid TEXT,
+        sender TEXT,
+        day TEXT,
+        is_from_me INTEGER,
+        total INTEGER DEFAULT 0,
+        media INTEGER DEFAULT 0,
+        PRIMARY KEY (chat_jid, sender, day)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS media_daily (
+        chat_jid TEXT,
+        day TEXT,
+        media_type TEXT,
+        total INTEGER DEFAULT 0,
+        PRIMARY KEY (chat_jid, day, media_type)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS response_daily (
+        chat_jid TEXT,
+        day TEXT,
+        responder TEXT,
+        replies INTEGER DEFAULT 0,
+        total_seconds REAL DEFAULT 0,
+        PRIMARY KEY (chat_jid, day, responder)
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS chat_cursor (
+        chat_jid TEXT PRIMARY KEY,
+        last_timestamp TEXT,
+        last_is_from_me INTEGER
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_seen_messages_rowid ON seen_messages(src_rowid);
+    CREATE INDEX IF NOT EXISTS idx_chat_daily_day ON chat_daily(day);
+    CREATE INDEX IF NOT EXISTS idx_sender_daily_day ON sender_daily(day);
+"""
+
+
+def connect_stats() -> sqlite3.Connection:
+    """Open the current account's rollup database with its messages.db attached read-only as `src`."""
+    account = get_account()
+    stats_db_path = os.path.join(os.path.dirname(account.db_path), STATS_DB_NAME)
+    conn = sqlite3.connect(f"file:{stats_db_path}", uri=True)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(seen_messages)")]
+    if columns and "src_rowid" not in columns:
+        # Older databases kept every id forever; the table is only a recent de-duplication window
+        conn.execute("DROP TABLE seen_messages")
+    conn.executescript(STATS_SCHEMA)
+    conn.execute("ATTACH DATABASE ? AS src", (f"file:{account.db_path}?mode=ro",))
+    return conn
+
+
+def _day(timestamp: str) -> str:
+    # Bridge timestamps are stored as "YYYY-MM-DD HH:MM:SS[.fff]+HH:MM", bucket by the stored local date
+    return str(timestamp)[:10]
+
+
+def refresh_rollups(conn: Optional[sqlite3.Connection] = None) -> int:
+    """Fold messages written since the last refresh into the rollup tables.
+
+    New rows are found by rowid watermark, so each call only scans messages added since
+    the previous call. Rows rewritten by the bridge's INSERT OR REPLACE get a fresh rowid;
+    seen_messages de-duplicates them so a message is not counted twice. It only holds the
+    last SEEN_MESSAGES_WINDOW rows behind the watermark, so it does not grow with the history.
+
+    Returns:
+        The number of newly counted messages
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = connect_stats()
+    counted = 0
+    try:
+        cursor = conn.cursor()
+        while True:
+            row = cursor.execute("SELECT value FROM rollup_state WHERE key = 'last_rowid'").fetchone()
+            watermark = row[0] if row else 0
+
+            cursor.execute("""
+                SELECT rowid, id, chat_jid, sender, timestamp, is_from_me, media_type
+                FROM src.messages
+                WHERE rowid > ?
+                ORDER BY rowid
+                LIMIT ?
+            """, (watermark, REFRESH_BATCH_SIZE))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            counted += _apply_batch(cursor, rows)
+            cursor.execute(
+                "INSERT OR REPLACE INTO rollup_state (key, value) VALUES ('last_rowid', ?)",
+                (rows[-1][0],)
+            )
+            cursor.execute("DELETE FROM seen_messages WHERE src_rowid <= ?", (rows[-1][0] - SEEN_MESSAGES_WINDOW,))
+            conn.commit()
+
+            if len(rows) < REFRESH_BATCH_SIZE:
+                break
+        return counted
+    except sqlite3.Error as e:
+        print(f"Database error while refreshing rollups: {e}")
+        conn.rollback()
+        return counted
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def _apply_batch(cursor: sqlite3.Cursor, rows: List[tuple]) -> int:
+    chat_counts = defaultdict(lambda: [0, 0, 0])
+    sender_counts = defaultdict(lambda: [0, 0])
+    media_counts = defaultdict(int)
+    fresh = []
+
+    for rowid, msg_id, chat_jid, sender, timestamp, is_from_me, media_type in rows:
+        cursor.execute(
+            "INSERT OR IGNORE INTO seen_messages (id, chat_jid, src_rowid) VALUES (?, ?, ?)",
+            (msg_id, chat_jid, rowid)
+        )
+        if cursor.rowcount == 0:
+            cursor.execute("UPDATE seen_messages SET src_rowid = ? WHERE id = ? AND chat_jid = ?", (rowid, msg_id, chat_jid))
+            continue
+
+        day = _day(timestamp)
+        is_from_me = 1 if is_from_me else 0
+        has_media = 1 if media_type else 0
+
+        chat = chat_counts[(chat_jid, day)]
+        chat[0] += 1
+        chat[1] += is_from_me
+        chat[2] += has_media
+
+        sender_row = sender_counts[(chat_jid, sender, day, is_from_me)]
+        sender_row[0] += 1
+        sender_row[1] += has_media
+
+        if media_type:
+            media_counts[(chat_jid, day, media_type)] += 1
+
+        fresh.append((chat_jid, timestamp, is_from_me))
+
+    cursor.executemany("""
+        INSERT INTO chat_daily (chat_jid, day, total, from_me, media) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (chat_jid, day) DO UPDATE SET
+            total = total + excluded.total,
+            from_me = from_me + excluded.from_me,
+            media = media + excluded.media
+    """, [(k[0], k[1], *v) for k, v in chat_counts.items()])
+
+    cursor.executemany("""
+        INSERT INTO sender_daily (chat_jid, sender, day, is_from_me, total, media) VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (chat_jid, sender, day) DO UPDATE SET
+            total = total + excluded.total,
+            media = media + excluded.media
+    """, [(*k, *v) for k, v in sender_counts.items()])
+
+    cursor.executemany("""
+        INSERT INTO media_daily (chat_jid, day, media_type, total) VALUES (?, ?, ?, ?)
+        ON CONFLICT (chat_jid, day, media_type) DO UPDATE SET total = total + excluded.total
+    """, [(*k, v) for k, v in media_counts.items()])
+
+    _apply_response_times(cursor, fresh)
+    return len(fresh)
+
+
+def _apply_response_times(cursor: sqlite3.Cursor, fresh: List[tuple]) -> None:
+    """Accumulate reply latencies, i.e. the gap before the other side answers.
+
+    Replies are measured against a per-chat cursor holding the latest message seen so far.
+    Backfilled history older than that cursor still counts towards volume but is skipped
+    here, since its neighbours were already consumed out of order.
+    """
+    by_chat = defaultdict(list)
+    for chat_jid, timestamp, is_from_me in fresh:
+        try:
+            by_chat[chat_jid].append((datetime.fromisoformat(str(timestamp)), str(timestamp), is_from_me))
+        except ValueError:
+            continue
+
+    response_totals = defaultdict(lambda: [0, 0.0])
+    cursors = []
+    for chat_jid, messages in by_chat.items():
+        messages.sort(key=lambda m: m[0])
+        row = cursor.execute(
+            "SELECT last_timestamp, last_is_from_me FROM chat_cursor WHERE chat_jid = ?",
+            (chat_jid,)
+        ).fetchone()
+        last_dt = datetime.fromisoformat(row[0]) if row else None
+        last_from_me = row[1] if row else None
+        last_raw = row[0] if row else None
+
+        for dt, raw, is_from_me in messages:
+            if last_dt is not None and dt < last_dt:
+                continue
+            if last_dt is not None and is_from_me != last_from_me:
+                gap = (dt - last_dt).total_seconds()
+                if gap <= MAX_RESPONSE_GAP_SECONDS:
+                    responder = "me" if is_from_me else "them"
+                    totals = response_totals[(chat_jid, _day(raw), responder)]
+                    totals[0] += 1
+                    totals[1] += gap
+            last_dt, last_raw, last_from_me = dt, raw, is_from_me
+
+        cursors.append((chat_jid, last_raw, last_from_me))
+
+    cursor.executemany("""
+        INSERT INTO response_daily (chat_jid, day, responder, replies, total_seconds) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (chat_jid, day, responder) DO UPDATE SET
+            replies = replies + excluded.replies,
+            total_seconds = total_seconds + excluded.total_seconds
+    """, [(*k, *v) for k, v in response_totals.items()])
+
+    cursor.executemany(
+        "INSERT OR REPLACE INTO chat_cursor (chat_jid, last_timestamp, last_is_from_me) VALUES (?, ?, ?)",
+        cursors
+    )
+
+
+def chat_stats(
+    group_by: str = "chat",
+    chat_jid: Optional[str] = None,
+    sender: Optional[str] = None,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: int = 20
+) -> List[Dict[str, Any]]:
+    """Answer volume and activity questions from the rollup tables.
+
+    Args:
+        group_by: One of "chat", "sender", "day" or "media_type"
+        chat_jid: Optional chat JID to restrict the stats to
+        sender: Optional sender phone number or JID to restrict the stats to
+        after: Optional ISO-8601 date, only days on or after it are counted
+        before: Optional ISO-8601 date, only days strictly before it are counted
+        limit: Maximum number of rows to return (default 20)
+    """
+    if group_by not in ("chat", "sender", "day", "media_type"):
+        raise ValueError(f"Invalid group_by: {group_by}. Use 'chat', 'sender', 'day' or 'media_type'.")
+
+    where_clauses = []
+    params = []
+    if chat_jid:
+        where_clauses.append("chat_jid = ?")
+        params.append(chat_jid)
+    if after:
+        try:
+            where_clauses.append("day >= ?")
+            params.append(datetime.fromisoformat(after).date().isoformat())
+        except ValueError:
+            raise ValueError(f"Invalid date format for 'after': {after}. Please use ISO-8601 format.")
+    if before:
+        try:
+            where_clauses.append("day < ?")
+            params.append(datetime.fromisoformat(before).date().isoformat())
+        except ValueError:
+            raise ValueError(f"Invalid date format for 'before': {before}. Please use ISO-8601 format.")
+
+    try:
+        conn = connect_stats()
+        refresh_rollups(conn)
+        cursor = conn.cursor()
+
+        if group_by == "sender" or sender:
+            sender_clauses = list(where_clauses)
+            sender_params = list(params)
+            if sender:
+                # The bridge stores senders as bare phone numbers
+                sender_clauses.append("sender = ?")
+                sender_params.append(sender.split("@")[0])
+            where = ("WHERE " + " AND ".join(sender_clauses)) if sender_clauses else ""
+            key = {"chat": "chat_jid", "sender": "sender", "day": "day"}.get(group_by)
+            if key is None:
+                raise ValueError("group_by='media_type' cannot be combined with a sender filter")
+            cursor.execute(f"""
+                SELECT {key}, SUM(total), SUM(media), MAX(is_from_me)
+                FROM sender_daily
+                {where}
+                GROUP BY {key}
+                ORDER BY {"day DESC" if key == "day" else "SUM(total) DESC"}
+                LIMIT ?
+            """, (*sender_params, limit))
+            rows = cursor.fetchall()
+            result = []
+            for value, total, media, is_from_me in rows:
+                entry = {key: value, "messages": total, "media": media}
+                if key == "sender":
+                    entry["name"] = "Me" if is_from_me else get_sender_name(value)
+                result.append(entry)
+            return result
+
+        where = ("WHERE " + " AND ".join(where_clauses)) if where_clauses else ""
+
+        if group_by == "media_type":
+            cursor.execute(f"""
+                SELECT media_type, SUM(total)
+                FROM media_daily
+                {where}
+                GROUP BY media_type
+                ORDER BY SUM(total) DESC
+                LIMIT ?
+            """, (*params, limit))
+            return [{"media_type": row[0], "messages": row[1]} for row in cursor.fetchall()]
+
+        key = "chat_jid" if group_by == "chat" else "day"
+        cursor.execute(f"""
+            SELECT {key}, SUM(total), SUM(from_me), SUM(media)
+            FROM chat_daily
+            {where}
+            GROUP BY {key}
+            ORDER BY {"day DESC" if key == "day" else "SUM(total) DESC"}
+            LIMIT ?
+        """, (*params, limit))
+        rows = cursor.fetchall()
+
+        cursor.execute(f"""
+            SELECT {key}, responder, SUM(replies), SUM(total_seconds)
+            FROM response_daily
+            {where}
+            GROUP BY {key}, responder
+        """, tuple(params))
+        responses = defaultdict(dict)
+        for value, responder, replies, total_seconds in cursor.fetchall():
+            if replies:
+                responses[value][f"avg_response_seconds_{responder}"] = round(total_seconds / replies, 1)
+
+        names = {}
+        if key == "chat_jid" and rows:
+            placeholders = ",".join("?" for _ in rows)
+            cursor.execute(
+                f"SELECT jid, name FROM src.chats WHERE jid IN ({placeholders})",
+                tuple(row[0] for row in rows)
+            )
+            names = dict(cursor.fetchall())
+
+        result = []
+        for value, total, from_me, media in rows:
+            entry = {key: value}
+            if key == "chat_jid":
+                entry["name"] = names.get(value)
+            entry.update({
+                "messages": total,
+                "from_me": from_me,
+                "from_others": total - from_me,
+                "media": media,
+            })
+            entry.update(responses.get(value, {}))
+            result.append(entry)
+        return result
+
+    except sqlite3.Error as e:
+        print(f"Database error: {e}")
+        return []
+    finally:
+        if 'conn' in locals():
+            conn.close()
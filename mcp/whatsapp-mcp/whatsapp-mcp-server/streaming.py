@@ -0,0 +1,92 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+
+@dataclass
+class StreamEvent:
+    kind: str  # "token", "tool_start", "tool_end" or "final"
+    text: str = ""
+    tool: Optional[str] = None
+    args: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class TurnMetrics:
+    """Latency numbers for one streamed agent turn, in seconds from submission."""
+    started: float = field(default_factory=time.perf_counter)
+    first_token: Optional[float] = None
+    first_event: Optional[float] = None
+    total: Optional[float] = None
+    tokens: int = 0
+    tool_calls: int = 0
+    prompt_tokens: Optional[int] = None
+
+    def observe(self, event: StreamEvent) -> None:
+        now = time.perf_counter() - self.started
+        if self.first_event is None:
+            self.first_event = now
+        if event.kind == "token":
+            self.tokens += 1
+            if self.first_token is None:
+                self.first_token = now
+        elif event.kind == "tool_start":
+            self.tool_calls += 1
+
+    def finish(self) -> None:
+        self.total = time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict[str, Any]:
+        def ms(value):
+            return None if value is None else round(value * 1000, 1)
+        return {
+            "ttft_ms": ms(self.first_token),
+            "first_event_ms": ms(self.first_event),
+            "total_ms": ms(self.total),
+            "tokens": self.tokens,
+            "tool_calls": self.tool_calls,
+            "prompt_tokens": self.prompt_tokens,
+        }
+
+
+def _text(content) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return str(content or "")
+
+
+async def iter_agent_events(agent, payload: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> AsyncIterator[StreamEvent]:
+    """Translate a LangGraph agent stream into UI events.
+
+    Uses the "messages" stream mode for LLM tokens and the "updates" mode for tool-call
+    progress: an agent-node update carrying tool_calls means tools are about to run,
+    and a tools-node update carries their results.
+    """
+    answer: List[str] = []
+    last_ai_text = ""
+    async for mode, chunk in agent.astream(payload, config, stream_mode=["messages", "updates"]):
+        if mode == "messages":
+            message, metadata = chunk
+            if getattr(message, "type", None) not in ("AIMessageChunk", "ai"):
+                continue
+            text = _text(message.content)
+            if text:
+                answer.append(text)
+                yield StreamEvent("token", text)
+        elif mode == "updates":
+            for node, update in (chunk or {}).items():
+                for message in (update or {}).get("messages", []) if isinstance(update, dict) else []:
+                    tool_calls = getattr(message, "tool_calls", None)
+                    if tool_calls:
+                        # Tokens streamed so far were preamble to a tool call, not the answer
+                        answer.clear()
+                        for call in tool_calls:
+                            yield StreamEvent("tool_start", tool=call.get("name"), args=call.get("args"))
+                    elif getattr(message, "type", None) == "tool":
+                        yield StreamEvent("tool_end", text=_text(message.content), tool=getattr(message, "name", None))
+                    elif getattr(message, "type", None) == "ai":
+                        last_ai_text = _text(message.content)
+
+    yield StreamEvent("final", "".join(answer) or last_ai_text)
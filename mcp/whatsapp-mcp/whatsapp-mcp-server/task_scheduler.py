@@ -0,0 +1,434 @@
+import asyncio
+import datetime
+import heapq
+import itertools
+import os
+import random
+import sqlite3
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any
+
+from schedule_parser import next_occurrence
+
+SCHEDULER_DB_PATH = os.getenv(
+    "SCHEDULER_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "scheduled_tasks.db")
+)
+
+SCHEDULER_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS scheduled_tasks (
+        id TEXT PRIMARY KEY,
+        task TEXT NOT NULL,
+        scheduled_time TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        created_at TEXT NOT NULL,
+        result TEXT,
+        error TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        started_at TEXT,
+        finished_at TEXT,
+        recurrence TEXT
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_scheduled_tasks_status_time ON scheduled_tasks(status, scheduled_time);
+"""
+
+# Columns added after the first release of the table, applied with ALTER TABLE on older databases
+SCHEDULER_MIGRATIONS = {
+    "attempts": "INTEGER NOT NULL DEFAULT 0",
+    "started_at": "TEXT",
+    "finished_at": "TEXT",
+    "recurrence": "TEXT",
+}
+
+# Worker pool defaults; each can be overridden per TaskScheduler
+MAX_CONCURRENT_TASKS = int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "4"))
+TASK_TIMEOUT_SECONDS = float(os.getenv("SCHEDULER_TASK_TIMEOUT", "300"))
+MAX_ATTEMPTS = int(os.getenv("SCHEDULER_MAX_ATTEMPTS", "3"))
+RETRY_BACKOFF_SECONDS = 10.0
+MAX_RETRY_BACKOFF_SECONDS = 600.0
+
+
+@dataclass
+class ScheduledTask:
+    id: str
+    task: str
+    scheduled_time: datetime.datetime
+    status: str = "pending"
+    created_at: datetime.datetime = field(default_factory=datetime.datetime.now)
+    result: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+    recurrence: Optional[str] = None  # see schedule_parser.next_occurrence
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime.datetime]:
+    return datetime.datetime.fromisoformat(value) if value else None
+
+
+def _row_to_task(row) -> ScheduledTask:
+    return ScheduledTask(
+        id=row[0],
+        task=row[1],
+        scheduled_time=datetime.datetime.fromisoformat(row[2]),
+        status=row[3],
+        created_at=datetime.datetime.fromisoformat(row[4]),
+        result=row[5],
+        error=row[6],
+        attempts=row[7],
+        started_at=_parse_time(row[8]),
+        finished_at=_parse_time(row[9]),
+        recurrence=row[10],
+    )
+
+
+class SchedulerMetrics:
+    """Rolling queue-delay and run-time samples plus outcome counters.
+
+    Queue delay is the gap between a task's scheduled_time and the moment a worker
+    actually started it, i.e. how late the task fired.
+    """
+
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self.queue_delay = deque(maxlen=window)
+        self.run_time = deque(maxlen=window)
+        self.counts = {"completed": 0, "failed": 0, "retried": 0, "timed_out": 0}
+
+    def record_start(self, delay: float) -> None:
+        with self._lock:
+            self.queue_delay.append(delay)
+
+    def record_finish(self, outcome: str, elapsed: float) -> None:
+        with self._lock:
+            self.run_time.append(elapsed)
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+    def count(self, outcome: str) -> None:
+        with self._lock:
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+    @staticmethod
+    def _describe(samples) -> Dict[str, float]:
+        if not samples:
+            return {}
+        ordered = sorted(samples)
+        return {
+            "p50": round(statistics.median(ordered), 3),
+            "p95": round(ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))], 3),
+            "max": round(ordered[-1], 3),
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queue_delay_seconds": self._describe(self.queue_delay),
+                "run_time_seconds": self._describe(self.run_time),
+                **self.counts,
+            }
+
+
+class TaskScheduler:
+    """Persistent scheduler that wakes exactly when the next task is due.
+
+    Pending tasks are kept in a min-heap keyed by scheduled_time, so finding the next
+    due task is O(1) and adding one is O(log n) no matter how much history exists.
+    Every task is also written to SQLite; on startup the heap is rebuilt from the
+    pending rows, so scheduled tasks survive restarts. Completed and failed tasks
+    only live on disk and are listed through the (status, scheduled_time) index.
+
+    Due tasks run concurrently on an asyncio worker pool of max_concurrency slots, each
+    under task_timeout. Failures are re-queued with exponential backoff until
+    max_attempts is reached. A recurring task queues its next occurrence as a new task
+    once the current one has completed or finally failed.
+    """
+
+    COLUMNS = "id, task, scheduled_time, status, created_at, result, error, attempts, started_at, finished_at, recurrence"
+
+    def __init__(
+        self,
+        db_path: str = SCHEDULER_DB_PATH,
+        max_concurrency: int = MAX_CONCURRENT_TASKS,
+        task_timeout: float = TASK_TIMEOUT_SECONDS,
+        max_attempts: int = MAX_ATTEMPTS,
+        retry_backoff: float = RETRY_BACKOFF_SECONDS,
+        max_retry_backoff: float = MAX_RETRY_BACKOFF_SECONDS,
+    ):
+        self.db_path = db_path
+        self.max_concurrency = max_concurrency
+        self.task_timeout = task_timeout
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self.metrics = SchedulerMetrics()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(SCHEDULER_SCHEMA)
+        self._migrate()
+        self._lock = threading.RLock()
+        self._wakeup = threading.Condition(self._lock)
+        self._heap: List[tuple] = []
+        self._pending: Dict[str, ScheduledTask] = {}
+        self._sequence = itertools.count()
+        self.running = False
+        self.agent = None
+        self._load_pending()
+
+    def _migrate(self) -> None:
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(scheduled_tasks)")}
+        for column, definition in SCHEDULER_MIGRATIONS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE scheduled_tasks ADD COLUMN {column} {definition}")
+        self._conn.commit()
+
+    def _load_pending(self) -> None:
+        with self._lock:
+            # Tasks that were running when the process died never finished; run them again
+            self._conn.execute("UPDATE scheduled_tasks SET status = 'pending' WHERE status = 'running'")
+            self._conn.commit()
+            rows = self._conn.execute(
+                f"SELECT {self.COLUMNS} FROM scheduled_tasks WHERE status = 'pending' ORDER BY scheduled_time"
+            ).fetchall()
+            for row in rows:
+                task = _row_to_task(row)
+                self._pending[task.id] = task
+                self._heap.append((task.scheduled_time, next(self._sequence), task.id))
+            heapq.heapify(self._heap)
+
+    def add_task(self, task: ScheduledTask):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT INTO scheduled_tasks ({self.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (task.id, task.task, task.scheduled_time.isoformat(), task.status,
+                 task.created_at.isoformat(), task.result, task.error, task.attempts, None, None, task.recurrence)
+            )
+            self._conn.commit()
+            if task.status == "pending":
+                self._pending[task.id] = task
+                heapq.heappush(self._heap, (task.scheduled_time, next(self._sequence), task.id))
+                # The new task may be due before whatever the scheduler thread is sleeping on
+                self._wakeup.notify_all()
+
+    def cancel_task(self, task_id: str) -> bool:
+        with self._lock:
+            task = self._pending.pop(task_id, None)
+            if task is None:
+                return False
+            # The heap entry is left behind and skipped lazily when it surfaces
+            self._update(task, "cancelled")
+            self._wakeup.notify_all()
+            return True
+
+    def set_agent(self, agent) -> None:
+        with self._lock:
+            self.agent = agent
+            self._wakeup.notify_all()
+
+    def get_pending_tasks(self) -> List[ScheduledTask]:
+        with self._lock:
+            return sorted(self._pending.values(), key=lambda t: t.scheduled_time)
+
+    def get_tasks_by_status(self, status: str, limit: int = 100) -> List[ScheduledTask]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self.COLUMNS} FROM scheduled_tasks WHERE status = ? ORDER BY scheduled_time DESC LIMIT ?",
+                (status, limit)
+            ).fetchall()
+        return [_row_to_task(row) for row in rows]
+
+    def get_all_tasks(self, limit: int = 100) -> List[ScheduledTask]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self.COLUMNS} FROM scheduled_tasks ORDER BY scheduled_time DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [_row_to_task(row) for row in rows]
+
+    def next_due_time(self) -> Optional[datetime.datetime]:
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_stale(self) -> None:
+        while self._heap and self._heap[0][2] not in self._pending:
+            heapq.heappop(self._heap)
+
+    def pop_due(self, now: Optional[datetime.datetime] = None) -> List[ScheduledTask]:
+        """Remove and return every pending task whose scheduled_time has passed."""
+        now = now or datetime.datetime.now()
+        due = []
+        with self._lock:
+            self._drop_stale()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, task_id = heapq.heappop(self._heap)
+                task = self._pending.pop(task_id, None)
+                if task is not None:
+                    task.status = "running"
+                    due.append(task)
+                self._drop_stale()
+            for task in due:
+                self._update(task, "running", commit=False)
+            self._conn.commit()
+        return due
+
+    def wait_for_due(self, timeout: Optional[float] = None) -> List[ScheduledTask]:
+        """Block until at least one task is due (and an agent is set), then pop the due tasks.
+
+        Sleeps exactly until the earliest scheduled_time; add_task(), cancel_task() and
+        set_agent() wake it early so a newly added earlier task is not missed. Returns an
+        empty list if timeout expires or stop() is called first.
+        """
+        deadline = None if timeout is None else datetime.datetime.now() + datetime.timedelta(seconds=timeout)
+        with self._wakeup:
+            while self.running:
+                now = datetime.datetime.now()
+                next_due = self.next_due_time()
+                if self.agent is not None and next_due is not None and next_due <= now:
+                    return self.pop_due(now)
+
+                wake_at = next_due if self.agent is not None else None
+                if deadline is not None:
+                    if now >= deadline:
+                        return []
+                    wake_at = min(wake_at, deadline) if wake_at else deadline
+                self._wakeup.wait(None if wake_at is None else max(0.0, (wake_at - now).total_seconds()))
+        return []
+
+    def _update(self, task: ScheduledTask, status: str, commit: bool = True) -> None:
+        task.status = status
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE scheduled_tasks
+                SET status = ?, scheduled_time = ?, result = ?, error = ?, attempts = ?, started_at = ?, finished_at = ?
+                WHERE id = ?
+                """,
+                (status, task.scheduled_time.isoformat(), task.result, task.error, task.attempts,
+                 task.started_at.isoformat() if task.started_at else None,
+                 task.finished_at.isoformat() if task.finished_at else None,
+                 task.id)
+            )
+            if commit:
+                self._conn.commit()
+
+    def _retry_or_fail(self, task: ScheduledTask, error: str) -> None:
+        task.error = error
+        if task.attempts >= self.max_attempts:
+            self._update(task, "failed")
+            self.metrics.count("failed")
+            self._schedule_next(task)
+            return
+
+        backoff = min(self.max_retry_backoff, self.retry_backoff * 2 ** (task.attempts - 1))
+        backoff *= random.uniform(0.8, 1.2)
+        task.scheduled_time = datetime.datetime.now() + datetime.timedelta(seconds=backoff)
+        self.metrics.count("retried")
+        with self._lock:
+            self._update(task, "pending")
+            self._pending[task.id] = task
+            heapq.heappush(self._heap, (task.scheduled_time, next(self._sequence), task.id))
+            self._wakeup.notify_all()
+
+    def _schedule_next(self, task: ScheduledTask) -> None:
+        if not task.recurrence:
+            return
+        try:
+            next_time = next_occurrence(task.recurrence, max(task.scheduled_time, datetime.datetime.now()))
+        except ValueError as e:
+            print(f"Not rescheduling task {task.id}: {e}")
+            return
+        base_id = task.id.split("@", 1)[0]
+        self.add_task(ScheduledTask(
+            id=f"{base_id}@{next_time.strftime('%Y%m%d_%H%M%S')}",
+            task=task.task,
+            scheduled_time=next_time,
+            recurrence=task.recurrence,
+        ))
+
+    async def execute_task_async(self, task: ScheduledTask, agent):
+        """Run one task attempt under the timeout and record its queue delay and run time."""
+        task.attempts += 1
+        task.started_at = datetime.datetime.now()
+        self.metrics.record_start(max(0.0, (task.started_at - task.scheduled_time).total_seconds()))
+        self._update(task, "running")
+        start = time.perf_counter()
+        try:
+            # Execute the task using the agent
+            result = await asyncio.wait_for(agent.ainvoke({
+                "messages": [{"role": "user", "content": task.task}]
+            }), timeout=self.task_timeout)
+
+            # Extract response using helper function
+            task.result = extract_message_content(result)
+            task.error = None
+            task.finished_at = datetime.datetime.now()
+            self._update(task, "completed")
+            self.metrics.record_finish("completed", time.perf_counter() - start)
+            self._schedule_next(task)
+            return task.result
+
+        except asyncio.TimeoutError:
+            task.finished_at = datetime.datetime.now()
+            self.metrics.record_finish("timed_out", time.perf_counter() - start)
+            self._retry_or_fail(task, f"timed out after {self.task_timeout:.0f}s")
+            return None
+        except Exception as e:
+            task.finished_at = datetime.datetime.now()
+            self.metrics.record_finish("errored", time.perf_counter() - start)
+            self._retry_or_fail(task, str(e))
+            return None
+
+    def execute_task(self, task: ScheduledTask, agent):
+        return asyncio.run(self.execute_task_async(task, agent))
+
+    async def _run_async(self):
+        slots = asyncio.Semaphore(self.max_concurrency)
+        in_flight = set()
+
+        async def worker(task: ScheduledTask):
+            async with slots:
+                await self.execute_task_async(task, self.agent)
+
+        while self.running:
+            try:
+                due = await asyncio.to_thread(self.wait_for_due)
+                for task in due:
+                    job = asyncio.create_task(worker(task))
+                    in_flight.add(job)
+                    job.add_done_callback(in_flight.discard)
+            except Exception as e:
+                print(f"Scheduler error: {e}")
+
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+
+    def run(self):
+        """Scheduler loop: sleep until tasks are due, then hand them to the bounded worker pool."""
+        self.running = True
+        asyncio.run(self._run_async())
+
+    def start(self) -> threading.Thread:
+        thread = threading.Thread(target=self.run, daemon=True, name="task-scheduler")
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        with self._lock:
+            self.running = False
+            self._wakeup.notify_all()
+
+
+def extract_message_content(result):
+    """Helper to extract message content from agent result"""
+    if hasattr(result, 'messages') and result.messages:
+        return result.messages[-1].content
+    elif isinstance(result, dict) and 'messages' in result:
+        last = result['messages'][-1]
+        return last['content'] if isinstance(last, dict) else last.content
+    else:
+        return str(result)
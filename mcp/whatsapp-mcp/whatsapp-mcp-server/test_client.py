@@ -1,164 +1,102 @@
 import streamlit as st
-import asyncio
 import json
 import datetime
+import uuid
 from typing import Dict, Any, List
-from dataclasses import dataclass
-from langchain_groq import ChatGroq
-from langchain_openai import ChatOpenAI
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
 from langgraph.prebuilt import create_react_agent
 from dotenv import load_dotenv
 import pandas as pd
-import threading
-import time
-import schedule
-from PIL import Image
-import base64
-from io import BytesIO
+from agent_runtime import AgentRuntime
+from chat_history import ChatHistory
+from conversation_memory import ConversationMemory, memory_budget
+from model_router import ModelRouter, RoutedAgent, make_chat_model
+from schedule_parser import parse_schedule
+from shared_server import server_config
+from streaming import TurnMetrics, iter_agent_events
+from task_scheduler import ScheduledTask, TaskScheduler
 
 # Load environment variables
 load_dotenv()
 
-@dataclass
-class ScheduledTask:
-    id: str
-    task: str
-    scheduled_time: datetime.datetime
-    status: str = "pending"
-    created_at: datetime.datetime = datetime.datetime.now()
-    
-    def __post_init__(self):
-        if self.created_at is None:
-            self.created_at = datetime.datetime.now()
+@st.cache_resource
+def get_runtime() -> AgentRuntime:
+    """Process-wide event loop thread that owns the MCP client, its sessions and the agent"""
+    return AgentRuntime()
 
-class TaskScheduler:
-    def __init__(self):
-        self.tasks = []
-        self.running = False
-        
-    def add_task(self, task: ScheduledTask):
-        self.tasks.append(task)
-        
-    def get_pending_tasks(self):
-        return [t for t in self.tasks if t.status == "pending"]
-    
-    def get_all_tasks(self):
-        return self.tasks
-    
-    def execute_task(self, task: ScheduledTask, agent):
-        try:
-            # Execute the task using the agent
-            result = asyncio.run(agent.ainvoke({
-                "messages": [{"role": "user", "content": task.task}]
-            }))
-            
-            # Extract response using helper function
-            response = extract_message_content(result)
-            task.status = "completed"
-            return response
-            
-        except Exception as e:
-            task.status = f"failed: {str(e)}"
-            return None
+@st.cache_resource
+def get_router() -> ModelRouter:
+    """Process-wide model router, so latency and error stats accumulate across sessions"""
+    return ModelRouter()
 
-def extract_message_content(result):
-    """Helper to extract message content from agent result"""
-    if hasattr(result, 'messages') and result.messages:
-        return result.messages[-1].content
-    elif isinstance(result, dict) and 'messages' in result:
-        return result['messages'][-1]['content']
-    else:
-        return str(result)
+@st.cache_resource
+def get_scheduler() -> TaskScheduler:
+    """Process-wide persistent scheduler, started once and shared by all sessions"""
+    scheduler = TaskScheduler()
+    scheduler.start()
+    return scheduler
 
-def parse_schedule_command(message: str) -> Dict[str, Any]:
-    """Parse scheduling commands from user messages"""
-    import re
-    
-    # Pattern to match scheduling commands
-    patterns = [
-        r"send message to (\w+) at (\d{1,2}):(\d{2})\s*(am|pm)?\s*(.+)?",
-        r"remind me at (\d{1,2}):(\d{2})\s*(am|pm)?\s*to\s*(.+)",
-        r"schedule (.+) for (\d{1,2}):(\d{2})\s*(am|pm)?",
-        r"at (\d{1,2}):(\d{2})\s*(am|pm)?\s*(.+)"
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, message.lower())
-        if match:
-            groups = match.groups()
-            
-            if "send message to" in message.lower():
-                recipient = groups[0]
-                hour = int(groups[1])
-                minute = int(groups[2])
-                period = groups[3] if groups[3] else None
-                task_content = groups[4] if len(groups) > 4 and groups[4] else message
-                
-                # Adjust for AM/PM
-                if period == "pm" and hour != 12:
-                    hour += 12
-                elif period == "am" and hour == 12:
-                    hour = 0
-                
-                scheduled_time = datetime.datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
-                if scheduled_time <= datetime.datetime.now():
-                    scheduled_time += datetime.timedelta(days=1)
-                
-                return {
-                    "is_scheduled": True,
-                    "task": f"send message to {recipient}: {task_content}",
-                    "scheduled_time": scheduled_time,
-                    "type": "message"
-                }
-    
-    return {"is_scheduled": False}
-
-def image_to_base64(image):
-    """Convert PIL Image to base64 string"""
-    buffered = BytesIO()
-    image.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
-    return img_str
+def render_message(message: Dict[str, Any], history: ChatHistory):
+    """Render one history entry; media is read from the disk cache, not session state"""
+    with st.chat_message(message["role"]):
+        if message.get("type") == "image":
+            thumbnail = history.media.thumbnail(message["media"])
+            st.image(thumbnail or history.media.path(message["media"]), caption=message["filename"])
+        elif message.get("type") == "file":
+            st.write(f"📎 File: {message['filename']} ({message.get('size', 0) / 1024:.1f} KB)")
+            with open(history.media.path(message["media"]), "rb") as f:
+                st.download_button(
+                    label="Download",
+                    data=f,
+                    file_name=message["filename"],
+                    mime=message.get("mime", "application/octet-stream"),
+                    key=f"download_{message['seq']}"
+                )
+        else:
+            st.markdown(message["content"])
 
 def init_session_state():
     """Initialize session state variables"""
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-    if "agent" not in st.session_state:
-        st.session_state.agent = None
-    if "mcp_client" not in st.session_state:
-        st.session_state.mcp_client = None
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    if "history" not in st.session_state:
+        # Recent turns in memory, everything else (and all media bytes) on disk
+        st.session_state.history = ChatHistory(st.session_state.session_id)
+    if "older_from" not in st.session_state:
+        # Seq of the oldest turn paged in with "Load older messages"; the turns themselves stay on disk
+        st.session_state.older_from = None
+    if "last_upload" not in st.session_state:
+        st.session_state.last_upload = None
     if "scheduler" not in st.session_state:
-        st.session_state.scheduler = TaskScheduler()
+        st.session_state.scheduler = get_scheduler()
     if "tools_loaded" not in st.session_state:
         st.session_state.tools_loaded = False
+    if "memory" not in st.session_state:
+        st.session_state.memory = ConversationMemory()
+    if "turn_metrics" not in st.session_state:
+        st.session_state.turn_metrics = []
 
-async def setup_agent():
-    """Setup the LangGraph agent with MCP tools"""
-    try:
-        # Connect to MCP server
-        client = MultiServerMCPClient({
-            "whatsapp": {
-                "command": "python",
-                "args": ["main.py"],
-                "transport": "stdio"
-            }
-        })
-        
-        # Load tools
-        tools = await client.get_tools()
-        
-        # Initialize LLM
-        llm = ChatGroq(temperature=0, model="openai/gpt-oss-20b")
-        
-        # Create agent
-        agent = create_react_agent(llm, tools)
-        
-        return agent, client, tools
-    except Exception as e:
-        st.error(f"Failed to setup agent: {str(e)}")
-        return None, None, []
+async def setup_agent(exit_stack, router: ModelRouter, server_mode: str = "connect_or_spawn", temperature: float = 0.0):
+    """Setup the LangGraph agent with MCP tools.
+
+    Runs on the AgentRuntime loop. The MCP session is entered on the runtime's exit
+    stack, so every tool call reuses it instead of opening a new session per call.
+    The agent routes each turn to the fastest healthy model through the ModelRouter.
+    """
+    # Connect to the shared MCP server (or spawn a private stdio one)
+    client = MultiServerMCPClient({
+        "whatsapp": server_config(server_mode)
+    })
+    
+    # Load tools bound to one long-lived session
+    session = await exit_stack.enter_async_context(client.session("whatsapp"))
+    tools = await load_mcp_tools(session)
+    
+    # One agent per model, built the first time the router picks it
+    agent = RoutedAgent(router, lambda spec: create_react_agent(make_chat_model(spec, temperature), tools))
+    
+    return agent, client, tools
 
 def main():
     st.set_page_config(
@@ -174,16 +112,64 @@ def main():
     with st.sidebar:
         st.title("🤖 Chat Assistant")
         
+        # Model Selection
+        st.header("Model Configuration")
+        specs = get_router().specs.values()
+        providers = sorted({spec.provider for spec in specs})
+        model_type = st.selectbox(
+            "Select Model Provider",
+            providers,
+            format_func=lambda provider: {"groq": "Groq", "openai": "OpenAI"}.get(provider, provider)
+        )
+        model_name = st.selectbox(
+            "Model",
+            [spec.name for spec in specs if spec.provider == model_type]
+        )
+        routing = st.radio(
+            "Routing",
+            ["Fastest healthy", "Prefer selected model"],
+            help="Either way, a failing model falls back to the next fastest one"
+        )
+        min_tier = st.select_slider(
+            "Minimum quality tier",
+            options=[1, 2, 3],
+            value=1,
+            help="1 = small/fast models, 3 = strongest models"
+        )
+        st.session_state.route = {
+            "min_tier": min_tier,
+            "preferred": model_name if routing == "Prefer selected model" else None
+        }
+        
+        temperature = st.slider("Temperature", 0.0, 1.0, 0.0, 0.1)
+        
+        st.session_state.memory.budget = st.number_input(
+            "Memory budget (tokens)",
+            min_value=200,
+            value=memory_budget(model_name),
+            step=200,
+            help="Prompt tokens spent on earlier turns, summaries and cached tool results"
+        )
+        
         # Agent Setup
         st.header("Agent Setup")
+        server_mode = st.selectbox(
+            "MCP Server",
+            ["connect_or_spawn", "connect", "stdio"],
+            help="connect_or_spawn reuses a running shared server (starting one if needed), stdio spawns a private server"
+        )
         if st.button("Initialize Agent"):
             with st.spinner("Setting up agent..."):
                 try:
-                    agent, client, tools = asyncio.run(setup_agent())
+                    runtime = get_runtime()
+                    router = get_router()
+                    agent, client, tools = runtime.initialize(
+                        lambda stack: setup_agent(stack, router, server_mode, temperature)
+                    )
                     if agent:
-                        st.session_state.agent = agent
-                        st.session_state.mcp_client = client
                         st.session_state.tools_loaded = True
+                        # The scheduler runs its own loop; route its turns onto the runtime loop
+                        st.session_state.scheduler.set_agent(runtime)
                         st.success(f"Agent initialized with {len(tools)} tools!")
                         st.json([tool.name for tool in tools])
                     else:
@@ -191,26 +177,6 @@ def main():
                 except Exception as e:
                     st.error(f"Error: {str(e)}")
         
-        # Model Selection
-        st.header("Model Configuration")
-        model_type = st.selectbox(
-            "Select Model Provider",
-            ["Groq", "OpenAI"]
-        )
-        
-        if model_type == "Groq":
-            model_name = st.selectbox(
-                "Groq Model",
-                ["openai/gpt-oss-20b", "llama-3.1-8b-instant", "mixtral-8x7b-32768"]
-            )
-        else:
-            model_name = st.selectbox(
-                "OpenAI Model", 
-                ["gpt-4", "gpt-3.5-turbo", "gpt-4-turbo"]
-            )
-        
-        temperature = st.slider("Temperature", 0.0, 1.0, 0.0, 0.1)
-        
         # Scheduled Tasks
         st.header("📅 Scheduled Tasks")
         
@@ -223,6 +189,8 @@ def main():
                     st.write(f"**Task:** {task.task}")
                     st.write(f"**Scheduled:** {task.scheduled_time.strftime('%Y-%m-%d %H:%M')}")
                     st.write(f"**Status:** {task.status}")
+                    if task.recurrence:
+                        st.write(f"**Repeats:** {task.recurrence}")
         
         # All tasks history
         all_tasks = st.session_state.scheduler.get_all_tasks()
@@ -234,12 +202,29 @@ def main():
                         "Task": task.task[:50] + "..." if len(task.task) > 50 else task.task,
                         "Scheduled": task.scheduled_time.strftime('%H:%M'),
                         "Status": task.status,
+                        "Attempts": task.attempts,
+                        "Repeats": task.recurrence or "",
                         "Created": task.created_at.strftime('%Y-%m-%d %H:%M')
                     } for task in all_tasks
                 ])
                 st.dataframe(df)
             else:
                 st.info("No tasks scheduled yet")
+        
+        with st.expander("Scheduler Metrics"):
+            st.json(st.session_state.scheduler.metrics.summary())
+        
+        with st.expander("Model Router"):
+            st.dataframe(pd.DataFrame(get_router().snapshot()))
+        
+        with st.expander("Agent Runtime Overhead"):
+            st.json(get_runtime().overhead_stats())
+        
+        with st.expander("Turn Latency"):
+            if st.session_state.turn_metrics:
+                st.dataframe(pd.DataFrame(st.session_state.turn_metrics[-20:]))
+            else:
+                st.info("No agent turns yet")
     
     # Main chat interface
     st.title("💬 LangGraph Chat Assistant")
@@ -252,22 +237,21 @@ def main():
     chat_container = st.container()
     
     # Display chat messages
+    history = st.session_state.history
+    recent = history.recent()
     with chat_container:
-        for message in st.session_state.messages:
-            with st.chat_message(message["role"]):
-                if message.get("type") == "image":
-                    st.image(message["content"], caption="Uploaded Image", use_column_width=True)
-                elif message.get("type") == "file":
-                    st.write(f"📎 File: {message['filename']}")
-                    if st.download_button(
-                        label="Download",
-                        data=message["content"],
-                        file_name=message["filename"],
-                        mime=message.get("mime", "application/octet-stream")
-                    ):
-                        st.success("File ready for download!")
-                else:
-                    st.markdown(message["content"])
+        first_recent = recent[0]["seq"] if recent else history.first_recent_seq()
+        older_from = st.session_state.older_from
+        oldest_shown = min(older_from, first_recent) if older_from is not None else first_recent
+        if oldest_shown > 0 and st.button(f"Load older messages ({oldest_shown} more)"):
+            st.session_state.older_from = max(0, oldest_shown - 20)
+            st.rerun()
+        # Paged-in turns, and any that left the in-memory window since, are read from disk on each render
+        if older_from is not None:
+            for message in history.load_range(older_from, first_recent):
+                render_message(message, history)
+        for message in recent:
+            render_message(message, history)
     
     # File upload area
     col1, col2 = st.columns([3, 1])
@@ -284,106 +268,107 @@ def main():
             label_visibility="collapsed"
         )
     
-    # Handle file upload
-    if uploaded_file is not None:
-        file_details = {
-            "filename": uploaded_file.name,
-            "filetype": uploaded_file.type,
-            "filesize": uploaded_file.size
-        }
+    # Handle file upload; the uploader keeps returning the same file on every rerun,
+    # so only a new upload is added to the history
+    upload_key = (uploaded_file.name, uploaded_file.size) if uploaded_file is not None else None
+    if uploaded_file is not None and upload_key != st.session_state.last_upload:
+        st.session_state.last_upload = upload_key
+        file_content = uploaded_file.getvalue()
         
         # Handle different file types
         if uploaded_file.type.startswith('image/'):
-            image = Image.open(uploaded_file)
-            st.session_state.messages.append({
-                "role": "user",
-                "content": image,
-                "type": "image",
-                "filename": uploaded_file.name
-            })
-            
-            # Convert image for processing
-            img_b64 = image_to_base64(image)
+            history.append_media("user", "image", file_content, uploaded_file.name, uploaded_file.type)
             user_input = f"I've uploaded an image: {uploaded_file.name}. Please analyze it."
             
         else:
             # Handle other file types
-            file_content = uploaded_file.read()
-            st.session_state.messages.append({
-                "role": "user", 
-                "content": file_content,
-                "type": "file",
-                "filename": uploaded_file.name,
-                "mime": uploaded_file.type
-            })
+            history.append_media("user", "file", file_content, uploaded_file.name, uploaded_file.type)
             user_input = f"I've uploaded a file: {uploaded_file.name}. Please process it."
     
     # Handle user input
     if user_input:
         # Add user message to chat history
-        st.session_state.messages.append({"role": "user", "content": user_input})
+        history.append({"role": "user", "content": user_input})
         
         # Check if it's a scheduling command
-        schedule_info = parse_schedule_command(user_input)
+        schedule_info = parse_schedule(user_input)
         
         if schedule_info["is_scheduled"]:
             # Create scheduled task
-            task_id = f"task_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            task_id = f"task_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
             scheduled_task = ScheduledTask(
                 id=task_id,
                 task=schedule_info["task"],
-                scheduled_time=schedule_info["scheduled_time"]
+                scheduled_time=schedule_info["scheduled_time"],
+                recurrence=schedule_info["recurrence"]
             )
             
             st.session_state.scheduler.add_task(scheduled_task)
             
             response = f"✅ Task scheduled successfully!\n\n**Task:** {schedule_info['task']}\n**Scheduled for:** {schedule_info['scheduled_time'].strftime('%Y-%m-%d %H:%M')}\n**Task ID:** {task_id}"
+            if schedule_info["recurrence"]:
+                response += f"\n**Repeats:** {schedule_info['recurrence']}"
             
-            st.session_state.messages.append({"role": "assistant", "content": response})
+            history.append({"role": "assistant", "content": response})
             
         else:
-            # Process with agent
-            with st.spinner("Processing..."):
+            # Process with agent, rendering tool progress and tokens as they arrive
+            with st.chat_message("user"):
+                st.markdown(user_input)
+            
+            with st.chat_message("assistant"):
+                status = st.status("Thinking...", expanded=False)
+                placeholder = st.empty()
+                metrics = TurnMetrics()
                 try:
-                    result = asyncio.run(st.session_state.agent.ainvoke({
-                        "messages": [{"role": "user", "content": user_input}]
-                    }))
-                    print(result)
-                    response = result['messages'][-1].content
+                    runtime = get_runtime()
+                    streamed = ""
+                    response = ""
+                    tool_results = []
+                    pending_calls = []
+                    prompt, metrics.prompt_tokens = st.session_state.memory.build_messages(user_input)
+                    events = iter_agent_events(
+                        runtime.agent,
+                        {"messages": prompt},
+                        config={"configurable": st.session_state.route}
+                    )
+                    for event in runtime.stream(events):
+                        metrics.observe(event)
+                        if event.kind == "token":
+                            streamed += event.text
+                            placeholder.markdown(streamed + "▌")
+                        elif event.kind == "tool_start":
+                            # Anything streamed before a tool call was the model thinking aloud
+                            streamed = ""
+                            placeholder.empty()
+                            status.update(label=f"Calling {event.tool}...")
+                            status.write(f"🔧 `{event.tool}` {json.dumps(event.args, default=str)}")
+                            pending_calls.append((event.tool, event.args))
+                        elif event.kind == "tool_end":
+                            args = next((a for name, a in pending_calls if name == event.tool), None)
+                            if (event.tool, args) in pending_calls:
+                                pending_calls.remove((event.tool, args))
+                            tool_results.append((event.tool, args, event.text))
+                            status.write(f"✅ `{event.tool}` returned {len(event.text)} chars")
+                        elif event.kind == "final":
+                            response = event.text
                     
-                    st.session_state.messages.append({"role": "assistant", "content": response})
+                    metrics.finish()
+                    placeholder.markdown(response)
+                    status.update(label=f"Done in {metrics.total:.1f}s ({runtime.agent.last_model})", state="complete")
+                    history.append({"role": "assistant", "content": response})
+                    st.session_state.memory.add_turn(user_input, response, tool_results)
                     
                 except Exception as e:
-                    
+                    metrics.finish()
+                    status.update(label="Failed", state="error")
                     error_msg = f"❌ Error processing request: {str(e)}"
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                    history.append({"role": "assistant", "content": error_msg})
+                
+                st.session_state.turn_metrics.append(metrics.as_dict())
         
         # Refresh the page to show new messages
         st.rerun()
 
-# Task execution scheduler (runs in background)
-def run_scheduler():
-    """Background task scheduler"""
-    while True:
-        try:
-            if hasattr(st.session_state, 'scheduler'):
-                pending_tasks = st.session_state.scheduler.get_pending_tasks()
-                current_time = datetime.datetime.now()
-                
-                for task in pending_tasks:
-                    if current_time >= task.scheduled_time:
-                        if hasattr(st.session_state, 'agent') and st.session_state.agent:
-                            st.session_state.scheduler.execute_task(task, st.session_state.agent)
-            
-            time.sleep(60)  # Check every minute
-        except Exception as e:
-            print(f"Scheduler error: {e}")
-            time.sleep(60)
-
-# Start background scheduler
 if __name__ == "__main__":
-    # Start scheduler in background thread
-    scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-    scheduler_thread.start()
-    
     main()
\ No newline at end of file
@@ -6,10 +6,8 @@ import os.path
 import requests
 import json
 import audio
-
-MESSAGES_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'whatsapp-bridge', 'store', 'messages.db')
-WHATSAPP_API_BASE_URL = "http://localhost:8080/api"
-print(WHATSAPP_API_BASE_URL)
+from accounts import get_account
+from compact import format_messages_compact, format_chats_compact
 
 @dataclass
 class Message:
@@ -49,8 +47,12 @@ class MessageContext:
     after: List[Message]
 
 def get_sender_name(sender_jid: str) -> str:
+    account = get_account()
+    cached = account.sender_names.get(sender_jid)
+    if cached is not None:
+        return cached
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
+        conn = account.connect()
         cursor = conn.cursor()
         
         # First try matching by exact JID
@@ -80,10 +82,9 @@ def get_sender_name(sender_jid: str) -> str:
             
             result = cursor.fetchone()
         
-        if result and result[0]:
-            return result[0]
-        else:
-            return sender_jid
+        name = result[0] if result and result[0] else sender_jid
+        account.sender_names.put(sender_jid, name)
+        return name
         
     except sqlite3.Error as e:
         print(f"Database error while getting sender name: {e}")
@@ -132,11 +133,13 @@ def list_messages(
     page: int = 0,
     include_context: bool = True,
     context_before: int = 1,
-    context_after: int = 1
+    context_after: int = 1,
+    compact: bool = False,
+    max_tokens: Optional[int] = None
 ) :
     """Get messages matching the specified criteria with optional context."""
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
+        conn = get_account().connect()
         cursor = conn.cursor()
         
         # Build base query
@@ -211,9 +214,12 @@ def list_messages(
                 messages_with_context.append(context.message)
                 messages_with_context.extend(context.after)
             
-            return format_messages_list(messages_with_context, show_chat_info=True)
+            result = messages_with_context
+            
+        if compact:
+            return format_messages_compact(result, max_tokens, sender_name=get_sender_name)
             
-        # Format and display messages without context
+        # Format and display messages in the verbose layout
         return format_messages_list(result, show_chat_info=True)    
         
     except sqlite3.Error as e:
@@ -231,7 +237,7 @@ def get_message_context(
 ) -> MessageContext:
     """Get context around a specific message."""
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
+        conn = get_account().connect()
         cursor = conn.cursor()
         
         # Get the target message first
@@ -317,6 +323,14 @@ def get_message_context(
             conn.close()
 
 
+def format_message_context(context: MessageContext, max_tokens: Optional[int] = None) -> str:
+    """Render a message context in compact form."""
+    return format_messages_compact(context.before + [context.message] + context.after, max_tokens, sender_name=get_sender_name)
+
+def format_chats_list(chats: List[Chat], max_tokens: Optional[int] = None) -> str:
+    """Render a list of chats in compact form."""
+    return format_chats_compact(chats, max_tokens, sender_name=get_sender_name)
+
 def list_chats(
     query: Optional[str] = None,
     limit: int = 20,
@@ -326,7 +340,7 @@ def list_chats(
 ) -> List[Chat]:
     """Get chats matching the specified criteria."""
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
+        conn = get_account().connect()
         cursor = conn.cursor()
         
         # Build base query
@@ -394,7 +408,7 @@ def list_chats(
 def search_contacts(query: str) -> List[Contact]:
     """Search contacts by name or phone number."""
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
+        conn = get_account().connect()
         cursor = conn.cursor()
         
         # Split query into characters to support partial matching
@@ -442,7 +456,7 @@ def get_contact_chats(jid: str, limit: int = 20, page: int = 0) -> List[Chat]:
         page: Page number for pagination (default 0)
     """
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
+        conn = get_account().connect()
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -487,7 +501,7 @@ def get_contact_chats(jid: str, limit: int = 20, page: int = 0) -> List[Chat]:
 def get_last_interaction(jid: str) :
     """Get most recent message involving the contact."""
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
+        conn = get_account().connect()
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -536,7 +550,7 @@ def get_last_interaction(jid: str) :
 def get_chat(chat_jid: str, include_last_message: bool = True) -> Optional[Chat]:
     """Get chat metadata by JID."""
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
+        conn = get_account().connect()
         cursor = conn.cursor()
         
         query = """
@@ -584,7 +598,7 @@ def get_chat(chat_jid: str, include_last_message: bool = True) -> Optional[Chat]
 def get_direct_chat_by_contact(sender_phone_number: str) -> Optional[Chat]:
     """Get chat metadata by sender phone number."""
     try:
-        conn = sqlite3.connect(MESSAGES_DB_PATH)
+        conn = get_account().connect()
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -629,13 +643,12 @@ def send_message(recipient: str, message: str) -> Tuple[bool, str]:
         if not recipient:
             return False, "Recipient must be provided"
         
-        url = f"{WHATSAPP_API_BASE_URL}/send"
         payload = {
             "recipient": recipient,
             "message": message,
         }
         
-        response = requests.post(url, json=payload)
+        response = get_account().post("send", payload)
         
         # Check if the request was successful
         if response.status_code == 200:
@@ -663,13 +676,12 @@ def send_file(recipient: str, media_path: str) -> Tuple[bool, str]:
         if not os.path.isfile(media_path):
             return False, f"Media file not found: {media_path}"
         
-        url = f"{WHATSAPP_API_BASE_URL}/send"
         payload = {
             "recipient": recipient,
             "media_path": media_path
         }
         
-        response = requests.post(url, json=payload)
+        response = get_account().post("send", payload)
         
         # Check if the request was successful
         if response.status_code == 200:
@@ -703,13 +715,12 @@ def send_audio_message(recipient: str, media_path: str) -> Tuple[bool, str]:
             except Exception as e:
                 return False, f"Error converting file to opus ogg. You likely need to install ffmpeg: {str(e)}"
         
-        url = f"{WHATSAPP_API_BASE_URL}/send"
         payload = {
             "recipient": recipient,
             "media_path": media_path
         }
         
-        response = requests.post(url, json=payload)
+        response = get_account().post("send", payload)
         
         # Check if the request was successful
         if response.status_code == 200:
@@ -736,13 +747,12 @@ def download_media(message_id: str, chat_jid: str) -> Optional[str]:
         The local file path if download was successful, None otherwise
     """
     try:
-        url = f"{WHATSAPP_API_BASE_URL}/download"
         payload = {
             "message_id": message_id,
             "chat_jid": chat_jid
         }
         
-        response = requests.post(url, json=payload)
+        response = get_account().post("download", payload)
         
         if response.status_code == 200:
             result = response.json()